@@ -0,0 +1,244 @@
+"""Offline stand-in for google.genai.Client used by the benchmarks
+
+Returns canned text, grounding metadata, PCM audio and PNG images built from
+real google-genai response types, after sleeping for a latency drawn from a
+configurable distribution per kind of call.
+"""
+import asyncio
+import io
+import math
+import random
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+
+from google.genai import errors, types
+from PIL import Image
+
+SCRIPT = "\n".join(
+    f"Mike: Question {i} - what should listeners know about this part of the topic?"
+    if i % 2 == 0 else
+    f"Dr. Lisa: Answer {i} - here is the key insight, explained with a short example and a takeaway."
+    for i in range(14)
+)
+
+ANALYSIS = """{
+  "speakers": {
+    "Mike": {"role": "curious interviewer", "characteristics": "friendly host in his thirties"},
+    "Dr. Lisa": {"role": "research expert", "characteristics": "AI researcher with glasses"}
+  },
+  "sections": [
+    {"title": "Introduction", "start_text": "Question 0", "end_text": "Answer 3", "theme": "overview", "mood": "welcoming", "key_concepts": ["scope", "history"], "duration_estimate": 40},
+    {"title": "Core Ideas", "start_text": "Question 4", "end_text": "Answer 7", "theme": "mechanics", "mood": "focused", "key_concepts": ["scaling", "data"], "duration_estimate": 50},
+    {"title": "Open Problems", "start_text": "Question 8", "end_text": "Answer 11", "theme": "challenges", "mood": "thoughtful", "key_concepts": ["safety", "evaluation"], "duration_estimate": 50},
+    {"title": "Takeaways", "start_text": "Question 12", "end_text": "Answer 13", "theme": "summary", "mood": "optimistic", "key_concepts": ["future"], "duration_estimate": 30}
+  ]
+}"""
+
+
+@dataclass
+class Latency:
+    """Latency distribution in seconds: "fixed", "uniform" (mean +/- jitter) or "lognormal" """
+    mean: float = 0.0
+    jitter: float = 0.0
+    kind: str = "lognormal"
+
+    def sample(self, rng):
+        if self.mean <= 0:
+            return 0.0
+        if self.kind == "fixed":
+            return self.mean
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.jitter, self.mean + self.jitter))
+        # lognormal with the requested mean; jitter is the sigma of the underlying normal
+        sigma = self.jitter or 0.25
+        return rng.lognormvariate(0.0, sigma) * self.mean / math.exp(sigma * sigma / 2)
+
+
+@dataclass
+class LatencyProfile:
+    """Latency per kind of call"""
+    text: Latency = field(default_factory=Latency)
+    search: Latency = field(default_factory=Latency)
+    tts: Latency = field(default_factory=Latency)
+    image: Latency = field(default_factory=Latency)
+
+    @classmethod
+    def realistic(cls, scale=1.0):
+        """Rough shape of live Gemini latencies, scaled by `scale`"""
+        return cls(
+            text=Latency(2.0 * scale, 0.3),
+            search=Latency(4.0 * scale, 0.3),
+            tts=Latency(3.0 * scale, 0.3),
+            image=Latency(6.0 * scale, 0.3),
+        )
+
+
+class FakeModels:
+    """Synchronous `client.models` replacement"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        kind, response = self._client.respond(model, contents, config)
+        time.sleep(self._client.latency_for(kind))
+        self._client.maybe_fail(model)
+        return response
+
+    def generate_content_stream(self, model, contents, config=None):
+        kind, response = self._client.respond(model, contents, config)
+        self._client.maybe_fail(model)
+        chunks = self._client.split_text(response)
+        delay = self._client.latency_for(kind) / max(1, len(chunks))
+        for chunk in chunks:
+            time.sleep(delay)
+            yield chunk
+
+
+class FakeAsyncModels:
+    """Asynchronous `client.aio.models` replacement"""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def generate_content(self, model, contents, config=None):
+        kind, response = self._client.respond(model, contents, config)
+        await asyncio.sleep(self._client.latency_for(kind))
+        self._client.maybe_fail(model)
+        return response
+
+    async def generate_content_stream(self, model, contents, config=None):
+        kind, response = self._client.respond(model, contents, config)
+        self._client.maybe_fail(model)
+        chunks = self._client.split_text(response)
+        delay = self._client.latency_for(kind) / max(1, len(chunks))
+
+        async def iterate():
+            for chunk in chunks:
+                await asyncio.sleep(delay)
+                yield chunk
+        return iterate()
+
+
+class FakeAio:
+    def __init__(self, client):
+        self.models = FakeAsyncModels(client)
+
+
+class FakeClient:
+    """Drop-in for google.genai.Client that never touches the network"""
+
+    def __init__(self, latency=None, seed=0, tts_rate=24000, image_size=(1280, 720), error_rate=0.0, retry_after=0.05):
+        self.latency = latency or LatencyProfile()
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.errors = {}
+        self.tts_rate = tts_rate
+        self.image_size = image_size
+        self.calls = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._png = None
+        self.models = FakeModels(self)
+        self.aio = FakeAio(self)
+
+    def latency_for(self, kind):
+        with self._lock:
+            return getattr(self.latency, kind).sample(self._rng)
+
+    def maybe_fail(self, model):
+        """Raise a 429 with a RetryInfo detail for a fraction (`error_rate`) of calls"""
+        with self._lock:
+            if self.error_rate <= 0 or self._rng.random() >= self.error_rate:
+                return
+            self.errors[model] = self.errors.get(model, 0) + 1
+        raise errors.ClientError(429, {"error": {
+            "code": 429,
+            "status": "RESOURCE_EXHAUSTED",
+            "message": "Quota exceeded (simulated)",
+            "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{self.retry_after}s"}],
+        }})
+
+    def png(self):
+        if self._png is None:
+            buffer = io.BytesIO()
+            Image.new("RGB", self.image_size, (24, 48, 96)).save(buffer, format="PNG")
+            self._png = buffer.getvalue()
+        return self._png
+
+    def respond(self, model, contents, config=None):
+        """Pick the canned response for a request; returns (latency kind, response)"""
+        with self._lock:
+            self.calls[model] = self.calls.get(model, 0) + 1
+        prompt = contents if isinstance(contents, str) else str(contents)
+        config_text = str(config)
+
+        if "tts" in model:
+            return "tts", _response(types.Part(inline_data=types.Blob(data=self.speech(prompt), mime_type="audio/pcm")))
+        if "image" in model:
+            return "image", _response(types.Part(inline_data=types.Blob(data=self.png(), mime_type="image/png")))
+        if "google_search" in config_text:
+            return "search", _search_response(prompt)
+        if "Analyze this podcast transcript" in prompt:
+            return "text", _response(types.Part(text=ANALYSIS))
+        if "podcast conversation" in prompt:
+            return "text", _response(types.Part(text=SCRIPT))
+        if "image generation prompt" in prompt:
+            return "text", _response(types.Part(text="Abstract gradient background with soft geometric shapes, studio lighting"))
+        return "text", _response(types.Part(text=f"Overview of the requested topic.\n\n{prompt[:200]}"))
+
+    def speech(self, prompt):
+        """16-bit mono PCM with a tone per dialogue line (~15 characters per second) and pauses between lines"""
+        lines = prompt.splitlines()[1:] if "\n" in prompt else [prompt]
+        period = max(1, self.tts_rate // 200)
+        tone = array("h", (int(3000 * math.sin(2 * math.pi * n / period)) for n in range(period))).tobytes()
+        edge = b"\x00\x00" * int(0.1 * self.tts_rate)
+        pause = b"\x00\x00" * int(0.35 * self.tts_rate)
+        spoken = []
+        for line in lines:
+            seconds = max(0.5, len(line.split(":", 1)[-1]) / 15.0)
+            spoken.append(tone * int(seconds * self.tts_rate / period))
+        return edge + pause.join(spoken) + edge
+
+    @staticmethod
+    def split_text(response, size=40):
+        text = response.text or ""
+        return [_response(types.Part(text=text[i:i + size])) for i in range(0, len(text), size)] or [response]
+
+
+def _response(part, grounding_metadata=None):
+    text = part.text or ""
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(parts=[part], role="model"),
+            grounding_metadata=grounding_metadata,
+        )],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=100,
+            candidates_token_count=max(1, len(text) // 4),
+            total_token_count=100 + max(1, len(text) // 4),
+        ),
+    )
+
+
+def _search_response(prompt):
+    text = "Search overview: recent progress, open questions and notable research groups."
+    grounding = types.GroundingMetadata(
+        grounding_chunks=[
+            types.GroundingChunk(web=types.GroundingChunkWeb(uri=f"https://example.com/source-{i}", title=f"Source {i}"))
+            for i in range(1, 4)
+        ],
+        grounding_supports=[
+            types.GroundingSupport(segment=types.Segment(text=text), grounding_chunk_indices=[0, 1]),
+        ],
+    )
+    return _response(types.Part(text=text), grounding)
+
+
+def install(client):
+    """Route every model call in the agent through `client`"""
+    from agent.utils import set_client
+    set_client(client)
+    return client
@@ -0,0 +1,301 @@
+"""Offline benchmark harness
+
+Runs entirely against benchmarks.fake_client.FakeClient, so no GEMINI_API_KEY or
+network access is needed.
+
+    python -m benchmarks.run graph --runs 4 --concurrency 4 --latency-scale 0.1
+    python -m benchmarks.run micro
+    python -m benchmarks.run import --import-budget 2.0
+    python -m benchmarks.run all --json bench_output.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from benchmarks.fake_client import SCRIPT, FakeClient, LatencyProfile, install  # noqa: E402
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _children_cpu():
+    """CPU time of finished child processes (ffmpeg encodes)"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1],
+    }
+
+
+# ========= End-to-end graph =========
+
+def bench_configurable(work_dir, **overrides):
+    """Configuration that keeps every artifact and cache inside work_dir"""
+    configurable = {
+        "workspace_dir": str(Path(work_dir) / "runs"),
+        "tts_cache_dir": str(Path(work_dir) / "tts"),
+        "tts_cache_enabled": False,
+        "share_speaker_images": False,
+    }
+    configurable.update(overrides)
+    return configurable
+
+
+async def _run_once(graph, index, configurable):
+    """Run the graph once and return per-node latencies from the debug stream"""
+    started = {}
+    node_latency = defaultdict(float)
+    run_start = time.perf_counter()
+    config = {"configurable": {**configurable, "thread_id": f"bench-{index}"}}
+    inputs = {"topic": f"Benchmark topic {index}", "video_url": "https://example.com/video"}
+    async for event in graph.astream(inputs, config, stream_mode="debug"):
+        payload = event.get("payload", {})
+        timestamp = datetime.fromisoformat(event["timestamp"]).timestamp()
+        if event["type"] == "task":
+            started[payload["id"]] = timestamp
+        elif event["type"] == "task_result" and payload["id"] in started:
+            node_latency[payload["name"]] += timestamp - started.pop(payload["id"])
+    return time.perf_counter() - run_start, dict(node_latency)
+
+
+def bench_graph(runs=1, concurrency=1, latency_scale=0.0, error_rate=0.0, **overrides):
+    """Run build_graph() end to end against the fake client
+
+    `error_rate` makes that fraction of calls fail with a retryable 429.
+    """
+    from agent.graph import build_graph
+    from agent.metrics import PROCESS_METRICS
+
+    client = install(FakeClient(LatencyProfile.realistic(latency_scale), error_rate=error_rate))
+    graph = build_graph().compile()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        configurable = bench_configurable(work_dir, **overrides)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(index):
+            async with semaphore:
+                return await _run_once(graph, index, configurable)
+
+        async def run_all():
+            return await asyncio.gather(*(limited(i) for i in range(runs)))
+
+        cpu_start = time.process_time()
+        children_start = _children_cpu()
+        wall_start = time.perf_counter()
+        results = asyncio.run(run_all())
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        children_cpu = _children_cpu() - children_start
+
+    per_node = defaultdict(list)
+    for _, node_latency in results:
+        for name, seconds in node_latency.items():
+            per_node[name].append(seconds)
+
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "latency_scale": latency_scale,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "encoder_cpu_seconds": children_cpu,
+        "peak_rss_mb": peak_rss_mb(),
+        "throughput_runs_per_min": runs / wall * 60 if wall else 0.0,
+        "run_seconds": summarize([seconds for seconds, _ in results]),
+        "nodes": {name: summarize(samples) for name, samples in per_node.items()},
+        "api_calls": dict(client.calls),
+        "injected_errors": dict(client.errors),
+        "api_tokens": PROCESS_METRICS.summary()["tokens"],
+    }
+
+
+# ========= Micro-benchmarks =========
+
+def _timeit(fn, repeat):
+    """Best-of-`repeat` wall time of fn() in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_micro(repeat=3, segments=14, segment_seconds=12.0, renderers=("static",)):
+    """Time the hot helpers on synthetic inputs"""
+    from PIL import Image
+
+    from agent.audios import (
+        concatenate_audio_files,
+        concatenate_pcm_segments,
+        create_video,
+    )
+    from agent.configuration import Configuration
+    from agent.utils import parse_transcript_with_sections, wave_file
+
+    configuration = Configuration()
+    sections = [{"title": f"Section {i}"} for i in range(4)]
+    transcript = "\n".join([SCRIPT] * 50)
+    results = {
+        "parse_transcript_with_sections": _timeit(lambda: parse_transcript_with_sections(transcript, sections), repeat),
+    }
+
+    pcm = b"\x00\x00" * int(segment_seconds * configuration.tts_rate)
+    with tempfile.TemporaryDirectory() as work_dir:
+        wav_files = []
+        for i in range(segments):
+            path = os.path.join(work_dir, f"segment_{i:02d}.wav")
+            wave_file(path, pcm, 1, configuration.tts_rate, configuration.tts_sample_width)
+            wav_files.append(path)
+
+        def concat_files():
+            os.unlink(concatenate_audio_files(wav_files))
+
+        results["concatenate_audio_files"] = _timeit(concat_files, repeat)
+        results["concatenate_pcm_segments"] = _timeit(lambda: concatenate_pcm_segments([pcm] * segments), repeat)
+
+        backgrounds = []
+        for i in range(len(sections)):
+            path = os.path.join(work_dir, f"background_{i}.png")
+            Image.new("RGB", (1280, 720), (20 * i, 40, 80)).save(path)
+            backgrounds.append(path)
+        speakers = {}
+        for name in ("Mike", "Dr. Lisa"):
+            path = os.path.join(work_dir, f"{name}.png")
+            Image.new("RGB", (1024, 1024), (200, 120, 60)).save(path)
+            speakers[name] = path
+
+        audio_file = os.path.join(work_dir, "track.wav")
+        wave_file(audio_file, concatenate_pcm_segments([pcm] * segments), 1, configuration.tts_rate, configuration.tts_sample_width)
+        video_segments = [
+            {
+                "speaker": "Mike" if i % 2 == 0 else "Dr. Lisa",
+                "content": f"line {i}",
+                "section_idx": i * len(sections) // segments,
+                "duration": segment_seconds,
+                "background": backgrounds[i * len(sections) // segments],
+            }
+            for i in range(segments)
+        ]
+        for renderer in renderers:
+            render_config = Configuration(video_renderer=renderer)
+            output = os.path.join(work_dir, f"video_{renderer}.mp4")
+            results[f"create_video[{renderer}]"] = _timeit(
+                lambda: create_video(video_segments, speakers, output, audio_file, render_config), 1
+            )
+
+    return {"repeat": repeat, "segments": segments, "segment_seconds": segment_seconds, "seconds": results}
+
+
+# ========= Cold start =========
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import agent.graph
+imported = time.perf_counter() - start
+agent.graph.create_graph()
+print(json.dumps({
+    "import": imported,
+    "create_graph": time.perf_counter() - start - imported,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+# Heavy modules that should only be imported by the nodes that use them
+LAZY_MODULES = ("moviepy", "PIL", "google.genai", "numpy")
+
+
+def _podcast_files():
+    from agent.workspace import PODCAST_DIR
+    return {str(path) for path in PODCAST_DIR.rglob("*")} if PODCAST_DIR.exists() else set()
+
+
+def bench_import(repeat=5, budget=None):
+    """Time `import agent.graph` and create_graph() in fresh interpreters
+
+    Runs without GEMINI_API_KEY, and reports heavy modules imported eagerly and
+    any files or directories created under podcast/ at load time.
+    """
+    env = {k: v for k, v in os.environ.items() if k not in ("GEMINI_API_KEY", "EXPORT_GRAPH_PNG")}
+    before = _podcast_files()
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    total = summarize([sample["import"] + sample["create_graph"] for sample in samples])
+    modules = samples[-1]["modules"]
+    return {
+        "repeat": repeat,
+        "import_seconds": summarize([sample["import"] for sample in samples]),
+        "create_graph_seconds": summarize([sample["create_graph"] for sample in samples]),
+        "total_seconds": total,
+        "eager_heavy_modules": [name for name in LAZY_MODULES if name in modules],
+        "created_paths": sorted(_podcast_files() - before),
+        "budget_seconds": budget,
+        "within_budget": budget is None or total["p50"] <= budget,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the multi-modal researcher")
+    parser.add_argument("suite", choices=["graph", "micro", "import", "all"])
+    parser.add_argument("--runs", type=int, default=1, help="graph: number of end-to-end runs")
+    parser.add_argument("--concurrency", type=int, default=1, help="graph: runs in flight at once")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="graph: multiply the realistic API latency profile")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="graph: fraction of API calls failing with a retryable 429")
+    parser.add_argument("--repeat", type=int, default=3, help="micro: best-of repetitions")
+    parser.add_argument("--moviepy", action="store_true", help="micro: also time the MoviePy renderer")
+    parser.add_argument("--import-budget", type=float, default=2.0, help="import: fail if the median cold start exceeds this many seconds")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.suite in ("graph", "all"):
+        results["graph"] = bench_graph(args.runs, args.concurrency, args.latency_scale, args.error_rate)
+    if args.suite in ("micro", "all"):
+        renderers = ("static", "moviepy") if args.moviepy else ("static",)
+        results["micro"] = bench_micro(args.repeat, renderers=renderers)
+    if args.suite in ("import", "all"):
+        results["import"] = bench_import(args.repeat, args.import_budget)
+
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    cold_start = results.get("import")
+    if cold_start and not (cold_start["within_budget"] and not cold_start["eager_heavy_modules"] and not cold_start["created_paths"]):
+        sys.exit("cold start regression: over budget, eager heavy imports or files created at import")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,401 @@
-from moviepy import AudioFileClip, CompositeVideoClip, ImageClip
-import tempfile
+import asyncio
+import logging
 import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from dotenv import load_dotenv
-from agent.utils import client, config
 
+from agent.batched_tts import (
+    MAX_SPEAKERS,
+    asynthesize_chunk,
+    can_batch,
+    chunk_segments,
+    synthesize_chunk,
+)
+from agent.chunked_render import render_chunked_video
+from agent.image_cache import get_image_cache, image_cache_settings
+from agent.metrics import (
+    bind_context,
+    current_run_metrics,
+    on_run_release,
+    record_audio,
+    record_cache,
+    record_frames,
+)
+from agent.postprocess import process_segments
+from agent.progress import Progress
+from agent.render import (
+    RENDER_PROFILES,
+    get_ffmpeg_exe,
+    get_render_profile,
+    profile_fps,
+    render_static_video,
+    speaker_size,
+)
+from agent.tts_cache import get_tts_cache
+from agent.utils import agenerate_content, config, generate_content, wave_file
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
-def generate_audio_and_update_segments(segments):
-    """Generate TTS audio for each segment, measure actual durations, and concatenate"""
-    import wave
+MOVIEPY_FPS = 24
+# audio_format -> (ffmpeg encoder, container format, file suffix)
+AUDIO_FORMATS = {
+    "mp3": ("libmp3lame", "mp3", ".mp3"),
+    "opus": ("libopus", "ogg", ".opus"),
+}
+
+def _tts_voice(segment, configuration):
+    """Pick the prebuilt voice for a segment's speaker"""
+    return configuration.mike_voice if segment['speaker'].lower() == 'mike' else configuration.lisa_voice
+
+def _tts_request(segment, configuration):
+    """Build the generate_content arguments for synthesizing one segment"""
     from google.genai import types
-    
-    print(f"Generating TTS audio for {len(segments)} segments...")
-    segment_audio_files = []
-    updated_segments = []
-    
-    for i, segment in enumerate(segments):
-        print(f"Generating audio for segment {i+1}/{len(segments)}: {segment['speaker']}")
-        
-        # Generate TTS audio for this segment
-        tts_prompt = f"{segment['speaker']}: {segment['content']}"
-        
-        response = client.models.generate_content(
-            model= config.tts_model,
-            contents=tts_prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name=config.mike_voice if segment['speaker'].lower() == 'mike' else config.lisa_voice,
-                        )
+
+    return dict(
+        model= configuration.tts_model,
+        contents=f"{segment['speaker']}: {segment['content']}",
+        config=types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                        voice_name=_tts_voice(segment, configuration),
                     )
                 )
             )
         )
-        
-        # Save segment audio to temporary file
-        segment_audio_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        audio_data = response.candidates[0].content.parts[0].inline_data.data
-        
-        # Write audio data to file using wave module
-        with wave.open(segment_audio_file.name, 'wb') as wav_file:
-            wav_file.setnchannels(config.tts_channel if config.tts_channel > 0 else 1)
-            wav_file.setsampwidth(config.tts_sample_width)
-            wav_file.setframerate(config.tts_rate)
-            wav_file.writeframes(audio_data)
-        
-        # Measure actual duration
-        with wave.open(segment_audio_file.name, 'rb') as wf:
-            frames = wf.getnframes()
-            rate = wf.getframerate()
-            actual_duration = frames / float(rate)
-        
-        # Update segment with actual duration
-        segment_copy = segment.copy()
-        segment_copy['duration'] = actual_duration
-        updated_segments.append(segment_copy)
-        segment_audio_files.append(segment_audio_file.name)
-        
-        print(f"Generated {actual_duration:.1f}s audio for {segment['speaker']}\n")
-    
-    print("Concatenating all audio segments...")
-    # Concatenate all segment audio files
-    final_audio_file = concatenate_audio_files(segment_audio_files)
-    
-    # Clean up temporary segment files
-    for audio_file in segment_audio_files:
-        os.unlink(audio_file)
-        
+    )
+
+def _tts_cache_key(cache, segment, configuration):
+    return cache.make_key(configuration.tts_model, _tts_voice(segment, configuration), segment['speaker'], segment['content'], configuration.tts_rate)
+
+class _RunPrefetch:
+    """Segments of one run queued for synthesis ahead of time (e.g. while the script
+    is still streaming), keyed by their synthesis inputs so later requests can pick
+    them up, and the thread pool synthesizing them"""
+
+    def __init__(self, configuration):
+        self.futures = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(1, configuration.tts_max_concurrency), thread_name_prefix="tts-prefetch")
+
+# Per run id; a run's entry is released when its audio node exits, when one of
+# its nodes fails, or when it finishes
+_prefetch_runs = {}
+_prefetch_lock = threading.Lock()
+
+def _current_run_id():
+    return getattr(current_run_metrics(), "run_id", None)
+
+def _prefetch_key(segment, configuration):
+    return (configuration.tts_model, _tts_voice(segment, configuration), segment['speaker'], segment['content'], configuration.tts_rate)
+
+def prefetch_segment_audio(segment, configuration=None):
+    """Start synthesizing a segment in the background before it is requested
+
+    The result is picked up by synthesize_segment_audio / asynthesize_segment_audio
+    for a segment with the same inputs in the same run. When the TTS cache is
+    enabled the finished audio lives in the cache, so the pending entry is dropped
+    as soon as it is done.
+    """
+    if configuration is None:
+        configuration = config
+    if configuration.tts_mode == "batched":
+        # Lines are synthesized together once the script is complete
+        return
+
+    run_id = _current_run_id()
+    key = _prefetch_key(segment, configuration)
+    with _prefetch_lock:
+        prefetch = _prefetch_runs.get(run_id)
+        if prefetch is None:
+            prefetch = _prefetch_runs[run_id] = _RunPrefetch(configuration)
+        if key in prefetch.futures:
+            return
+        # Bound to the caller's context so the calls count towards its run's metrics
+        future = prefetch.executor.submit(bind_context(synthesize_segment_audio), segment, configuration, False)
+        prefetch.futures[key] = future
+
+    if get_tts_cache(configuration) is not None:
+        def drop(done_future):
+            if not done_future.cancelled() and done_future.exception() is None:
+                with _prefetch_lock:
+                    if prefetch.futures.get(key) is done_future:
+                        del prefetch.futures[key]
+        future.add_done_callback(drop)
+
+def _take_prefetched(segment, configuration):
+    with _prefetch_lock:
+        prefetch = _prefetch_runs.get(_current_run_id())
+        return prefetch.futures.pop(_prefetch_key(segment, configuration), None) if prefetch else None
+
+def release_prefetched(run_id=None):
+    """Drop a run's prefetched audio and cancel its queued requests (default: the current run)"""
+    if run_id is None:
+        run_id = _current_run_id()
+    with _prefetch_lock:
+        prefetch = _prefetch_runs.pop(run_id, None)
+    if prefetch is not None:
+        prefetch.executor.shutdown(wait=False, cancel_futures=True)
+        prefetch.futures.clear()
+
+on_run_release(release_prefetched)
+
+def synthesize_segment_audio(segment, configuration=None, use_prefetched=True):
+    """Generate TTS audio for a single segment and return the raw PCM bytes
+
+    Segments whose synthesis inputs are unchanged are served from the TTS cache,
+    and segments already queued by prefetch_segment_audio wait for that result.
+    """
+    if configuration is None:
+        configuration = config
+
+    prefetched = _take_prefetched(segment, configuration) if use_prefetched else None
+    if prefetched is not None:
+        try:
+            return prefetched.result()
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetched TTS failed for {segment['speaker']}, retrying: {e}")
+
+    cache = get_tts_cache(configuration)
+    if cache is not None:
+        cache_key = _tts_cache_key(cache, segment, configuration)
+        pcm = cache.get(cache_key)
+        record_cache("tts", pcm is not None)
+        if pcm is not None:
+            return pcm
+
+    response = generate_content(**_tts_request(segment, configuration), configuration=configuration)
+    pcm = response.candidates[0].content.parts[0].inline_data.data
+    if cache is not None:
+        cache.put(cache_key, pcm)
+    return pcm
+
+async def asynthesize_segment_audio(segment, configuration=None):
+    """Async variant of synthesize_segment_audio"""
+    if configuration is None:
+        configuration = config
+
+    prefetched = _take_prefetched(segment, configuration)
+    if prefetched is not None:
+        try:
+            return await asyncio.wrap_future(prefetched)
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetched TTS failed for {segment['speaker']}, retrying: {e}")
+
+    cache = get_tts_cache(configuration)
+    if cache is not None:
+        cache_key = _tts_cache_key(cache, segment, configuration)
+        pcm = await asyncio.to_thread(cache.get, cache_key)
+        record_cache("tts", pcm is not None)
+        if pcm is not None:
+            return pcm
+
+    response = await agenerate_content(**_tts_request(segment, configuration), configuration=configuration)
+    pcm = response.candidates[0].content.parts[0].inline_data.data
+    if cache is not None:
+        await asyncio.to_thread(cache.put, cache_key, pcm)
+    return pcm
+
+def pcm_duration(pcm, configuration=None):
+    """Compute the duration in seconds of raw PCM data from its byte length"""
+    if configuration is None:
+        configuration = config
+    channels = configuration.tts_channel if configuration.tts_channel > 0 else 1
+    bytes_per_second = channels * configuration.tts_sample_width * configuration.tts_rate
+    return len(pcm) / float(bytes_per_second)
+
+def concatenate_pcm_segments(pcm_segments):
+    """Concatenate raw PCM segments into one preallocated buffer"""
+    buffer = bytearray(sum(len(pcm) for pcm in pcm_segments))
+    view = memoryview(buffer)
+    offset = 0
+    for pcm in pcm_segments:
+        view[offset:offset + len(pcm)] = pcm
+        offset += len(pcm)
+    return buffer
+
+def write_audio_track(pcm, configuration=None):
+    """Write the assembled PCM track to a temporary WAV file in a single pass"""
+    if configuration is None:
+        configuration = config
+
+    final_audio_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+    final_audio_file.close()
+    try:
+        wave_file(
+            final_audio_file.name,
+            pcm,
+            configuration.tts_channel if configuration.tts_channel > 0 else 1,
+            configuration.tts_rate,
+            configuration.tts_sample_width,
+        )
+    except Exception:
+        os.unlink(final_audio_file.name)
+        raise
+    return final_audio_file.name
+
+def _tts_voices(segments, configuration):
+    return {segment['speaker']: _tts_voice(segment, configuration) for segment in segments}
+
+def _synthesize_line(segments, configuration):
+    return [synthesize_segment_audio(segments[0], configuration)]
+
+async def _asynthesize_line(segments, configuration):
+    return [await asynthesize_segment_audio(segments[0], configuration)]
+
+def _synthesize_chunk(segments, configuration):
+    return synthesize_chunk(segments, _tts_voices(segments, configuration), configuration)
+
+async def _asynthesize_chunk(segments, configuration):
+    return await asynthesize_chunk(segments, _tts_voices(segments, configuration), configuration)
+
+def _tts_units(segments, configuration):
+    """Split segments into the index groups synthesized by one call each
+
+    One group per line, or with `tts_mode="batched"` chunks of consecutive lines
+    for multi-speaker calls.
+    """
+    if configuration.tts_mode == "batched":
+        if can_batch(segments):
+            return chunk_segments(segments, configuration.tts_batch_max_chars), True
+        logger.warning(f"⚠️ Batched TTS supports at most {MAX_SPEAKERS} speakers, synthesizing line by line")
+    return [[i] for i in range(len(segments))], False
+
+def _record_segment_audio(i, segments, segment_pcm, updated_segments, configuration):
+    """Store a segment copy with its actual duration measured from its PCM"""
+    segment_copy = segments[i].copy()
+    segment_copy['duration'] = pcm_duration(segment_pcm[i], configuration)
+    updated_segments[i] = segment_copy
+    logger.info(f"Generated {segment_copy['duration']:.1f}s audio for segment {i+1}/{len(segments)}: {segments[i]['speaker']}")
+
+def _tts_progress(segments):
+    return Progress("tts", len(segments), "segments", audio_seconds=0.0, failed=0)
+
+def _advance_tts_progress(progress, unit, updated_segments, failures):
+    """Report a finished TTS unit with the audio produced so far"""
+    audio_seconds = sum(segment['duration'] for segment in updated_segments if segment)
+    progress.advance(len(unit), audio_seconds=round(audio_seconds, 2), failed=len(failures))
+
+def _assemble_audio(segments, segment_pcm, updated_segments, failures, configuration, progress):
+    """Report failed segments, or post-process and concatenate the segment PCM and write the final track
+
+    Audio seconds are recorded (and reported in a last progress event) from the
+    final segment durations, i.e. after post-processing.
+    """
+    if failures:
+        failures.sort(key=lambda failure: failure[0])
+        details = "; ".join(f"segment {i+1} ({speaker}): {e}" for i, speaker, e in failures)
+        raise RuntimeError(f"TTS failed for {len(failures)}/{len(segments)} segments: {details}")
+
+    if not segments:
+        return None, updated_segments
+
+    if configuration.audio_postprocess:
+        logger.info("Trimming, normalizing and concatenating audio segments...")
+        track, durations = process_segments(segment_pcm, configuration)
+        for segment, duration in zip(updated_segments, durations):
+            segment['duration'] = duration
+    else:
+        logger.info("Concatenating all audio segments...")
+        track = concatenate_pcm_segments(segment_pcm)
+    final_audio_file = write_audio_track(track, configuration)
+
     total_duration = sum(seg['duration'] for seg in updated_segments)
-    print(f"✅ Generated complete audio file ({total_duration:.1f} seconds)")
-    
+    record_audio(total_duration)
+    progress.update(progress.total, audio_seconds=round(total_duration, 2))
+    logger.info(f"✅ Generated complete audio file ({total_duration:.1f} seconds)")
+    cache = get_tts_cache(configuration)
+    if cache is not None:
+        logger.info(f"TTS cache: {cache.stats()}")
+
     return final_audio_file, updated_segments
 
+def generate_audio_and_update_segments(segments, configuration=None):
+    """Generate TTS audio for each segment, measure actual durations, and concatenate
+
+    Segment requests (or with `tts_mode="batched"` multi-speaker requests for
+    chunks of lines) are sent concurrently (up to `tts_max_concurrency` at a time),
+    but the returned segments and the concatenated audio keep the script order.
+    Segment PCM stays in memory and the final track is written to disk once.
+    Each finished request is reported as a "tts" progress event.
+    """
+    if configuration is None:
+        configuration = config
+
+    units, batched = _tts_units(segments, configuration)
+    synthesize = _synthesize_chunk if batched else _synthesize_line
+    max_workers = max(1, min(configuration.tts_max_concurrency, len(units) or 1))
+    logger.info(f"Generating TTS audio for {len(segments)} segments in {len(units)} calls ({max_workers} concurrent requests)...")
+    segment_pcm = [None] * len(segments)
+    updated_segments = [None] * len(segments)
+    failures = []
+    progress = _tts_progress(segments)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(bind_context(synthesize), [segments[i] for i in unit], configuration): unit
+            for unit in units
+        }
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                pieces = future.result()
+            except Exception as e:
+                for i in unit:
+                    logger.error(f"❌ TTS failed for segment {i+1}/{len(segments)} ({segments[i]['speaker']}): {e}")
+                    failures.append((i, segments[i]['speaker'], e))
+                _advance_tts_progress(progress, unit, updated_segments, failures)
+                continue
+            for i, pcm in zip(unit, pieces):
+                segment_pcm[i] = pcm
+                _record_segment_audio(i, segments, segment_pcm, updated_segments, configuration)
+            _advance_tts_progress(progress, unit, updated_segments, failures)
+
+    return _assemble_audio(segments, segment_pcm, updated_segments, failures, configuration, progress)
+
+async def agenerate_audio_and_update_segments(segments, configuration=None):
+    """Async variant of generate_audio_and_update_segments
+
+    Requests are bounded by an asyncio semaphore instead of a thread pool, and
+    writing the final track runs in a worker thread.
+    """
+    if configuration is None:
+        configuration = config
+
+    units, batched = _tts_units(segments, configuration)
+    synthesize_unit = _asynthesize_chunk if batched else _asynthesize_line
+    max_concurrency = max(1, configuration.tts_max_concurrency)
+    logger.info(f"Generating TTS audio for {len(segments)} segments in {len(units)} calls ({max_concurrency} concurrent requests)...")
+    semaphore = asyncio.Semaphore(max_concurrency)
+    segment_pcm = [None] * len(segments)
+    updated_segments = [None] * len(segments)
+    failures = []
+    progress = _tts_progress(segments)
+
+    async def synthesize(unit):
+        async with semaphore:
+            try:
+                pieces = await synthesize_unit([segments[i] for i in unit], configuration)
+            except Exception as e:
+                for i in unit:
+                    logger.error(f"❌ TTS failed for segment {i+1}/{len(segments)} ({segments[i]['speaker']}): {e}")
+                    failures.append((i, segments[i]['speaker'], e))
+                _advance_tts_progress(progress, unit, updated_segments, failures)
+                return
+        for i, pcm in zip(unit, pieces):
+            segment_pcm[i] = pcm
+            _record_segment_audio(i, segments, segment_pcm, updated_segments, configuration)
+        _advance_tts_progress(progress, unit, updated_segments, failures)
+
+    await asyncio.gather(*(synthesize(unit) for unit in units))
+
+    return await asyncio.to_thread(_assemble_audio, segments, segment_pcm, updated_segments, failures, configuration, progress)
+
 def concatenate_audio_files(audio_files):
     """Concatenate multiple WAV files into one"""
     import wave
@@ -108,90 +429,178 @@ def assign_images_to_segments(segments, section_backgrounds):
                 
         if section_key in section_backgrounds and section_backgrounds[section_key]:
             segment['background'] = section_backgrounds[section_key]
-            print(f"✅ Assigned background to segment: {section_backgrounds[section_key]}")
+            logger.info(f"✅ Assigned background to segment: {section_backgrounds[section_key]}")
         else:
             # Fallback to first available background
             available_backgrounds = [bg for bg in section_backgrounds.values() if bg]
             if available_backgrounds:
                 segment['background'] = available_backgrounds[0]
-                print(f"⚠️ Using fallback background: {available_backgrounds[0]}")
+                logger.warning(f"⚠️ Using fallback background: {available_backgrounds[0]}")
             else:
                 # No backgrounds available - just log and set to None
-                print(f"❌ No background images available for segment '{segment['speaker']}' in section {section_idx}")
+                logger.error(f"❌ No background images available for segment '{segment['speaker']}' in section {section_idx}")
                 segment['background'] = None
     
     return segments
 
+
+def audio_suffix(configuration):
+    """File suffix of the configured `audio_format`"""
+    if configuration.audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio_format {configuration.audio_format!r} - use one of {', '.join(AUDIO_FORMATS)}")
+    return AUDIO_FORMATS[configuration.audio_format][2]
+
+
+def encode_audio(audio_file, output_path, configuration=None):
+    """Encode the WAV track to the configured compressed `audio_format` with ffmpeg"""
+    if configuration is None:
+        configuration = config
+
+    audio_suffix(configuration)  # validates audio_format
+    encoder, container, _ = AUDIO_FORMATS[configuration.audio_format]
+    command = [
+        get_ffmpeg_exe(), "-y", "-loglevel", "error", "-i", str(audio_file),
+        "-vn", "-c:a", encoder, "-b:a", configuration.audio_bitrate, "-f", container, str(output_path),
+    ]
+    logger.info(f"Encoding audio to {configuration.audio_format} at {configuration.audio_bitrate}: {output_path}...")
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed encoding audio ({result.returncode}): {result.stderr.strip()}")
+    return output_path
+
     
-def create_video(segments, speaker_images, output_path, audio_file=None):
-    """Combine audio, images, and speaker images into final video"""
+def create_video(segments, speaker_images, output_path, audio_file=None, configuration=None):
+    """Combine audio, images, and speaker images into final video
+
+    Uses the static-frame renderer by default and falls back to the MoviePy
+    compositing path if it is disabled or fails. The "chunked" renderer falls
+    back to the static-frame one. Resolution, frame rate and encoder settings
+    come from the `render_profile`; encoding is reported as "encode" progress.
+    """
+    if configuration is None:
+        configuration = config
+
+    duration = sum(segment['duration'] for segment in segments)
+    profile = get_render_profile(configuration)
+    renderer = configuration.video_renderer
+    if renderer == "chunked":
+        try:
+            # Counts only the frames of chunks it actually encodes
+            return render_chunked_video(segments, speaker_images, output_path, audio_file, configuration)
+        except Exception as e:
+            logger.warning(f"⚠️ Chunked rendering failed, falling back to static-frame rendering: {e}")
+            renderer = "static"
+
+    # The chunked renderer's workers keep their own caches
+    image_cache = get_image_cache(*image_cache_settings(configuration))
+    if renderer == "static":
+        try:
+            fps = profile_fps(profile, configuration.static_frame_fps)
+            progress = Progress("encode", round(duration * fps), "frames", renderer="static")
+            render_static_video(segments, speaker_images, output_path, audio_file, fps, image_cache, profile, progress.update)
+            progress.update(progress.total)  # ffmpeg's last report can be a frame short
+            record_frames(round(duration * fps))
+            return output_path
+        except Exception as e:
+            logger.warning(f"⚠️ Static-frame rendering failed, falling back to MoviePy: {e}")
+
+    fps = profile_fps(profile, MOVIEPY_FPS)
+    progress = Progress("encode", round(duration * fps), "frames", renderer="moviepy")
+    create_video_moviepy(segments, speaker_images, output_path, audio_file, image_cache, profile, progress.update)
+    progress.update(progress.total)
+    record_frames(round(duration * fps))
+    return output_path
+
+def _moviepy_frame_logger(on_frames):
+    """proglog logger passing MoviePy's frame counter to `on_frames`"""
+    import proglog
+
+    class FrameLogger(proglog.ProgressBarLogger):
+        def bars_callback(self, bar, attr, value, old_value=None):
+            if bar == "frame_index" and attr == "index":
+                on_frames(int(value) + 1)
+
+    return FrameLogger()
+
+def create_video_moviepy(segments, speaker_images, output_path, audio_file=None, image_cache=None, profile=None, on_frames=None):
+    """Combine audio, images, and speaker images into final video with MoviePy compositing"""
+    from moviepy import AudioFileClip, CompositeVideoClip, ImageClip
+
+    if image_cache is None:
+        image_cache = get_image_cache()
+    profile = profile or RENDER_PROFILES["final"]
+
     video_clips = []
     current_time = 0
     
-    print(f"Creating video with {len(segments)} segments...")
+    logger.info(f"Creating video with {len(segments)} segments...")
     
     for i, segment in enumerate(segments):
-        print(f"Processing segment {i+1}/{len(segments)}: {segment['speaker']} at {current_time:.1f}s")
-        print(f"🔍 DEBUG: Segment background: {segment.get('background')}")
+        logger.info(f"Processing segment {i+1}/{len(segments)}: {segment['speaker']} at {current_time:.1f}s")
+        logger.debug(f"Segment background: {segment.get('background')}")
         
         # Create background clip only if background image exists
         if segment.get('background'):
-            bg_clip = ImageClip(segment['background'], duration=segment['duration'])
+            bg_clip = ImageClip(image_cache.get(segment['background']), duration=segment['duration'])
             bg_clip = bg_clip.with_start(current_time)
             video_clips.append(bg_clip)
-            print(f"✅ Added background clip for segment {i+1}")
+            logger.info(f"✅ Added background clip for segment {i+1}")
         else:
-            print(f"⚠️ Skipping background for segment {i+1} - no image available")
+            logger.warning(f"⚠️ Skipping background for segment {i+1} - no image available")
         
         # Add speaker image if available
         speaker_name = segment['speaker']
-        print(f"🔍 DEBUG: Looking for speaker '{speaker_name}' in speaker_images")
+        logger.debug(f"Looking for speaker '{speaker_name}' in speaker_images")
         if speaker_name in speaker_images and speaker_images[speaker_name]:
-            speaker_clip = ImageClip(speaker_images[speaker_name], duration=segment['duration'])
-            # Standardize speaker image size - same width and height for consistency
-            speaker_clip = speaker_clip.resized((200, 200))  # Fixed size for all speakers
+            # Decoded once at the fixed speaker size; the alpha channel becomes the clip mask
+            speaker_array = image_cache.get(speaker_images[speaker_name], speaker_size(profile), "RGBA")
+            speaker_clip = ImageClip(speaker_array, duration=segment['duration'])
             # Position speaker image in the center of the screen
             # speaker_clip = speaker_clip.with_start(current_time).with_position("center")
             speaker_clip = speaker_clip.with_start(current_time).with_position(("center", 0))
             video_clips.append(speaker_clip)
-            print(f"✅ Added speaker {speaker_name} from {current_time:.1f}s to {current_time + segment['duration']:.1f}s")
+            logger.info(f"✅ Added speaker {speaker_name} from {current_time:.1f}s to {current_time + segment['duration']:.1f}s")
         else:
-            print(f"⚠️ No speaker image available for {speaker_name}")
+            logger.warning(f"⚠️ No speaker image available for {speaker_name}")
         
         current_time += segment['duration']
     
     if not video_clips:
         raise ValueError("❌ No video clips were created - cannot generate video")
     
-    print("Combining all video clips...")
+    logger.info("Combining all video clips...")
     # Combine all video clips
     final_video = CompositeVideoClip(video_clips)
     
     # Add audio if available
     if audio_file and os.path.exists(audio_file):
-        print(f"Adding audio from: {audio_file}")
+        logger.info(f"Adding audio from: {audio_file}")
         audio_clip = AudioFileClip(audio_file)
         # Ensure audio duration matches video duration
         if audio_clip.duration > final_video.duration:
             audio_clip = audio_clip.subclipped(0, final_video.duration)  # Fixed MoviePy v2 syntax
         elif audio_clip.duration < final_video.duration:
-            print(f"⚠️ Audio ({audio_clip.duration:.1f}s) is shorter than video ({final_video.duration:.1f}s)")
+            logger.warning(f"⚠️ Audio ({audio_clip.duration:.1f}s) is shorter than video ({final_video.duration:.1f}s)")
         
         final_video = final_video.with_audio(audio_clip)
-        print("✅ Audio successfully added to video")
+        logger.info("✅ Audio successfully added to video")
     else:
-        print("⚠️ No audio file provided or file doesn't exist - generating silent video")
+        logger.warning("⚠️ No audio file provided or file doesn't exist - generating silent video")
     
     # Write final video
-    print(f"Writing video to {output_path}...")
+    logger.info(f"Writing video to {output_path}...")
     final_video.write_videofile(
         output_path,
-        fps=24,
+        fps=profile_fps(profile, MOVIEPY_FPS),
         codec='libx264',
-        audio_codec='aac' if audio_file and os.path.exists(audio_file) else None
+        audio_codec='aac' if audio_file and os.path.exists(audio_file) else None,
+        audio_bitrate=profile.audio_bitrate,
+        preset=profile.preset,
+        ffmpeg_params=["-crf", str(profile.crf)],
+        **({"logger": _moviepy_frame_logger(on_frames)} if on_frames else {}),
     )
     
-    print("Video generation completed!")
+    logger.info("Video generation completed!")
     
     # Clean up audio clip if used
     if 'audio_clip' in locals():
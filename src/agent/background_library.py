@@ -0,0 +1,151 @@
+"""Library of generated section backgrounds, looked up by similarity
+
+Every generated background is filed under a text key built from its section's
+theme, mood and key concepts. A new section whose key is similar enough (TF-IDF
+cosine similarity) to a filed one reuses that image, skipping both the prompt
+and the image-generation call. When the library grows past its size limit the
+least used entries are evicted.
+"""
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+from agent.workspace import SHARED_DIR, atomic_write_bytes
+
+DEFAULT_LIBRARY_DIR = SHARED_DIR / "background_library"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it", "of", "on", "or",
+    "the", "to", "with", "its", "their", "this", "that", "vs", "versus",
+}
+
+
+def section_text(section):
+    """The fields that describe how a section's background should look"""
+    concepts = section.get("key_concepts") or []
+    if isinstance(concepts, str):
+        concepts = [concepts]
+    return " ".join([section.get("theme") or "", section.get("mood") or "", *concepts])
+
+
+def tokenize(text):
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS and len(token) > 1]
+
+
+def _tfidf(tokens, document_frequency, documents):
+    """Unit-length TF-IDF vector (smoothed idf, as in scikit-learn)"""
+    counts = Counter(tokens)
+    vector = {
+        term: count * (math.log((1 + documents) / (1 + document_frequency.get(term, 0))) + 1)
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+
+class BackgroundLibrary:
+    """SQLite index plus image files in one directory, shared by runs and processes"""
+
+    def __init__(self, library_dir=None, max_entries=500):
+        self.library_dir = Path(library_dir) if library_dir else DEFAULT_LIBRARY_DIR
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.library_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS backgrounds ("
+                "key TEXT PRIMARY KEY, text TEXT, image TEXT, uses INTEGER, created REAL, last_used REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Connection whose transaction commits (or rolls back on error) and which is closed on exit"""
+        with closing(sqlite3.connect(self.library_dir / "index.sqlite", timeout=30)) as conn, conn:
+            yield conn
+
+    def lookup(self, section, threshold):
+        """Return (image_path, similarity) of the closest filed background above `threshold`, else None"""
+        query = tokenize(section_text(section))
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, text, image FROM backgrounds").fetchall()
+        best = None
+        if query and rows:
+            entries = [(key, tokenize(text), image) for key, text, image in rows]
+            document_frequency = Counter(term for _, tokens, _ in entries for term in set(tokens))
+            query_vector = _tfidf(query, document_frequency, len(entries))
+            for key, tokens, image in entries:
+                vector = _tfidf(tokens, document_frequency, len(entries))
+                score = sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items())
+                if score >= threshold and (best is None or score > best[1]) and (self.library_dir / image).exists():
+                    best = (key, score, image)
+
+        with self._lock:
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if best is None:
+            return None
+        key, score, image = best
+        with self._connect() as conn:
+            conn.execute("UPDATE backgrounds SET uses = uses + 1, last_used = ? WHERE key = ?", (time.time(), key))
+        return self.library_dir / image, score
+
+    def add(self, section, image_path):
+        """File a generated background under its section's description"""
+        text = section_text(section)
+        if not tokenize(text):
+            return None
+        key = hashlib.sha256(text.lower().encode("utf-8")).hexdigest()
+        image = f"{key[:16]}{Path(image_path).suffix or '.png'}"
+        atomic_write_bytes(self.library_dir / image, Path(image_path).read_bytes())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO backgrounds VALUES (?, ?, ?, COALESCE((SELECT uses FROM backgrounds WHERE key = ?), 1), ?, ?)",
+                (key, text, image, key, now, now),
+            )
+            self._evict(conn, keep=key)
+        return self.library_dir / image
+
+    def _evict(self, conn, keep):
+        """Drop the least used (then least recently used) entries beyond max_entries, never `keep`"""
+        count = conn.execute("SELECT COUNT(*) FROM backgrounds").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        victims = conn.execute(
+            "SELECT key, image FROM backgrounds WHERE key != ? ORDER BY uses ASC, last_used ASC LIMIT ?",
+            (keep, count - self.max_entries),
+        ).fetchall()
+        for key, image in victims:
+            conn.execute("DELETE FROM backgrounds WHERE key = ?", (key,))
+            (self.library_dir / image).unlink(missing_ok=True)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+
+def get_background_library(configuration):
+    """Return the shared BackgroundLibrary, or None if reuse is disabled"""
+    if not configuration.background_library_enabled:
+        return None
+    library_dir = str(configuration.background_library_dir or DEFAULT_LIBRARY_DIR)
+    with _libraries_lock:
+        library = _libraries.get(library_dir)
+        if library is None:
+            library = _libraries[library_dir] = BackgroundLibrary(library_dir, configuration.background_library_max_entries)
+        return library
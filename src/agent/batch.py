@@ -0,0 +1,212 @@
+"""Run many topics through the research graph in one process
+
+    python -m agent.batch jobs.jsonl --jobs 6 --render-concurrency 2
+    python -m agent.batch jobs.csv --config tts_max_concurrency=8 --manifest podcast/batches/nightly.json
+
+Jobs are read from JSON Lines / a JSON list (objects with `topic` and optional
+`video_url` / `output_path` / `output_mode`) or a CSV file with a
+`topic,video_url` header (and optionally `output_mode`).
+
+Several jobs run through the async graph at once, so one topic's search overlaps
+another's TTS and a third one's render. Gemini calls and video encoding are
+limited separately across the batch's jobs (agent.limits; the limits are
+scoped to the batch, so other batches and runs in the process keep theirs),
+and all jobs share one client and the response / TTS caches. The status of every job is kept in a
+JSON manifest, which also lets an interrupted batch be resumed: jobs already
+marked done in an existing manifest are skipped.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from agent.limits import NETWORK, RENDER, scoped_stage_limits
+from agent.workspace import PODCAST_DIR, atomic_write_bytes, validate_run_id
+
+logger = logging.getLogger(__name__)
+
+BATCHES_DIR = PODCAST_DIR / "batches"
+DEFAULT_NETWORK_CONCURRENCY = 16
+DEFAULT_RENDER_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)
+
+
+def load_jobs(path):
+    """Read batch jobs from a .jsonl / .json / .csv file"""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".csv":
+        rows = list(csv.DictReader(text.splitlines()))
+    elif path.suffix == ".json":
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [normalize_job(row) for row in rows]
+
+
+def normalize_job(job):
+    """Accept a topic string, a (topic, video_url) pair or a dict"""
+    if isinstance(job, str):
+        job = {"topic": job}
+    elif isinstance(job, (list, tuple)):
+        job = dict(zip(("topic", "video_url"), job))
+    if not job.get("topic"):
+        raise ValueError(f"Batch job without a topic: {job}")
+    return {key: job.get(key) or None for key in ("topic", "video_url", "output_path", "output_mode")}
+
+
+class BatchManifest:
+    """Per-job status file, rewritten atomically after every change"""
+
+    def __init__(self, path, batch_id, jobs):
+        self.path = Path(path)
+        self.batch_id = batch_id
+        self.entries = [
+            {"index": i, **job, "run_id": f"{batch_id}-{i:03d}", "status": "pending"}
+            for i, job in enumerate(jobs)
+        ]
+        self._adopt_previous()
+
+    def _adopt_previous(self):
+        # Resuming: keep finished jobs whose inputs are unchanged
+        if not self.path.exists():
+            return
+        previous = json.loads(self.path.read_text(encoding="utf-8"))
+        done = {
+            (entry["index"], entry["topic"], entry.get("video_url"), entry.get("output_mode")): entry
+            for entry in previous.get("jobs", []) if entry.get("status") == "done"
+        }
+        for i, entry in enumerate(self.entries):
+            finished = done.get((entry["index"], entry["topic"], entry.get("video_url"), entry.get("output_mode")))
+            if finished is not None:
+                self.entries[i] = finished
+
+    def update(self, index, **fields):
+        self.entries[index].update(fields)
+        self.save()
+
+    def save(self):
+        counts = {}
+        for entry in self.entries:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        manifest = {"batch_id": self.batch_id, "updated": time.time(), "counts": counts, "jobs": self.entries}
+        atomic_write_bytes(self.path, json.dumps(manifest, indent=2).encode("utf-8"))
+        return manifest
+
+
+def _job_summary(result):
+    metrics = result.get("metrics") or {}
+    return {
+        "podcast_filename": result.get("podcast_filename"),
+        "api_calls": metrics.get("api_calls"),
+        "total_tokens": (metrics.get("tokens") or {}).get("total"),
+        "audio_seconds": metrics.get("audio_seconds"),
+    }
+
+
+async def arun_batch(jobs, configurable=None, max_jobs=4, network_concurrency=DEFAULT_NETWORK_CONCURRENCY,
+                     render_concurrency=DEFAULT_RENDER_CONCURRENCY, manifest_path=None, batch_id=None):
+    """Run every job through the async graph and return the final manifest
+
+    `max_jobs` runs are in flight at once; `network_concurrency` and
+    `render_concurrency` cap Gemini calls and video encodes across all of them.
+    A failing job is recorded in the manifest without stopping the others.
+    """
+    from agent.graph import build_graph
+
+    jobs = [normalize_job(job) for job in jobs]
+    if batch_id is None and manifest_path and Path(manifest_path).exists():
+        # Resuming keeps the run ids (and so the workspaces) of the earlier attempt
+        batch_id = json.loads(Path(manifest_path).read_text(encoding="utf-8"))["batch_id"]
+    # The batch id prefixes every run id and names the manifest
+    batch_id = validate_run_id(batch_id or time.strftime("batch-%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6])
+    manifest = BatchManifest(manifest_path or BATCHES_DIR / f"{batch_id}.json", batch_id, jobs)
+    manifest.save()
+
+    graph = build_graph().compile()
+    semaphore = asyncio.Semaphore(max(1, max_jobs))
+
+    async def run_job(entry):
+        index = entry["index"]
+        async with semaphore:
+            started = time.time()
+            manifest.update(index, status="running", started=started, error=None)
+            logger.info(f"▶️ [{index + 1}/{len(jobs)}] {entry['topic']}")
+            inputs = {key: entry[key] for key in ("topic", "video_url", "output_path", "output_mode", "run_id") if entry.get(key)}
+            # Batch calls yield to interactive runs on shared rate limits unless overridden
+            config = {"configurable": {"priority": "batch", **(configurable or {}), "thread_id": entry["run_id"]}}
+            try:
+                result = await graph.ainvoke(inputs, config)
+            except Exception as e:
+                logger.error(f"❌ [{index + 1}/{len(jobs)}] {entry['topic']} failed: {e}")
+                manifest.update(index, status="failed", finished=time.time(), seconds=time.time() - started, error=f"{type(e).__name__}: {e}")
+                return
+            manifest.update(index, status="done", finished=time.time(), seconds=time.time() - started, **_job_summary(result))
+            logger.info(f"✅ [{index + 1}/{len(jobs)}] {entry['topic']} -> {result.get('podcast_filename')}")
+
+    pending = [entry for entry in manifest.entries if entry["status"] != "done"]
+    if len(pending) < len(jobs):
+        logger.info(f"⏭️ Skipping {len(jobs) - len(pending)} jobs already done in {manifest.path}")
+    # Tasks started here copy the context, so the limits hold for this batch's runs only
+    with scoped_stage_limits(**{NETWORK: network_concurrency, RENDER: render_concurrency}):
+        await asyncio.gather(*(run_job(entry) for entry in pending))
+
+    result = manifest.save()
+    logger.info(f"📋 Batch {batch_id}: {result['counts']} - manifest at {manifest.path}")
+    return result
+
+
+def run_batch(jobs, **kwargs):
+    """Blocking wrapper around arun_batch"""
+    return asyncio.run(arun_batch(jobs, **kwargs))
+
+
+def parse_config_overrides(pairs):
+    """Turn KEY=VALUE command line arguments into a configurable dict"""
+    configurable = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"--config expects KEY=VALUE, got {pair!r}")
+        configurable[key.strip()] = value.strip()
+    return configurable
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate podcasts for many topics in one process")
+    parser.add_argument("jobs", help="jobs file (.jsonl, .json or .csv)")
+    parser.add_argument("--jobs", dest="max_jobs", type=int, default=4, help="runs in flight at once")
+    parser.add_argument("--network-concurrency", type=int, default=DEFAULT_NETWORK_CONCURRENCY, help="max Gemini calls in flight across all runs")
+    parser.add_argument("--render-concurrency", type=int, default=DEFAULT_RENDER_CONCURRENCY, help="max video encodes at once")
+    parser.add_argument("--manifest", help="status manifest path (existing manifests are resumed)")
+    parser.add_argument("--batch-id", help="prefix for run ids (default: timestamp)")
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE", help="Configuration override applied to every run")
+    args = parser.parse_args(argv)
+    try:
+        configurable = parse_config_overrides(args.config)
+        if args.batch_id:
+            validate_run_id(args.batch_id)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    manifest = run_batch(
+        load_jobs(args.jobs),
+        configurable=configurable,
+        max_jobs=args.max_jobs,
+        network_concurrency=args.network_concurrency,
+        render_concurrency=args.render_concurrency,
+        manifest_path=args.manifest,
+        batch_id=args.batch_id,
+    )
+    if manifest["counts"].get("failed"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Multi-speaker TTS over chunks of the script instead of one call per line
+
+Consecutive dialogue lines are grouped into chunks of up to
+`tts_batch_max_chars` characters and each chunk is synthesized by a single
+multi-speaker call. The audio of every line is then recovered from its chunk so
+segment durations (and with them the speaker switches in the video) stay
+per line: each boundary is first estimated from the character counts of the
+lines still left in the chunk, then moved to the longest pause in the PCM near
+that estimate.
+"""
+import asyncio
+import logging
+
+from agent.metrics import record_cache
+from agent.pcm import frame_bytes, frame_levels, pcm_to_array, silent_runs
+from agent.tts_cache import get_tts_cache
+from agent.utils import agenerate_content, generate_content
+
+logger = logging.getLogger(__name__)
+
+MAX_SPEAKERS = 2          # the multi-speaker TTS config takes exactly two voices
+SILENCE_DB = -40.0        # blocks below this level count as a pause
+BLOCK_SECONDS = 0.02      # analysis block length
+MIN_WINDOW_SECONDS = 0.75 # search at least this far around an estimated boundary
+WINDOW_FRACTION = 0.5     # ... or this fraction of the shorter neighbouring line
+
+
+def batch_speakers(segments):
+    """Speakers in order of first appearance"""
+    return list(dict.fromkeys(segment['speaker'] for segment in segments))
+
+
+def can_batch(segments):
+    return 0 < len(batch_speakers(segments)) <= MAX_SPEAKERS
+
+
+def chunk_segments(segments, max_chars):
+    """Group consecutive segment indices into chunks of at most `max_chars` characters of dialogue"""
+    chunks, current, size = [], [], 0
+    for i, segment in enumerate(segments):
+        length = len(segment['speaker']) + len(segment['content']) + 3
+        if current and size + length > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += length
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _chunk_text(segments):
+    speakers = " and ".join(batch_speakers(segments))
+    lines = "\n".join(f"{segment['speaker']}: {segment['content']}" for segment in segments)
+    return f"TTS the following conversation between {speakers}:\n{lines}"
+
+
+def _chunk_request(segments, voices, configuration):
+    """Build the generate_content arguments for synthesizing a chunk of lines"""
+    from google.genai import types
+
+    speakers = batch_speakers(segments)
+    if len(speakers) == 1:
+        speech_config = types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voices[speakers[0]])
+            )
+        )
+    else:
+        speech_config = types.SpeechConfig(
+            multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                speaker_voice_configs=[
+                    types.SpeakerVoiceConfig(
+                        speaker=speaker,
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voices[speaker])
+                        ),
+                    )
+                    for speaker in speakers
+                ]
+            )
+        )
+    return dict(
+        model=configuration.tts_model,
+        contents=_chunk_text(segments),
+        config=types.GenerateContentConfig(response_modalities=["AUDIO"], speech_config=speech_config),
+    )
+
+
+def _chunk_cache_key(cache, segments, voices, configuration):
+    speakers = batch_speakers(segments)
+    voice_names = ",".join(f"{speaker}={voices[speaker]}" for speaker in speakers)
+    return cache.make_key(configuration.tts_model, voice_names, "*", _chunk_text(segments), configuration.tts_rate)
+
+
+def find_line_starts(pcm, weights, configuration):
+    """Sample-frame offsets at which each of the consecutive lines (weighted by length) starts"""
+    import numpy as np
+
+    samples = pcm_to_array(pcm, configuration)
+    hop = max(1, int(configuration.tts_rate * BLOCK_SECONDS))
+    levels = frame_levels(samples, hop)
+    starts, ends = silent_runs(levels, SILENCE_DB)
+    centres = (starts + ends) / 2.0
+    lengths = (ends - starts).astype(np.float64)
+    min_window = MIN_WINDOW_SECONDS / BLOCK_SECONDS
+
+    offsets = [0]
+    previous = 0.0
+    for k in range(1, len(weights)):
+        # Spread the audio left over in proportion to the lines left, so an early
+        # misestimate does not carry over to the following boundaries
+        remaining = float(sum(weights[k - 1:]))
+        guess = previous + (len(levels) - previous) * weights[k - 1] / remaining
+        window = max(min_window, WINDOW_FRACTION * min(weights[k - 1], weights[k]) / remaining * (len(levels) - previous))
+        distance = np.abs(centres - guess)
+        candidates = (centres > previous) & (distance <= window)
+        if candidates.any():
+            # Prefer long pauses, then ones close to the estimate
+            score = np.where(candidates, lengths * (1.0 - 0.5 * distance / window), -np.inf)
+            boundary = float(centres[int(np.argmax(score))])
+        else:
+            boundary = max(guess, previous + 1)
+        previous = boundary
+        offsets.append(min(int(boundary * hop), len(samples)))
+    return offsets
+
+
+def split_chunk_pcm(pcm, segments, configuration):
+    """Cut a chunk's PCM into one piece per segment"""
+    if len(segments) == 1:
+        return [bytes(pcm)]
+    size = frame_bytes(configuration)
+    offsets = find_line_starts(pcm, [max(1, len(segment['content'])) for segment in segments], configuration)
+    bounds = [offset * size for offset in offsets] + [len(pcm) - len(pcm) % size]
+    logger.debug(f"Split {len(segments)} lines at frames {offsets[1:]}")
+    return [bytes(pcm[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+
+def synthesize_chunk(segments, voices, configuration):
+    """Synthesize consecutive segments in one call and return each segment's PCM"""
+    cache = get_tts_cache(configuration)
+    pcm = None
+    if cache is not None:
+        cache_key = _chunk_cache_key(cache, segments, voices, configuration)
+        pcm = cache.get(cache_key)
+        record_cache("tts", pcm is not None)
+    if pcm is None:
+        response = generate_content(**_chunk_request(segments, voices, configuration), configuration=configuration)
+        pcm = response.candidates[0].content.parts[0].inline_data.data
+        if cache is not None:
+            cache.put(cache_key, pcm)
+    return split_chunk_pcm(pcm, segments, configuration)
+
+
+async def asynthesize_chunk(segments, voices, configuration):
+    """Async variant of synthesize_chunk"""
+    cache = get_tts_cache(configuration)
+    pcm = None
+    if cache is not None:
+        cache_key = _chunk_cache_key(cache, segments, voices, configuration)
+        pcm = await asyncio.to_thread(cache.get, cache_key)
+        record_cache("tts", pcm is not None)
+    if pcm is None:
+        response = await agenerate_content(**_chunk_request(segments, voices, configuration), configuration=configuration)
+        pcm = response.candidates[0].content.parts[0].inline_data.data
+        if cache is not None:
+            await asyncio.to_thread(cache.put, cache_key, pcm)
+    return await asyncio.to_thread(split_chunk_pcm, pcm, segments, configuration)
@@ -0,0 +1,161 @@
+"""Durable checkpoints so a failed run resumes where it stopped
+
+    python -m agent.checkpoint run "Overview on the current state of AGI" --video-url https://youtu.be/...
+    python -m agent.checkpoint resume <thread_id>
+    python -m agent.checkpoint status <thread_id>
+    python -m agent.checkpoint list
+
+Runs started here are compiled with a SQLite-backed LangGraph checkpointer
+(podcast/checkpoints.sqlite by default), so the state after every completed
+node survives a crash. The thread id doubles as the run id, so a resumed run
+works in the same workspace: its script, analysis.json and images are still
+there, and segment audio comes back from the TTS cache. Resuming re-runs only
+the node that failed (and nodes after it); a node whose parallel sibling failed
+is not repeated either.
+
+The LangGraph server entry point (agent.graph:create_graph) is unchanged; the
+server brings its own checkpointer.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from agent.batch import parse_config_overrides
+from agent.workspace import PODCAST_DIR, validate_run_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = PODCAST_DIR / "checkpoints.sqlite"
+
+
+@asynccontextmanager
+async def resumable_graph(checkpoint_path=None):
+    """Yield the async research graph compiled with a SQLite checkpointer"""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    from agent.graph import build_graph
+
+    path = Path(checkpoint_path or DEFAULT_CHECKPOINT_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(str(path)) as checkpointer:
+        yield build_graph().compile(checkpointer=checkpointer)
+
+
+def _thread_config(thread_id, configurable=None):
+    return {"configurable": {**(configurable or {}), "thread_id": thread_id}}
+
+
+async def arun_resumable(inputs, thread_id=None, configurable=None, checkpoint_path=None):
+    """Run the graph with checkpointing; resume a failure later with aresume(thread_id)"""
+    thread_id = validate_run_id(thread_id or inputs.get("run_id") or uuid.uuid4().hex)
+    logger.info(f"🧵 Thread {thread_id} (resume with: python -m agent.checkpoint resume {thread_id})")
+    async with resumable_graph(checkpoint_path) as graph:
+        return await graph.ainvoke(inputs, _thread_config(thread_id, configurable))
+
+
+async def aresume(thread_id, configurable=None, checkpoint_path=None):
+    """Continue a checkpointed run from its last completed node
+
+    Configuration is not stored in the checkpoint, so pass the same
+    `configurable` overrides as the original run. Returns the final state.
+    """
+    async with resumable_graph(checkpoint_path) as graph:
+        config = _thread_config(thread_id, configurable)
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for thread {thread_id}")
+        if not snapshot.next:
+            logger.info(f"✅ Thread {thread_id} already completed")
+            return snapshot.values
+        logger.info(f"⏯️ Resuming thread {thread_id} at {', '.join(snapshot.next)}")
+        await graph.ainvoke(None, config)
+        return (await graph.aget_state(config)).values
+
+
+async def astatus(thread_id, checkpoint_path=None):
+    """Summarize where a checkpointed run stands"""
+    async with resumable_graph(checkpoint_path) as graph:
+        snapshot = await graph.aget_state(_thread_config(thread_id))
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for thread {thread_id}")
+        return {
+            "thread_id": thread_id,
+            "completed": not snapshot.next,
+            "next": list(snapshot.next),
+            "errors": {task.name: str(task.error) for task in snapshot.tasks if task.error},
+            "topic": snapshot.values.get("topic"),
+            "podcast_filename": snapshot.values.get("podcast_filename"),
+            "updated": snapshot.created_at,
+        }
+
+
+async def alist_threads(checkpoint_path=None):
+    """Thread ids in the checkpoint database, most recently updated first"""
+    async with resumable_graph(checkpoint_path) as graph:
+        threads = {}
+        async for checkpoint in graph.checkpointer.alist(None):
+            threads.setdefault(checkpoint.config["configurable"]["thread_id"], checkpoint.checkpoint["ts"])
+        return sorted(threads, key=threads.get, reverse=True)
+
+
+def run_resumable(inputs, **kwargs):
+    """Blocking wrapper around arun_resumable"""
+    return asyncio.run(arun_resumable(inputs, **kwargs))
+
+
+def resume(thread_id, **kwargs):
+    """Blocking wrapper around aresume"""
+    return asyncio.run(aresume(thread_id, **kwargs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the research graph with durable checkpoints, or resume a failed run")
+    parser.add_argument("--db", help=f"checkpoint database (default: {DEFAULT_CHECKPOINT_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="start a checkpointed run")
+    run_parser.add_argument("topic")
+    run_parser.add_argument("--video-url")
+    run_parser.add_argument("--output-mode", choices=("video", "audio", "script"), help="what the run produces (default: video)")
+    run_parser.add_argument("--thread-id", help="thread / run id (default: random)")
+    resume_parser = commands.add_parser("resume", help="resume a run from its last completed node")
+    resume_parser.add_argument("thread_id")
+    for command_parser in (run_parser, resume_parser):
+        command_parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE", help="Configuration override")
+    status_parser = commands.add_parser("status", help="show where a run stands")
+    status_parser.add_argument("thread_id")
+    commands.add_parser("list", help="list checkpointed threads")
+    args = parser.parse_args(argv)
+    try:
+        configurable = parse_config_overrides(getattr(args, "config", []))
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        if args.command == "run":
+            inputs = {"topic": args.topic, **({"video_url": args.video_url} if args.video_url else {})}
+            if args.output_mode:
+                inputs["output_mode"] = args.output_mode
+            result = run_resumable(inputs, thread_id=args.thread_id, configurable=configurable, checkpoint_path=args.db)
+            sys.stdout.write(f"{result.get('podcast_filename')}\n")
+        elif args.command == "resume":
+            result = resume(args.thread_id, configurable=configurable, checkpoint_path=args.db)
+            sys.stdout.write(f"{result.get('podcast_filename')}\n")
+        elif args.command == "status":
+            sys.stdout.write(json.dumps(asyncio.run(astatus(args.thread_id, checkpoint_path=args.db)), indent=2) + "\n")
+        else:
+            for thread_id in asyncio.run(alist_threads(checkpoint_path=args.db)):
+                sys.stdout.write(f"{thread_id}\n")
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Incremental video renderer: one cached H.264 chunk per segment
+
+Each segment is encoded on its own as a still-frame chunk whose key covers
+everything that determines its pixels: the contents of its background and
+speaker images, the canvas size, its length in frames and the encoder settings
+of the render profile.
+Chunks live in a content-addressed cache, so after an edit to the script only
+the segments whose picture or length changed are encoded again. The final MP4
+is assembled by stream-copying the chunks in order, and the full audio track is
+encoded and muxed once in that same pass. Missing chunks are composited and
+encoded in parallel by a pool of worker processes (`render_workers`).
+
+Segment lengths are rounded to whole frames along the timeline (cumulatively),
+so the picture never drifts from the audio by more than half a frame. The audio
+post-processing stage lays turns out on the frame grid when this renderer is
+selected, which keeps every unchanged segment's frame count stable.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from agent.image_cache import image_cache_settings
+from agent.metrics import record_cache, record_frames
+from agent.progress import Progress
+from agent.render import (
+    compose_and_encode_chunk,
+    fit_height,
+    get_canvas_size,
+    get_ffmpeg_exe,
+    get_render_profile,
+    profile_fps,
+)
+from agent.tts_cache import TTSCache
+from agent.workspace import PODCAST_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_CACHE_DIR = PODCAST_DIR / "cache" / "video_chunks"
+# Bump when the chunk encoding changes so stale chunks are not concatenated
+CHUNK_FORMAT = "h264-stillimage-yuv420p-v2"
+
+
+class VideoChunkCache(TTSCache):
+    """Encoded segment chunks, stored and evicted like the TTS cache"""
+
+    suffix = ".mp4"
+
+    def lookup(self, key):
+        """Return the path of the cached chunk for `key`, or None on a miss"""
+        path = self._path(key)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put_file(self, key, source):
+        """Move an encoded chunk into the cache and return its cached path"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp_path)
+            size = os.path.getsize(tmp_path) - self._size_of(path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._written(size)
+        return path
+
+
+_chunk_caches = {}
+_chunk_caches_lock = threading.Lock()
+
+
+def get_chunk_cache(configuration):
+    """Return the shared VideoChunkCache for this configuration"""
+    cache_dir = configuration.video_chunk_cache_dir or DEFAULT_CHUNK_CACHE_DIR
+    max_bytes = configuration.video_chunk_cache_max_mb * 1024 * 1024
+    with _chunk_caches_lock:
+        cache = _chunk_caches.get((str(cache_dir), max_bytes))
+        if cache is None:
+            cache = _chunk_caches[(str(cache_dir), max_bytes)] = VideoChunkCache(cache_dir, max_bytes)
+        return cache
+
+
+def segment_frame_counts(segments, fps):
+    """Frames per segment, rounding each boundary on the cumulative timeline"""
+    counts = []
+    position = 0.0
+    for segment in segments:
+        start = round(position * fps)
+        position += segment['duration']
+        counts.append(round(position * fps) - start)
+    return counts
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def render_workers(configuration):
+    """Worker processes for chunk encoding (`render_workers`, 0 = one per CPU core)"""
+    return configuration.render_workers if configuration.render_workers > 0 else (os.cpu_count() or 1)
+
+
+def get_render_pool(workers):
+    """Return the process pool for chunk encoding, kept alive across renders and runs
+
+    Workers are spawned rather than forked, since the parent runs threads and an
+    event loop, and only import the light agent.render module.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _file_digest(path, digests):
+    if not path:
+        return None
+    if path not in digests:
+        digests[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    return digests[path]
+
+
+def chunk_key(background_digest, speaker_digest, canvas_size, frames, fps, profile):
+    """Hash the inputs that determine a chunk's encoded bytes"""
+    payload = json.dumps([
+        CHUNK_FORMAT, background_digest, speaker_digest, list(canvas_size), frames, fps,
+        profile.height, profile.preset, profile.crf,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _link_or_copy(source, dest):
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copyfile(source, dest)
+    return dest
+
+
+def concat_chunks(chunk_paths, output_path, audio_file=None, audio_bitrate="192k"):
+    """Stream-copy the chunks into one MP4, encoding and muxing the audio track once"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        list_file = os.path.join(work_dir, "chunks.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            f.write("".join(f"file '{path}'\n" for path in chunk_paths))
+        command = [get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file]
+        if audio_file:
+            command += ["-i", audio_file, "-map", "0:v", "-map", "1:a", "-c:v", "copy", "-c:a", "aac", "-b:a", audio_bitrate, "-shortest"]
+        else:
+            command += ["-c", "copy"]
+        command += ["-movflags", "+faststart", str(output_path)]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed concatenating chunks ({result.returncode}): {result.stderr.strip()}")
+    return output_path
+
+
+def _encode_missing(missing, cache, configuration, profile):
+    """Encode {key: job} chunks, in worker processes when there are several, and add them to the cache
+
+    Returns {key: encoded path}: the render keeps using its own copy, since a
+    later put (here or in another process) may evict the cached one.
+    """
+    if not missing:
+        return {}
+    progress = Progress("encode", sum(job[3] for job in missing.values()), "frames", renderer="chunked", chunks=0, chunks_total=len(missing))
+    workers = min(render_workers(configuration), len(missing))
+    settings = image_cache_settings(configuration)
+    encoded_paths = {}
+    if workers <= 1:
+        for key, job in missing.items():
+            encoded_paths[key] = compose_and_encode_chunk(*job, image_cache_settings=settings, profile=profile)
+            cache.put_file(key, encoded_paths[key])
+            record_frames(job[3])
+            progress.advance(job[3], chunks=len(encoded_paths))
+        return encoded_paths
+
+    # Split the cores between the concurrent x264 encoders
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"Encoding {len(missing)} chunks in {workers} worker processes ({threads} threads each)...")
+    pool = get_render_pool(render_workers(configuration))
+    futures = {pool.submit(compose_and_encode_chunk, *job, threads, settings, profile): key for key, job in missing.items()}
+    try:
+        for future in as_completed(futures):
+            key = futures[future]
+            encoded_paths[key] = future.result()
+            cache.put_file(key, encoded_paths[key])
+            record_frames(missing[key][3])
+            progress.advance(missing[key][3], chunks=len(encoded_paths))
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return encoded_paths
+
+
+def render_chunked_video(segments, speaker_images, output_path, audio_file, configuration):
+    """Render the podcast video from per-segment chunks, encoding only chunks not in the cache"""
+    if not segments:
+        raise ValueError("❌ No segments provided - cannot generate video")
+
+    profile = get_render_profile(configuration)
+    fps = profile_fps(profile, configuration.static_frame_fps)
+    cache = get_chunk_cache(configuration)
+    canvas_size = fit_height(get_canvas_size(segments), profile.height)
+    has_audio = bool(audio_file and os.path.exists(audio_file))
+    if not has_audio:
+        logger.warning("⚠️ No audio file provided or file doesn't exist - generating silent video")
+
+    digests = {}
+    # Work next to the cache so cache hits can be hard linked instead of copied.
+    # Each hit is linked as soon as it is found: the link keeps the chunk readable
+    # even if it is evicted by this render's own puts or by another process.
+    with tempfile.TemporaryDirectory(dir=cache.cache_dir, prefix=".render-") as work_dir:
+        timeline = []  # (segment index, chunk key) in playback order
+        chunk_files = {}
+        missing = {}
+        for i, (segment, frames) in enumerate(zip(segments, segment_frame_counts(segments, fps))):
+            if frames <= 0:
+                continue  # shorter than half a frame; its time is covered by its neighbours
+            background_path = segment.get('background')
+            speaker_path = speaker_images.get(segment['speaker'])
+            key = chunk_key(_file_digest(background_path, digests), _file_digest(speaker_path, digests), canvas_size, frames, fps, profile)
+            timeline.append((i, key))
+            if key in chunk_files or key in missing:
+                continue
+            cached = cache.lookup(key)
+            if cached is not None:
+                try:
+                    chunk_files[key] = _link_or_copy(cached, os.path.join(work_dir, f"cached_{i:04d}.chunk"))
+                except FileNotFoundError:
+                    cached = None  # evicted by another process since the lookup
+            record_cache("video_chunks", cached is not None)
+            if cached is None:
+                missing[key] = (
+                    background_path, speaker_path, canvas_size, frames, fps,
+                    os.path.join(work_dir, f"frame_{i:04d}.png"), os.path.join(work_dir, f"encoded_{i:04d}.chunk"),
+                )
+
+        chunk_files.update(_encode_missing(missing, cache, configuration, profile))
+        chunk_paths = [chunk_files[key] for _, key in timeline]
+
+        logger.info(f"Encoded {len(missing)}/{len(chunk_paths)} segment chunks, reusing the rest; concatenating into {output_path}...")
+        concat_chunks(chunk_paths, output_path, audio_file if has_audio else None, profile.audio_bitrate)
+
+    logger.info("Video generation completed!")
+    return output_path
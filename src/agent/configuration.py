@@ -1,10 +1,11 @@
 """Configuration settings for the research and podcast generation app"""
 import os
 from dataclasses import dataclass, fields
-from typing import Optional, Any
-from typing_extensions import TypedDict
+from typing import Any, Optional
+
 from langchain_core.runnables import RunnableConfig
 
+
 @dataclass(kw_only=True)
 class Configuration:
     """LangGraph configuration for the deep research agent."""
@@ -20,12 +21,74 @@ class Configuration:
     synthesis_temperature: float=0.3 # balanced synthesis
     podcast_temperature: float=0.4 # creative dialogue
 
+    # structured output
+    segmentation_repair_attempts: int=2 # re-ask for invalid segmentation JSON before failing the run
+
+    # request scheduling (all Gemini calls)
+    rate_limits: str="" # requests per minute per model, "model=RPM[:burst],...", "*" for any other model
+    priority: str="interactive" # "interactive" calls go ahead of "batch" calls waiting on a rate limit
+    max_retries: int=5 # retries for 429 / 5xx / timeouts / connection errors
+    retry_base_delay: float=1.0 # seconds; backoff doubles per attempt (full jitter), Retry-After is honoured
+    retry_max_delay: float=60.0
+    request_timeout: float=300.0 # seconds per call (0 = SDK default)
+
+    # response cache for text calls
+    response_cache_nodes: str="" # comma-separated node names to cache (e.g. "search_research,segment_transcript") or "all"
+    response_cache_path: str="" # defaults to podcast/cache/responses.sqlite
+    response_cache_ttl_hours: float=168.0
+    response_cache_max_mb: int=256
+
+    # run workspace
+    workspace_dir: str="" # per-run artifacts go to <workspace_dir>/<run_id>, defaults to podcast/runs
+    share_speaker_images: bool=True # reuse/promote speaker portraits via podcast/shared
+    share_backgrounds: bool=False # promote generated backgrounds into podcast/shared
+    keep_segment_audio: bool=True # with the TTS cache off, keep segment PCM in <run>/audio so a resumed run reuses it
+
+    # image generation
+    image_max_concurrency: int=4 # max speakers/sections generated at once
+    background_library_enabled: bool=False # reuse a filed background when a section is similar enough
+    background_library_dir: str="" # defaults to podcast/shared/background_library
+    background_similarity_threshold: float=0.6 # TF-IDF cosine similarity of theme/mood/key concepts
+    background_library_max_entries: int=500 # least used backgrounds are evicted beyond this
+
+    # video rendering
+    video_renderer: str="static" # "static" (one still frame per segment), "chunked" (cached per-segment chunks) or "moviepy"
+    render_profile: str="final" # "draft", "preview" or "final": resolution, frame rate, x264 preset/CRF and audio bitrate
+    static_frame_fps: int=4 # output frame rate for the static-frame and chunked renderers, unless the render profile sets one
+    video_chunk_cache_dir: str="" # defaults to podcast/cache/video_chunks
+    video_chunk_cache_max_mb: int=2048 # LRU eviction once the chunk cache exceeds this size
+    render_workers: int=0 # processes encoding chunks in parallel for the chunked renderer (0 = one per CPU core)
+    image_cache_max_mb: int=256 # decoded, pre-resized images kept in memory by each rendering process
+    image_thumbnail_cache: bool=False # also store pre-resized images on disk so other processes skip decoding
+    image_thumbnail_dir: str="" # defaults to podcast/cache/thumbnails
+
+    # metrics
+    metrics_prometheus_path: str="" # rewrite process metrics in Prometheus text format here after each run
+
     # TTS configuration
     mike_voice: str= "Puck"
     lisa_voice: str= "Kore"
     tts_channel: int=1 # 0 for mono, 1 for stereo
     tts_rate: int =24000 # sample rate in Hz
     tts_sample_width: int =2 # sample width in bytes
+    tts_max_concurrency: int=4 # max TTS requests in flight at once (1 = sequential)
+    tts_mode: str="per_segment" # "per_segment" (one call per line) or "batched" (multi-speaker calls over chunks of lines)
+    tts_batch_max_chars: int=3000 # max dialogue characters per batched TTS call
+    stream_tts: bool=False # stream the script and start TTS for each line as it arrives
+    tts_cache_enabled: bool=True # reuse PCM for unchanged (model, voice, speaker, content, rate)
+    tts_cache_dir: str="" # defaults to podcast/cache/tts
+    tts_cache_max_mb: int=512 # LRU eviction once the cache exceeds this size
+
+    # audio post-processing (segment PCM, before concatenation)
+    audio_postprocess: bool=False # trim, normalize and re-space segments; durations are updated to match
+    audio_target_dbfs: float=-20.0 # per-segment RMS loudness target
+    audio_trim_dbfs: float=-45.0 # leading/trailing audio quieter than this is trimmed
+    audio_pause_seconds: float=0.25 # silence between turns
+    audio_crossfade_ms: float=0.0 # fade in/out per segment; with no pause, turns overlap by this much
+
+    # audio-only output (output_mode="audio")
+    audio_format: str="mp3" # "mp3" or "opus"
+    audio_bitrate: str="96k" # encoder bitrate of the audio file
 
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig]) -> "Configuration":
@@ -35,4 +98,16 @@ class Configuration:
             f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
             for f in fields(cls) if f.init
         }
-        return cls(**{k: v for k,v in values.items() if v})
\ No newline at end of file
+        types_by_name = {f.name: f.type for f in fields(cls) if f.init}
+        return cls(**{k: _coerce(v, types_by_name[k]) for k,v in values.items() if v is not None and v != ""})
+
+
+def _coerce(value: Any, field_type: Any) -> Any:
+    """Convert string values (e.g. from environment variables) to the field's type."""
+    if not isinstance(value, str) or field_type is str:
+        return value
+    if field_type is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if field_type in (int, float):
+        return field_type(value)
+    return value
@@ -1,56 +1,123 @@
 """LangGraph implementation of the research and podcast generation workflow
 Install dependencies and start the LangGraph server:
-uvx --refresh --from "langgraph-cli[inmem]" --with-editable . --python 3.11 langgraph dev --allow-blocking
+uvx --refresh --from "langgraph-cli[inmem]" --with-editable . --python 3.11 langgraph dev
 Example run: 
 Topic: Overview on the current state of AGI
 Video url: https://www.youtube.com/watch?v=4__gg83s_Do 
 """
 
 
-import os, json, re
-from langgraph.graph import StateGraph, START, END
-from langchain_core.runnables import RunnableConfig
-from google.genai import types
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 
-from agent.state import ResearchState, ResearchStateInput, ResearchStateOutput
-from agent.utils import display_gemini_response, create_podcast_discussion, create_research_report, client, parse_transcript_with_sections, generate_image_with_prompt, config
-from agent.audios import generate_audio_and_update_segments, assign_images_to_segments, create_video
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
+from langsmith import traceable
+
+from agent.audios import (
+    agenerate_audio_and_update_segments,
+    assign_images_to_segments,
+    audio_suffix,
+    create_video,
+    encode_audio,
+    generate_audio_and_update_segments,
+    prefetch_segment_audio,
+    release_prefetched,
+)
+from agent.background_library import get_background_library
 from agent.configuration import Configuration
+from agent.limits import RENDER, astage_slot, stage_slot
+from agent.metrics import bind_context, instrument_node, record_cache
+from agent.progress import Progress
+from agent.render import downscale_image, get_render_profile, speaker_size
+from agent.schemas import TranscriptAnalysis
+from agent.state import ResearchState, ResearchStateInput, ResearchStateOutput
+from agent.utils import (
+    agenerate_content,
+    agenerate_content_stream,
+    agenerate_image_with_prompt,
+    cache_response,
+    collect_cache_stats,
+    display_gemini_response,
+    generate_content,
+    generate_content_stream,
+    generate_image_with_prompt,
+    parse_dialogue_line,
+    parse_transcript_with_sections,
+)
+from agent.workspace import (
+    PODCAST_DIR,
+    atomic_move,
+    atomic_write_bytes,
+    get_workspace,
+    resolve_run_id,
+    safe_filename,
+)
 
-from langsmith import traceable
+logger = logging.getLogger(__name__)
 
-@traceable(run_type="llm", name="Web Search")
-def search_research_node(state: ResearchState, config: RunnableConfig)-> dict:
-    """Node that performs web search research on a topic"""
-    configuration=Configuration.from_runnable_config(config) # does this allow config to be adjustable on langsmith?
-    topic=state["topic"]
+OUTPUT_MODES = ("video", "audio", "script")
+
+def output_mode(state: ResearchState) -> str:
+    """The run's `output_mode` input: "video" (default), "audio" or "script" """
+    mode = state.get("output_mode") or "video"
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output_mode {mode!r} - use one of {', '.join(OUTPUT_MODES)}")
+    return mode
+
+# Each node builds its Gemini request in a helper shared by the sync and async
+# variants, so the two graphs only differ in how the request is awaited.
 
-    search_response=client.models.generate_content(
+def _search_request(state: ResearchState, configuration: Configuration) -> dict:
+    topic=state["topic"]
+    return dict(
         model=configuration.search_model,
         contents=f"Research this topic and give me an overview: {topic}",
         config={"tools": [{"google_search":{}}],
                 "temperature": configuration.search_temperature
         },
     )
-    search_text, search_sources_text=display_gemini_response(search_response)
 
+def _search_result(search_response, run_id: str) -> dict:
+    search_text, search_sources_text=display_gemini_response(search_response)
     return {
+        "run_id": run_id, # first node: fixes the run id every later node uses for its workspace
         "search_text": search_text,
         "search_sources_text": search_sources_text
     }
 
-@traceable(run_type="llm", name="Youtube Video Analysis")
-def analyze_video_node(state: ResearchState, config: RunnableConfig) -> dict:
-    """Node that analyzes video content if URL is provided"""
+@traceable(run_type="llm", name="Web Search")
+def search_research_node(state: ResearchState, config: RunnableConfig)-> dict:
+    """Node that performs web search research on a topic"""
+    configuration=Configuration.from_runnable_config(config) # does this allow config to be adjustable on langsmith?
+    output_mode(state) # reject an unknown mode before any API call
+    search_response=generate_content(**_search_request(state, configuration), cache_node="search_research", configuration=configuration)
+    return _search_result(search_response, resolve_run_id(state, config))
+
+@traceable(run_type="llm", name="Web Search")
+async def asearch_research_node(state: ResearchState, config: RunnableConfig)-> dict:
+    """Async variant of search_research_node"""
     configuration=Configuration.from_runnable_config(config)
+    output_mode(state)
+    search_response=await agenerate_content(**_search_request(state, configuration), cache_node="search_research", configuration=configuration)
+    return _search_result(search_response, resolve_run_id(state, config))
+
+NO_VIDEO_TEXT = "No video provided for analysis."
+
+def _video_request(state: ResearchState, configuration: Configuration) -> dict:
+    from google.genai import types
+
     video_url=state.get("video_url")
     topic=state["topic"]
-
-    if not video_url:
-        return {"video_text": "No video provided for analysis."}
-    
-    video_response=client.models.generate_content(
+    return dict(
         model=configuration.video_model,
         contents=types.Content(
             parts=[
@@ -59,14 +126,30 @@ def analyze_video_node(state: ResearchState, config: RunnableConfig) -> dict:
             ]
         )
     )
+
+@traceable(run_type="llm", name="Youtube Video Analysis")
+def analyze_video_node(state: ResearchState, config: RunnableConfig) -> dict:
+    """Node that analyzes video content if URL is provided"""
+    configuration=Configuration.from_runnable_config(config)
+    if not state.get("video_url"):
+        return {"video_text": NO_VIDEO_TEXT}
+    
+    video_response=generate_content(**_video_request(state, configuration), cache_node="analyze_video", configuration=configuration)
     video_text, _= display_gemini_response(video_response) # _ = citations
     return {"video_text": video_text}
 
-@traceable(run_type="llm", name="Create Podcast Script")
-def create_podcast_transcript(state: ResearchState, config: RunnableConfig) -> str:
-    """Create a 2-speaker podcast discussion explaining the research topic"""
-    configuration = Configuration.from_runnable_config(config)
+@traceable(run_type="llm", name="Youtube Video Analysis")
+async def aanalyze_video_node(state: ResearchState, config: RunnableConfig) -> dict:
+    """Async variant of analyze_video_node"""
+    configuration=Configuration.from_runnable_config(config)
+    if not state.get("video_url"):
+        return {"video_text": NO_VIDEO_TEXT}
+
+    video_response=await agenerate_content(**_video_request(state, configuration), cache_node="analyze_video", configuration=configuration)
+    video_text, _= display_gemini_response(video_response) # _ = citations
+    return {"video_text": video_text}
 
+def _script_request(state: ResearchState, configuration: Configuration) -> dict:
     search_text= state.get("search_text", "")
     video_text= state.get("video_text", "")
     topic= state.get("topic", "")
@@ -99,30 +182,84 @@ def create_podcast_transcript(state: ResearchState, config: RunnableConfig) -> s
     [continue...]
     """
     
-    script_response = client.models.generate_content(
+    return dict(
         model=configuration.synthesis_model,
         contents=script_prompt,
         config={"temperature": configuration.podcast_temperature}
     )
-    
-    podcast_script = script_response.candidates[0].content.parts[0].text
-    # save the script to a file
-    podcast_dir = os.path.join(os.path.dirname(__file__), "..", "..", "podcast")
-    os.makedirs(podcast_dir, exist_ok=True)
-    script_path = os.path.join(podcast_dir, "script.txt")
-    with open(script_path, "w", encoding="utf-8") as f:
-        f.write(podcast_script)
 
-    return {"podcast_script": podcast_script}
+def _save_script(workspace, podcast_script: str) -> None:
+    # save the script to the run's workspace
+    workspace.write_text(workspace.script_path, podcast_script)
 
-    
+class _ScriptLineQueue:
+    """Collect streamed script text and queue TTS for each completed dialogue line"""
 
+    def __init__(self, configuration: Configuration):
+        self.configuration = configuration
+        self.chunks = []
+        self.pending = ""
+        self.queued = 0
 
+    def feed(self, text: str) -> None:
+        self.chunks.append(text)
+        *lines, self.pending = (self.pending + text).split("\n")
+        for line in lines:
+            self._queue(line)
 
-@traceable(run_type="llm", name="Segment Transcript")
-def segment_transcript(state: ResearchState, config: RunnableConfig) -> dict:
-    """Use LLM to intelligently analyze and segment the transcript"""
+    def finish(self) -> str:
+        self._queue(self.pending)
+        self.pending = ""
+        logger.info(f"Queued TTS for {self.queued} lines while the script was streaming")
+        return "".join(self.chunks)
+
+    def _queue(self, line: str) -> None:
+        # Same line rules as parse_transcript_with_sections, so the queued audio
+        # matches the segments create_video asks for later
+        parsed = parse_dialogue_line(line)
+        if parsed:
+            speaker_name, content = parsed
+            prefetch_segment_audio({"speaker": speaker_name, "content": content}, self.configuration)
+            self.queued += 1
+
+@traceable(run_type="llm", name="Create Podcast Script")
+def create_podcast_transcript(state: ResearchState, config: RunnableConfig) -> str:
+    """Create a 2-speaker podcast discussion explaining the research topic
+
+    With `stream_tts` enabled the script is streamed and TTS for each dialogue
+    line starts as soon as the line is complete (unless only the script is wanted).
+    """
     configuration = Configuration.from_runnable_config(config)
+    if configuration.stream_tts and output_mode(state) != "script":
+        # Prefetch into the same cache the audio node reads, so a resumed run finds the lines
+        line_queue = _ScriptLineQueue(_audio_configuration(configuration, get_workspace(state, configuration)))
+        for chunk in generate_content_stream(**_script_request(state, configuration), configuration=configuration):
+            line_queue.feed(chunk.text or "")
+        podcast_script = line_queue.finish()
+    else:
+        script_response = generate_content(**_script_request(state, configuration), cache_node="create_podcast_transcript", configuration=configuration)
+        podcast_script = script_response.candidates[0].content.parts[0].text
+    _save_script(get_workspace(state, configuration), podcast_script)
+    return {"podcast_script": podcast_script}
+
+@traceable(run_type="llm", name="Create Podcast Script")
+async def acreate_podcast_transcript(state: ResearchState, config: RunnableConfig) -> str:
+    """Async variant of create_podcast_transcript"""
+    configuration = Configuration.from_runnable_config(config)
+    if configuration.stream_tts and output_mode(state) != "script":
+        line_queue = _ScriptLineQueue(_audio_configuration(configuration, get_workspace(state, configuration)))
+        async for chunk in agenerate_content_stream(**_script_request(state, configuration), configuration=configuration):
+            line_queue.feed(chunk.text or "")
+        podcast_script = line_queue.finish()
+    else:
+        script_response = await agenerate_content(**_script_request(state, configuration), cache_node="create_podcast_transcript", configuration=configuration)
+        podcast_script = script_response.candidates[0].content.parts[0].text
+    await asyncio.to_thread(_save_script, get_workspace(state, configuration), podcast_script)
+    return {"podcast_script": podcast_script}
+
+
+
+def _segment_request(state: ResearchState, configuration: Configuration) -> dict:
     transcript_text=state.get("podcast_script", "")
 
     analysis_prompt = f"""
@@ -134,62 +271,349 @@ def segment_transcript(state: ResearchState, config: RunnableConfig) -> dict:
     Transcript:
     {transcript_text}
     
-    Please return a JSON response with this structure:
-    {{
-        "speakers": {{
-            "speaker_name": {{
-                "role": "description of their role/expertise",
-                "characteristics": "physical and personality traits for image generation"
-            }}
-        }},
-        "sections": [
-            {{
-                "title": "section title",
-                "start_text": "first few words to identify start",
-                "end_text": "last few words to identify end", 
-                "theme": "main theme/topic",
-                "mood": "visual mood/atmosphere",
-                "key_concepts": ["concept1", "concept2"],
-                "duration_estimate": estimated_seconds
-            }}
-        ]
-    }}
+    Return JSON with every speaker (name, role/expertise, physical and personality
+    traits for image generation) and every section (title, first and last few
+    words, theme, visual mood, key concepts, estimated duration in seconds).
     """
     
-    response = client.models.generate_content(
+    return dict(
         model=configuration.synthesis_model,
         contents=analysis_prompt,
-        config={"temperature": configuration.synthesis_temperature}
+        config=_analysis_config(configuration)
     )
-    
-    # Extract JSON from response 
-    response_text = response.candidates[0].content.parts[0].text
-            
-    # Try to extract JSON using regex first
-    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-    if json_match:
+
+def _analysis_config(configuration: Configuration) -> dict:
+    # Constrain the answer to the TranscriptAnalysis schema
+    return {
+        "temperature": configuration.synthesis_temperature,
+        "response_mime_type": "application/json",
+        "response_schema": TranscriptAnalysis,
+    }
+
+def _segment_repair_request(response_text: str, error: Exception, configuration: Configuration) -> dict:
+    repair_prompt = f"""
+    The JSON below should describe the speakers and thematic sections of a podcast
+    transcript, but it could not be used:
+    {str(error)[:2000]}
+
+    Return the corrected JSON only, keeping everything that is valid.
+
+    JSON:
+    {response_text}
+    """
+    return dict(
+        model=configuration.synthesis_model,
+        contents=repair_prompt,
+        config=_analysis_config(configuration)
+    )
+
+def _save_analysis(workspace, analysis: dict) -> None:
+    # keep the segmentation next to the script so a resumed or edited run can reuse it
+    workspace.write_text(workspace.analysis_path, json.dumps(analysis, indent=2, ensure_ascii=False))
+
+def _validate_analysis(response_text: str) -> TranscriptAnalysis:
+    try:
+        return TranscriptAnalysis.model_validate_json(response_text)
+    except ValueError as e:
+        # Tolerate prose or code fences around the JSON object
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if not json_match:
+            raise ValueError(f"No JSON object in segmentation output: {e}") from e
+        return TranscriptAnalysis.model_validate_json(json_match.group())
+
+def _analysis_is_valid(response) -> bool:
+    # Only usable segmentation answers go into the response cache
+    try:
+        _validate_analysis(response.text or "")
+    except ValueError:
+        return False
+    return True
+
+def _parse_analysis(response_text: str) -> dict:
+    """Validate the segmentation JSON (filling defaults); raises ValueError if it is unusable"""
+    analysis = _validate_analysis(response_text)
+    logger.info(f"✅ Parsed analysis: {len(analysis.speakers)} speakers, {len(analysis.sections)} sections")
+    return analysis.to_state()
+
+def _log_repair(error: Exception, attempt: int, configuration: Configuration) -> None:
+    logger.warning(f"⚠️ Invalid segmentation output, requesting a repair ({attempt + 1}/{configuration.segmentation_repair_attempts}): {str(error)[:300]}")
+
+@traceable(run_type="llm", name="Segment Transcript")
+def segment_transcript(state: ResearchState, config: RunnableConfig) -> dict:
+    """Use LLM to intelligently analyze and segment the transcript
+
+    The answer is schema-constrained and validated; if it still cannot be used,
+    only this call is retried with a repair prompt (`segmentation_repair_attempts`).
+    Only a usable answer is cached: a repaired one is stored under the original
+    request, so a rerun does not pay for the repair again.
+    """
+    configuration = Configuration.from_runnable_config(config)
+    request = _segment_request(state, configuration)
+    response = generate_content(**request, cache_node="segment_transcript", configuration=configuration, cache_if=_analysis_is_valid)
+    for attempt in range(configuration.segmentation_repair_attempts + 1):
+        response_text = response.text or ""
         try:
-            analysis = json.loads(json_match.group())
-            print("✅ Successfully parsed JSON using regex extraction")
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse extracted JSON: {e}")
-            raise
-    else: # If no JSON found with regex, parse the entire response            
-        analysis = json.loads(response_text)
-        print("✅ Successfully parsed JSON from full response")
-        
+            analysis = _parse_analysis(response_text)
+            break
+        except ValueError as e:
+            if attempt == configuration.segmentation_repair_attempts:
+                raise
+            _log_repair(e, attempt, configuration)
+            response = generate_content(**_segment_repair_request(response_text, e, configuration), configuration=configuration)
+    if attempt:
+        cache_response(**request, response=response, cache_node="segment_transcript", configuration=configuration)
+    _save_analysis(get_workspace(state, configuration), analysis)
+    return {"analysis": analysis}
+
+@traceable(run_type="llm", name="Segment Transcript")
+async def asegment_transcript(state: ResearchState, config: RunnableConfig) -> dict:
+    """Async variant of segment_transcript"""
+    configuration = Configuration.from_runnable_config(config)
+    request = _segment_request(state, configuration)
+    response = await agenerate_content(**request, cache_node="segment_transcript", configuration=configuration, cache_if=_analysis_is_valid)
+    for attempt in range(configuration.segmentation_repair_attempts + 1):
+        response_text = response.text or ""
+        try:
+            analysis = _parse_analysis(response_text)
+            break
+        except ValueError as e:
+            if attempt == configuration.segmentation_repair_attempts:
+                raise
+            _log_repair(e, attempt, configuration)
+            response = await agenerate_content(**_segment_repair_request(response_text, e, configuration), configuration=configuration)
+    if attempt:
+        await asyncio.to_thread(cache_response, **request, response=response, cache_node="segment_transcript", configuration=configuration)
+    await asyncio.to_thread(_save_analysis, get_workspace(state, configuration), analysis)
     return {"analysis": analysis}
 
 
 
 # ========= Generate Images =========
-# Get the project root directory (assuming we're in src/agent/)
-project_root = Path(__file__).parent.parent.parent
-speakers_dir = project_root / "podcast" / "images" / "speakers"
-backgrounds_dir = project_root / "podcast" / "images" / "backgrounds"
-# Create directories if they don't exist
-os.makedirs(speakers_dir, exist_ok=True)
-os.makedirs(backgrounds_dir, exist_ok=True)
+# Images are written into the run's workspace (podcast/runs/<run_id>/images/...)
+
+def _speaker_save_path(workspace, speaker_name):
+    return os.path.join(workspace.speakers_dir, f"{safe_filename(speaker_name)}.png")
+
+def _reuse_shared_speaker(workspace, save_path, configuration):
+    """Link a pooled portrait into the workspace if speaker images are shared"""
+    if not configuration.share_speaker_images:
+        return False
+    shared_path = workspace.find_shared("speakers", os.path.basename(save_path))
+    if shared_path is None:
+        return False
+    workspace.adopt(shared_path, save_path)
+    logger.info(f"♻️ Reusing shared speaker image: {os.path.basename(save_path)}")
+    return True
+
+def _promote_image(workspace, image_path, kind, enabled):
+    if enabled and image_path:
+        workspace.promote(image_path, kind)
+    return image_path
+
+def _speaker_prompt_request(speaker_name, info, configuration):
+    # Generate image prompt using LLM
+    prompt_request = f"""
+    Create a detailed image generation prompt for a professional podcast speaker with these characteristics:
+    Name: {speaker_name}
+    Role: {info['role']}
+    Characteristics: {info['characteristics']}
+    
+    Focus on: professional appearance, clear facial features, appropriate background, good lighting.
+    Keep it realistic and professional.
+    
+    Return only the image generation prompt, no additional text.
+    """
+    return dict(
+        model= configuration.synthesis_model,
+        contents=prompt_request,
+        config={"temperature": configuration.synthesis_temperature}
+    )
+
+def _generate_speaker_image(workspace, speaker_name, info, configuration):
+    """Write an image prompt for one speaker and generate the portrait"""
+    logger.info(f"Generating image for speaker: {speaker_name}")
+
+    # Check if image already exists in this run or the shared pool
+    save_path = _speaker_save_path(workspace, speaker_name)
+    if os.path.exists(save_path) or _reuse_shared_speaker(workspace, save_path, configuration):
+        logger.info(f"✅ Image already exists, skipping generation: {os.path.basename(save_path)}")
+        return save_path
+
+    prompt_response = generate_content(**_speaker_prompt_request(speaker_name, info, configuration), cache_node="generate_speaker_images", configuration=configuration)
+    image_prompt = prompt_response.candidates[0].content.parts[0].text.strip()
+    logger.debug(f"Generated prompt for {speaker_name}:\n{image_prompt}")
+    
+    # Generate the actual speaker image
+    image_path = generate_image_with_prompt(image_prompt, save_path, configuration)
+    return _promote_image(workspace, image_path, "speakers", configuration.share_speaker_images)
+
+async def _agenerate_speaker_image(workspace, speaker_name, info, configuration):
+    """Async variant of _generate_speaker_image"""
+    logger.info(f"Generating image for speaker: {speaker_name}")
+
+    save_path = _speaker_save_path(workspace, speaker_name)
+    if os.path.exists(save_path) or await asyncio.to_thread(_reuse_shared_speaker, workspace, save_path, configuration):
+        logger.info(f"✅ Image already exists, skipping generation: {os.path.basename(save_path)}")
+        return save_path
+
+    prompt_response = await agenerate_content(**_speaker_prompt_request(speaker_name, info, configuration), cache_node="generate_speaker_images", configuration=configuration)
+    image_prompt = prompt_response.candidates[0].content.parts[0].text.strip()
+    logger.debug(f"Generated prompt for {speaker_name}:\n{image_prompt}")
+
+    image_path = await agenerate_image_with_prompt(image_prompt, save_path, configuration)
+    return await asyncio.to_thread(_promote_image, workspace, image_path, "speakers", configuration.share_speaker_images)
+
+def _background_save_path(workspace, i, section):
+    # Create meaningful filename
+    return os.path.join(workspace.backgrounds_dir, f"section_{i:02d}_{safe_filename(section['title'])}.png")
+
+def _background_prompt_request(section, configuration):
+    # Generate background image prompt using LLM
+    background_prompt_response = f"""
+    Create a detailed image generation prompt for a podcast video background based on this section:
+    
+    Title: {section['title']}
+    Theme: {section['theme']}
+    Mood: {section['mood']}
+    Key Concepts: {', '.join(section['key_concepts'])}
+    
+    The image should be:
+    - Abstract and not distracting from speakers
+    - Professional and modern
+    - Relevant to the theme and concepts
+    - Suitable as a video background (16:9 aspect ratio)
+    - Visually appealing but not overwhelming
+    
+    Return only the image generation prompt, no additional text.
+    """
+    return dict(
+        model= configuration.synthesis_model,
+        contents=background_prompt_response,
+        config={"temperature": configuration.synthesis_temperature}
+    )
+
+def _reuse_library_background(workspace, i, section, configuration):
+    """Link a similar background from the library into the workspace, if there is one"""
+    library = get_background_library(configuration)
+    if library is None:
+        return None
+    match = library.lookup(section, configuration.background_similarity_threshold)
+    record_cache("backgrounds", match is not None)
+    if match is None:
+        return None
+    library_path, score = match
+    save_path = workspace.adopt(library_path, _background_save_path(workspace, i, section))
+    logger.info(f"♻️ Reusing library background for section {i} (similarity {score:.2f}): {library_path.name}")
+    return str(save_path)
+
+def _file_background(section, image_path, configuration):
+    library = get_background_library(configuration)
+    if library is not None and image_path:
+        library.add(section, image_path)
+
+def _generate_section_background(workspace, i, section, configuration):
+    """Write an image prompt for one section and generate its background
+
+    A background already in the workspace (e.g. from an interrupted attempt of
+    this run) or a similar enough one from the library is reused without any API call.
+    """
+    logger.info(f"Generating background for section {i}: {section.get('title', 'Unknown')}")
+    save_path = _background_save_path(workspace, i, section)
+    if os.path.exists(save_path):
+        logger.info(f"✅ Background already exists, skipping generation: {os.path.basename(save_path)}")
+        return save_path
+    reused = _reuse_library_background(workspace, i, section, configuration)
+    if reused:
+        return reused
+
+    prompt_response = generate_content(**_background_prompt_request(section, configuration), cache_node="generate_section_backgrounds", configuration=configuration)
+    background_prompt = prompt_response.candidates[0].content.parts[0].text.strip()
+    logger.debug(f"Generated background prompt {i}:\n{background_prompt}")
+
+    # Generate the actual background image
+    image_path = generate_image_with_prompt(background_prompt, _background_save_path(workspace, i, section), configuration)
+    _file_background(section, image_path, configuration)
+    return _promote_image(workspace, image_path, "backgrounds", configuration.share_backgrounds)
+
+async def _agenerate_section_background(workspace, i, section, configuration):
+    """Async variant of _generate_section_background"""
+    logger.info(f"Generating background for section {i}: {section.get('title', 'Unknown')}")
+    save_path = _background_save_path(workspace, i, section)
+    if os.path.exists(save_path):
+        logger.info(f"✅ Background already exists, skipping generation: {os.path.basename(save_path)}")
+        return save_path
+    reused = await asyncio.to_thread(_reuse_library_background, workspace, i, section, configuration)
+    if reused:
+        return reused
+
+    prompt_response = await agenerate_content(**_background_prompt_request(section, configuration), cache_node="generate_section_backgrounds", configuration=configuration)
+    background_prompt = prompt_response.candidates[0].content.parts[0].text.strip()
+    logger.debug(f"Generated background prompt {i}:\n{background_prompt}")
+
+    image_path = await agenerate_image_with_prompt(background_prompt, _background_save_path(workspace, i, section), configuration)
+    await asyncio.to_thread(_file_background, section, image_path, configuration)
+    return await asyncio.to_thread(_promote_image, workspace, image_path, "backgrounds", configuration.share_backgrounds)
+
+def _log_image_result(key, image_path, label, results):
+    if image_path:
+        results[key] = image_path
+        logger.info(f"✅ Successfully generated {label} for {key}: {image_path}")
+    else:
+        logger.error(f"❌ Failed to generate {label} for {key}")
+
+def _run_image_tasks(tasks, max_concurrency, label, stage):
+    """Run independent image tasks concurrently and return {key: image_path}
+
+    `tasks` maps each result key to a zero-argument callable. A failing task is
+    logged and left out of the result without delaying the others. Every
+    finished task is reported as a `stage` progress event.
+    """
+    results = {}
+    if not tasks:
+        return results
+
+    progress = Progress(stage, len(tasks), "images", failed=0)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(tasks)))) as executor:
+        futures = {executor.submit(bind_context(task)): key for key, task in tasks.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                image_path = future.result()
+            except Exception as e:
+                logger.error(f"❌ Error generating {label} for {key}: {e}")
+                image_path = None
+            _log_image_result(key, image_path, label, results)
+            failed += image_path is None
+            progress.advance(failed=failed)
+
+    # Keep the original ordering of the inputs
+    return {key: results[key] for key in tasks if key in results}
+
+async def _arun_image_tasks(tasks, max_concurrency, label, stage):
+    """Async variant of _run_image_tasks; `tasks` maps keys to coroutine functions"""
+    results = {}
+    if not tasks:
+        return results
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    progress = Progress(stage, len(tasks), "images", failed=0)
+    failed = 0
+
+    async def run(key, task):
+        nonlocal failed
+        async with semaphore:
+            try:
+                image_path = await task()
+            except Exception as e:
+                logger.error(f"❌ Error generating {label} for {key}: {e}")
+                image_path = None
+        _log_image_result(key, image_path, label, results)
+        failed += image_path is None
+        progress.advance(failed=failed)
+
+    await asyncio.gather(*(run(key, task) for key, task in tasks.items()))
+    return {key: results[key] for key in tasks if key in results}
 
 @traceable(run_type="llm", name="Generate Speaker Images")
 def generate_speaker_images(state: ResearchState, config: RunnableConfig):
@@ -200,60 +624,39 @@ def generate_speaker_images(state: ResearchState, config: RunnableConfig):
     # Accept speakers directly on state or nested under the analysis key
     analysis = state.get("analysis", {})
     speakers_info = analysis.get("speakers", {}) 
-    speaker_images = {}
-    
-    for speaker_name, info in speakers_info.items():
-        print(f"Generating image for speaker: {speaker_name}")
-
-        # Check if image already exists 
-        safe_name = "".join(c for c in speaker_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        save_path = os.path.join(speakers_dir, f"{safe_name}.png")
-        if os.path.exists(save_path):
-            print(f"✅ Image already exists, skipping generation: {os.path.basename(save_path)}")
-            speaker_images[speaker_name] = save_path
-            continue
+    workspace = get_workspace(state, configuration).ensure()
 
-        # Generate image prompt using LLM
-        prompt_request = f"""
-        Create a detailed image generation prompt for a professional podcast speaker with these characteristics:
-        Name: {speaker_name}
-        Role: {info['role']}
-        Characteristics: {info['characteristics']}
-        
-        Focus on: professional appearance, clear facial features, appropriate background, good lighting.
-        Keep it realistic and professional.
-        
-        Return only the image generation prompt, no additional text.
-        """
-        
-        prompt_response = client.models.generate_content(
-            model= configuration.synthesis_model,
-            contents=prompt_request,
-            config={"temperature": configuration.synthesis_temperature}
-        )
-        
-        image_prompt = prompt_response.candidates[0].content.parts[0].text.strip()
-        print(f"Generated prompt for {speaker_name}:\n{image_prompt}")
-        
-        # Generate the actual speaker image
-        try:
-            speaker_image = generate_image_with_prompt(
-                image_prompt,
-                save_path
-            )
-            if speaker_image:
-                speaker_images[speaker_name] = speaker_image
-                print(f"✅ Successfully generated image for {speaker_name}: {speaker_image}")
-            else:
-                print(f"❌ Failed to generate image for {speaker_name}")
-        except Exception as e:
-            print(f"❌ Error generating image for {speaker_name}: {e}")
+    # Each speaker is generated as an independent task
+    tasks = {
+        speaker_name: partial(_generate_speaker_image, workspace, speaker_name, info, configuration)
+        for speaker_name, info in speakers_info.items()
+    }
+    speaker_images = _run_image_tasks(tasks, configuration.image_max_concurrency, "image", "speaker_images")
     
     return {
         "speaker_images": speaker_images,
         "speakers": speakers_info,
     }
 
+@traceable(run_type="llm", name="Generate Speaker Images")
+async def agenerate_speaker_images(state: ResearchState, config: RunnableConfig):
+    """Async variant of generate_speaker_images"""
+    configuration = Configuration.from_runnable_config(config)
+    analysis = state.get("analysis", {})
+    speakers_info = analysis.get("speakers", {})
+    workspace = await asyncio.to_thread(get_workspace(state, configuration).ensure)
+
+    tasks = {
+        speaker_name: partial(_agenerate_speaker_image, workspace, speaker_name, info, configuration)
+        for speaker_name, info in speakers_info.items()
+    }
+    speaker_images = await _arun_image_tasks(tasks, configuration.image_max_concurrency, "image", "speaker_images")
+
+    return {
+        "speaker_images": speaker_images,
+        "speakers": speakers_info,
+    }
+
 @traceable(run_type="llm", name="Generate Background Images")
 def generate_section_backgrounds(state: ResearchState, config: RunnableConfig):
     """Generate background images for each section using LLM analysis"""
@@ -263,55 +666,14 @@ def generate_section_backgrounds(state: ResearchState, config: RunnableConfig):
     # Accept sections directly on state or nested under analysis
     analysis=state.get("analysis", {})
     sections = analysis.get("sections", [])
-    section_backgrounds: dict[str, str] = {}
-    
-    for i, section in enumerate(sections):
-        print(f"Generating background for section {i}: {section.get('title', 'Unknown')}")
-        # Generate background image prompt using LLM
-        background_prompt_response = f"""
-        Create a detailed image generation prompt for a podcast video background based on this section:
-        
-        Title: {section['title']}
-        Theme: {section['theme']}
-        Mood: {section['mood']}
-        Key Concepts: {', '.join(section['key_concepts'])}
-        
-        The image should be:
-        - Abstract and not distracting from speakers
-        - Professional and modern
-        - Relevant to the theme and concepts
-        - Suitable as a video background (16:9 aspect ratio)
-        - Visually appealing but not overwhelming
-        
-        Return only the image generation prompt, no additional text.
-        """
-        
-        prompt_response = client.models.generate_content(
-            model= configuration.synthesis_model,
-            contents=background_prompt_response,
-            config={"temperature": configuration.synthesis_temperature}
-        )
-        
-        background_prompt = prompt_response.candidates[0].content.parts[0].text.strip()
-        print(f"Generated background prompt {i}:\n{background_prompt}")
-        
-        # Generate the actual background image
-        try:
-            # Create meaningful filename
-            safe_title = "".join(c for c in section['title'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            save_path = os.path.join(backgrounds_dir, f"section_{i:02d}_{safe_title}.png")
-            
-            background_image = generate_image_with_prompt(
-                background_prompt,
-                save_path
-            )
-            if background_image:
-                section_backgrounds[f"section_{i:02d}"] = background_image
-                print(f"✅ Successfully generated background for section {i}: {background_image}")
-            else:
-                print(f"❌ Failed to generate background for section {i}")
-        except Exception as e:
-            print(f"❌ Error generating background for section {i}: {e}")
+    workspace = get_workspace(state, configuration).ensure()
+
+    # Each section is generated as an independent task keyed by section_XX
+    tasks = {
+        f"section_{i:02d}": partial(_generate_section_background, workspace, i, section, configuration)
+        for i, section in enumerate(sections)
+    }
+    section_backgrounds: dict[str, str] = _run_image_tasks(tasks, configuration.image_max_concurrency, "background", "section_backgrounds")
     
     # Persist backgrounds so downstream nodes see them via `state.get("section_backgrounds")`
     return {
@@ -319,63 +681,224 @@ def generate_section_backgrounds(state: ResearchState, config: RunnableConfig):
         "sections": sections,
     }
 
+@traceable(run_type="llm", name="Generate Background Images")
+async def agenerate_section_backgrounds(state: ResearchState, config: RunnableConfig):
+    """Async variant of generate_section_backgrounds"""
+    configuration = Configuration.from_runnable_config(config)
+    analysis=state.get("analysis", {})
+    sections = analysis.get("sections", [])
+    workspace = await asyncio.to_thread(get_workspace(state, configuration).ensure)
+
+    tasks = {
+        f"section_{i:02d}": partial(_agenerate_section_background, workspace, i, section, configuration)
+        for i, section in enumerate(sections)
+    }
+    section_backgrounds: dict[str, str] = await _arun_image_tasks(tasks, configuration.image_max_concurrency, "background", "section_backgrounds")
+
+    return {
+        "section_backgrounds": section_backgrounds,
+        "sections": sections,
+    }
+
+
+def _video_output_path(state: ResearchState, workspace):
+    # Create absolute path for output
+    if state.get("output_path"):
+        return state.get("output_path")
+    # Default to the run's workspace
+    return str(workspace.video_path)
+
+def _render_video(segments, speaker_images, output_path, audio_file, configuration, workspace):
+    """Render into the workspace and atomically move the finished file to output_path"""
+    partial_path = workspace.temp_path(output_path)
+    try:
+        create_video(segments, speaker_images, str(partial_path), audio_file, configuration)
+        atomic_move(partial_path, output_path)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+    return output_path
+
+def _scale_images(state: ResearchState, configuration: Configuration, workspace):
+    """Section backgrounds and speaker images downscaled once for the render profile"""
+    section_backgrounds = state.get("section_backgrounds", {})
+    speaker_images = state.get("speaker_images", {})
+    profile = get_render_profile(configuration)
+    if not profile.height:
+        return section_backgrounds, speaker_images
+
+    logger.info(f"Downscaling images for the {profile.name} render profile...")
+    out_dir = workspace.scaled_images_dir(profile.name)
+    section_backgrounds = {key: downscale_image(path, profile.height, out_dir) for key, path in section_backgrounds.items()}
+    portrait_height = speaker_size(profile)[1]
+    speaker_images = {name: downscale_image(path, portrait_height, out_dir) for name, path in speaker_images.items()}
+    return section_backgrounds, speaker_images
+
+def _prepare_segments(state: ResearchState, configuration: Configuration, workspace) -> tuple:
+    """Parse the transcript into segments and assign section backgrounds; return (segments, speaker_images)"""
+    transcript_text = state.get("podcast_script", "")
+    analysis = state.get("analysis", {})
+    sections = analysis.get("sections", [])
+    section_backgrounds, speaker_images = _scale_images(state, configuration, workspace)
+
+    logger.info("Parsing transcript into segments...")
+    # Parse transcript into segments aligned with sections
+    segments = parse_transcript_with_sections(transcript_text, sections)
+
+    logger.info("Assigning images to segments...")
+    return assign_images_to_segments(segments, section_backgrounds), speaker_images
+
+def _audio_configuration(configuration: Configuration, workspace) -> Configuration:
+    """Keep segment PCM in the run workspace when the shared TTS cache is off, so a resumed run reuses it"""
+    if configuration.tts_cache_enabled or not configuration.keep_segment_audio:
+        return configuration
+    return dataclasses.replace(configuration, tts_cache_enabled=True, tts_cache_dir=str(workspace.audio_dir))
+
+def _cleanup_audio_file(audio_file):
+    # Clean up temporary audio file only if we generated it ourselves
+    if audio_file and os.path.exists(audio_file) and (audio_file.startswith('/tmp') or audio_file.startswith('/var/folders')):
+        try:
+            os.unlink(audio_file)
+            logger.info(f"Cleaned up temporary audio file: {audio_file}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not clean up temporary file {audio_file}: {e}")
 
 @traceable(run_type="llm", name="Create Podcast")
 def create_video_node(state: ResearchState, config: RunnableConfig) -> dict:
     """Main method to generate complete video from transcript using LLM-driven approach"""
     configuration = Configuration.from_runnable_config(config)
     audio_file = None
-    transcript_text = state.get("podcast_script", "")
-
-    # Create absolute path for output
-    if state.get("output_path"):
-        output_path = state.get("output_path")
-    else:
-        # Use absolute path based on project root
-        project_root = Path(__file__).parent.parent.parent
-        podcast_dir = project_root / "podcast"
-        podcast_dir.mkdir(parents=True, exist_ok=True)
-        output_path = podcast_dir / "podcast_video.mp4"
+    workspace = get_workspace(state, configuration)
+    output_path = _video_output_path(state, workspace)
     
     try:
-        print("Analyzing transcript with LLM...")
-        # Analyze transcript with LLM to get sections and speakers
-        analysis = state.get("analysis", {})
-        sections = analysis.get("sections", [])
-        speaker_images = state.get("speaker_images", {})
-        section_backgrounds = state.get("section_backgrounds", {})
-
-        print("Parsing transcript into segments...")
-
-        # Parse transcript into segments aligned with sections
-        segments = parse_transcript_with_sections(transcript_text, sections)
-        
-        print("Assigning images to segments...")
-        # Assign images to segments
-        segments = assign_images_to_segments(segments, section_backgrounds)
+        segments, speaker_images = _prepare_segments(state, configuration, workspace)
         
-        print("Generating TTS audio with accurate segment durations...")
-        audio_file, segments = generate_audio_and_update_segments(segments)
+        logger.info("Generating TTS audio with accurate segment durations...")
+        audio_file, segments = generate_audio_and_update_segments(segments, _audio_configuration(configuration, workspace))
         
-        print("Creating final video...")
-        final_video_path = create_video(segments, speaker_images, output_path, audio_file)
+        logger.info("Creating final video...")
+        with stage_slot(RENDER):
+            final_video_path = _render_video(segments, speaker_images, output_path, audio_file, configuration, workspace)
         
-        print(f"Video created successfully: {final_video_path}")
+        logger.info(f"Video created successfully: {final_video_path}")
         return {
-            "podcast_filename": final_video_path
+            "podcast_filename": final_video_path,
+            "cache_stats": collect_cache_stats(),
         }
         
     except Exception as e:
-        print(f"❌ Error generating video: {e}")
+        logger.error(f"❌ Error generating video: {e}")
         raise
     finally:
-        # Clean up temporary audio file only if we generated it ourselves
-        if audio_file and os.path.exists(audio_file) and (audio_file.startswith('/tmp') or audio_file.startswith('/var/folders')):
-            try:
-                os.unlink(audio_file)
-                print(f"Cleaned up temporary audio file: {audio_file}")
-            except Exception as e:
-                print(f"⚠️ Could not clean up temporary file {audio_file}: {e}")
+        release_prefetched()
+        _cleanup_audio_file(audio_file)
+
+@traceable(run_type="llm", name="Create Podcast")
+async def acreate_video_node(state: ResearchState, config: RunnableConfig) -> dict:
+    """Async variant of create_video_node; encoding and file work run in worker threads"""
+    configuration = Configuration.from_runnable_config(config)
+    audio_file = None
+    workspace = get_workspace(state, configuration)
+    output_path = _video_output_path(state, workspace)
+
+    try:
+        segments, speaker_images = await asyncio.to_thread(_prepare_segments, state, configuration, workspace)
+
+        logger.info("Generating TTS audio with accurate segment durations...")
+        audio_file, segments = await agenerate_audio_and_update_segments(segments, _audio_configuration(configuration, workspace))
+
+        logger.info("Creating final video...")
+        # Wait for a render slot here rather than in a worker thread
+        async with astage_slot(RENDER):
+            final_video_path = await asyncio.to_thread(_render_video, segments, speaker_images, output_path, audio_file, configuration, workspace)
+
+        logger.info(f"Video created successfully: {final_video_path}")
+        return {
+            "podcast_filename": final_video_path,
+            "cache_stats": collect_cache_stats(),
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Error generating video: {e}")
+        raise
+    finally:
+        release_prefetched()
+        await asyncio.to_thread(_cleanup_audio_file, audio_file)
+
+def _audio_output_path(state: ResearchState, configuration: Configuration, workspace):
+    if state.get("output_path"):
+        return state.get("output_path")
+    return str(workspace.audio_path(audio_suffix(configuration)))
+
+def _audio_segments(state: ResearchState) -> list:
+    # No sections needed: the audio-only path skips segmentation
+    return parse_transcript_with_sections(state.get("podcast_script", ""), [])
+
+def _encode_podcast_audio(audio_file, output_path, configuration, workspace):
+    """Encode into the workspace and atomically move the finished file to output_path"""
+    partial_path = workspace.temp_path(output_path)
+    try:
+        encode_audio(audio_file, partial_path, configuration)
+        atomic_move(partial_path, output_path)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+    return output_path
+
+@traceable(run_type="llm", name="Create Podcast Audio")
+def create_audio_node(state: ResearchState, config: RunnableConfig) -> dict:
+    """Synthesize the script and encode it straight to a compressed audio file (output_mode="audio")"""
+    configuration = Configuration.from_runnable_config(config)
+    audio_file = None
+    workspace = get_workspace(state, configuration)
+    output_path = _audio_output_path(state, configuration, workspace)
+
+    try:
+        logger.info("Generating TTS audio...")
+        audio_file, _ = generate_audio_and_update_segments(_audio_segments(state), _audio_configuration(configuration, workspace))
+        with stage_slot(RENDER):
+            final_audio_path = _encode_podcast_audio(audio_file, output_path, configuration, workspace)
+
+        logger.info(f"Audio created successfully: {final_audio_path}")
+        return {
+            "podcast_filename": final_audio_path,
+            "cache_stats": collect_cache_stats(),
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Error generating audio: {e}")
+        raise
+    finally:
+        release_prefetched()
+        _cleanup_audio_file(audio_file)
+
+@traceable(run_type="llm", name="Create Podcast Audio")
+async def acreate_audio_node(state: ResearchState, config: RunnableConfig) -> dict:
+    """Async variant of create_audio_node"""
+    configuration = Configuration.from_runnable_config(config)
+    audio_file = None
+    workspace = get_workspace(state, configuration)
+    output_path = _audio_output_path(state, configuration, workspace)
+
+    try:
+        logger.info("Generating TTS audio...")
+        audio_file, _ = await agenerate_audio_and_update_segments(_audio_segments(state), _audio_configuration(configuration, workspace))
+        async with astage_slot(RENDER):
+            final_audio_path = await asyncio.to_thread(_encode_podcast_audio, audio_file, output_path, configuration, workspace)
+
+        logger.info(f"Audio created successfully: {final_audio_path}")
+        return {
+            "podcast_filename": final_audio_path,
+            "cache_stats": collect_cache_stats(),
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Error generating audio: {e}")
+        raise
+    finally:
+        release_prefetched()
+        await asyncio.to_thread(_cleanup_audio_file, audio_file)
 
 
 
@@ -384,10 +907,56 @@ def should_analyze_video(state: ResearchState) -> str:
     if state.get("video_url"):
         return "analyze_video" # go to analyze_video node
     else:
-        return "create_report" # go to create_report node
+        return "create_podcast_transcript" # skip straight to the script
+
+def route_output_mode(state: ResearchState) -> str:
+    """Conditional edge after the script: the video pipeline, the audio-only node, or stop"""
+    mode = output_mode(state)
+    if mode == "audio":
+        return "create_audio" # no segmentation, images or video encode
+    if mode == "script":
+        return END
+    return "segment_transcript"
     
-def build_graph() -> StateGraph:
-    """Create the research workflow graph"""
+SYNC_NODES = {
+    "search_research": search_research_node,
+    "analyze_video": analyze_video_node,
+    "create_podcast_transcript": create_podcast_transcript,
+    "segment_transcript": segment_transcript,
+    "generate_speaker_images": generate_speaker_images,
+    "generate_section_backgrounds": generate_section_backgrounds,
+    "create_video": create_video_node,
+    "create_audio": create_audio_node,
+}
+
+ASYNC_NODES = {
+    "search_research": asearch_research_node,
+    "analyze_video": aanalyze_video_node,
+    "create_podcast_transcript": acreate_podcast_transcript,
+    "segment_transcript": asegment_transcript,
+    "generate_speaker_images": agenerate_speaker_images,
+    "generate_section_backgrounds": agenerate_section_backgrounds,
+    "create_video": acreate_video_node,
+    "create_audio": acreate_audio_node,
+}
+
+# Nodes that can end a run, and when: they publish the run's metrics
+FINAL_NODES = {
+    "create_podcast_transcript": lambda state: output_mode(state) == "script",
+    "create_video": True,
+    "create_audio": True,
+}
+
+def build_graph(use_async: bool = True) -> StateGraph:
+    """Create the research workflow graph
+
+    With use_async=True (the default) the nodes are coroutines using the async
+    Gemini client, so the graph must be run with ainvoke/astream. Pass
+    use_async=False for the blocking nodes and invoke/stream. The `output_mode`
+    input decides where the run ends after the script, so nodes a mode does not
+    need never run.
+    """
+    nodes = ASYNC_NODES if use_async else SYNC_NODES
     # Initialize the graph with configuration schema
     graph = StateGraph(
         ResearchState,
@@ -396,13 +965,8 @@ def build_graph() -> StateGraph:
         config_schema=Configuration
     )
     # Add nodes
-    graph.add_node("search_research", search_research_node)
-    graph.add_node("analyze_video", analyze_video_node)
-    graph.add_node("create_podcast_transcript", create_podcast_transcript)
-    graph.add_node("segment_transcript", segment_transcript)
-    graph.add_node("generate_speaker_images", generate_speaker_images)
-    graph.add_node("generate_section_backgrounds", generate_section_backgrounds)
-    graph.add_node("create_video", create_video_node)
+    for name, node in nodes.items():
+        graph.add_node(name, instrument_node(name, node, final=FINAL_NODES.get(name, False)))
 
     # Add edges
     graph.add_edge(START, "search_research")
@@ -415,46 +979,72 @@ def build_graph() -> StateGraph:
         }
     )
     graph.add_edge("analyze_video", "create_podcast_transcript")
-    graph.add_edge("create_podcast_transcript", "segment_transcript")
+    graph.add_conditional_edges(
+        "create_podcast_transcript",
+        route_output_mode,
+        {
+            "segment_transcript": "segment_transcript",
+            "create_audio": "create_audio",
+            END: END,
+        }
+    )
     graph.add_edge("segment_transcript", "generate_speaker_images")
     graph.add_edge("segment_transcript", "generate_section_backgrounds")
     graph.add_edge("generate_speaker_images", "create_video")
     graph.add_edge("generate_section_backgrounds", "create_video")
-    graph.add_edge("create_video", END)    
+    graph.add_edge("create_video", END)
+    graph.add_edge("create_audio", END)
     
     return graph
 
+def export_graph_png(graph, path=None):
+    """Save a PNG of the compiled graph (rendered by the mermaid.ink service, so it needs network access)"""
+    graph_path = Path(path) if path else PODCAST_DIR / "graph.png"
+    graph_png = graph.get_graph().draw_mermaid_png()
+    atomic_write_bytes(graph_path, graph_png)
+    return graph_path
+
 def create_graph():
-    """Create and compile the research graph"""
-    graph = build_graph()
-    graph = graph.compile()
-    # save png file for graph
-    graph_png=graph.get_graph().draw_mermaid_png()
-    
-    # Create podcast directory if it doesn't exist
-    podcast_dir = Path(__file__).parent.parent.parent / "podcast"
-    podcast_dir.mkdir(parents=True, exist_ok=True)    
-    graph_path = podcast_dir / "graph.png"
+    """Create and compile the (async) research graph
 
-    with open(graph_path, "wb") as f:
-        f.write(graph_png)
+    This is the LangGraph server entry point, so it does no I/O by default. Set
+    EXPORT_GRAPH_PNG=1 (or to a file path) to also export podcast/graph.png.
+    """
+    graph = build_graph().compile()
+    export = os.environ.get("EXPORT_GRAPH_PNG", "").strip()
+    if export and export.lower() not in ("0", "false", "no", "off"):
+        try:
+            export_graph_png(graph, None if export.lower() in ("1", "true", "yes", "on") else export)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not export graph PNG: {e}")
     return graph
 
-if __name__ == "__main__":
+def format_progress(event):
+    """One-line summary of a progress event"""
+    line = f"⏳ {event['stage']}: {event['done']}/{event['total']} {event['unit']}"
+    if event.get("audio_seconds"):
+        line += f", {event['audio_seconds']:.1f}s audio"
+    if event.get("eta_seconds") is not None:
+        line += f", ETA {event['eta_seconds']:.0f}s"
+    return line
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     topic="Overview on the current state of AGI"
     video_url="https://www.youtube.com/watch?v=4__gg83s_Do"
     input_state=ResearchStateInput(topic=topic, video_url=video_url)
     graph=create_graph()
-    for event in graph.stream(input_state, stream_mode="values"):
-        # LangGraph returns a dict with keys depending on stream_mode
-        if isinstance(event, dict):
-            state = event.get("value", event)  # fallback to whole dict
-        elif isinstance(event, (list, tuple)):
-            state = event[-1]
-        else:
-            state = event
+    # "custom" carries the progress events of long-running nodes (agent.progress)
+    async for mode, event in graph.astream(input_state, stream_mode=["values", "custom"]):
+        if mode == "custom":
+            logger.info(format_progress(event) if event.get("type") == "progress" else event)
+            continue
+        state = event
 
         if hasattr(state, "pretty_print"):
             state.pretty_print()
         else:
-            print(state)
\ No newline at end of file
+            sys.stdout.write(f"{state}\n")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""Decoded, pre-resized images shared by every render in a process
+
+Rendering used to decode and resize the same speaker portraits and backgrounds
+for every segment, and again in every run. `ImageCache.get` returns a read-only
+uint8 array (height, width, channels) for (path, mtime, size, target size,
+mode), decoding and resizing the file only on the first request. Entries are
+evicted least recently used beyond a memory budget. With a thumbnail directory,
+resized images are also stored on disk as .npy files, so another process (or a
+later one) loads them without decoding the PNG again.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from agent.workspace import PODCAST_DIR
+
+DEFAULT_THUMBNAIL_DIR = PODCAST_DIR / "cache" / "thumbnails"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ImageCache:
+    """Memory-bounded LRU of decoded images, optionally backed by a thumbnail directory"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, thumbnail_dir=None):
+        self.max_bytes = max_bytes
+        self.thumbnail_dir = Path(thumbnail_dir) if thumbnail_dir else None
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(path, size=None, mode="RGB"):
+        """Identify an image file version plus the requested target size and mode"""
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, tuple(size) if size else None, mode)
+
+    def get(self, path, size=None, mode="RGB"):
+        """Return the image at `path` converted to `mode` and resized to `size` (width, height)"""
+        key = self.make_key(path, size, mode)
+        with self._lock:
+            array = self._entries.get(key)
+            if array is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return array
+            self.misses += 1
+
+        array = self._load_thumbnail(key)
+        if array is None:
+            array = self._decode(path, size, mode)
+            self._store_thumbnail(key, array)
+        array.setflags(write=False)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = array
+                self._bytes += array.nbytes
+                while self._bytes > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return array
+
+    def _decode(self, path, size, mode):
+        import numpy as np
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image = image.convert(mode)
+            if size and image.size != tuple(size):
+                image = image.resize(tuple(size))
+            array = np.asarray(image)
+        with self._lock:
+            self.decodes += 1
+        return array
+
+    def _thumbnail_path(self, key):
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self.thumbnail_dir / digest[:2] / f"{digest}.npy"
+
+    def _load_thumbnail(self, key):
+        if self.thumbnail_dir is None:
+            return None
+        import numpy as np
+
+        try:
+            return np.load(self._thumbnail_path(key))
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def _store_thumbnail(self, key, array):
+        if self.thumbnail_dir is None:
+            return
+        import numpy as np
+
+        path = self._thumbnail_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "decodes": self.decodes, "bytes": self._bytes}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_image_cache(max_bytes=DEFAULT_MAX_BYTES, thumbnail_dir=None):
+    """Return the process-wide ImageCache for these settings"""
+    key = (max_bytes, str(thumbnail_dir) if thumbnail_dir else None)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = ImageCache(max_bytes, thumbnail_dir)
+        return cache
+
+
+def image_cache_settings(configuration):
+    """(max_bytes, thumbnail_dir) for get_image_cache, picklable for render worker processes"""
+    thumbnail_dir = None
+    if configuration.image_thumbnail_cache:
+        thumbnail_dir = str(configuration.image_thumbnail_dir or DEFAULT_THUMBNAIL_DIR)
+    return configuration.image_cache_max_mb * 1024 * 1024, thumbnail_dir
@@ -0,0 +1,123 @@
+"""Concurrency limits per kind of work
+
+When many runs share one process (see agent.batch), network-bound Gemini calls
+and CPU-bound video encoding are limited separately, so a burst of renders
+cannot starve API calls and vice versa. Limits are unlimited by default.
+
+Process-wide limits are set with `set_stage_limits`. `scoped_stage_limits`
+adds limits that only apply to work started inside a block (a batch, say),
+including the tasks and worker threads it starts with a copy of its context;
+scopes nest, and an operation waits for a slot in every limit that applies.
+Several batches, or a batch next to server runs, therefore never change each
+other's limits.
+
+Blocking code waits on a threading semaphore and coroutines on an asyncio
+semaphore of their event loop, so each limit applies to threads and to each
+event loop separately.
+"""
+import asyncio
+import contextvars
+import threading
+import weakref
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+
+NETWORK = "network"  # Gemini calls (text, search, TTS, images)
+RENDER = "render"    # video encoding
+
+
+class StageLimits:
+    """Max concurrent operations per stage, with the semaphores enforcing them"""
+
+    def __init__(self, **limits):
+        self._limits = {}
+        self._thread_semaphores = {}
+        self._loop_semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.update(**limits)
+
+    def update(self, **limits):
+        """Change limits; None or 0 removes one. Takes effect for operations started afterwards"""
+        with self._lock:
+            for stage, limit in limits.items():
+                self._limits[stage] = limit or None
+                self._thread_semaphores.pop(stage, None)
+            self._loop_semaphores.clear()
+
+    def limits(self):
+        with self._lock:
+            return {stage: limit for stage, limit in self._limits.items() if limit}
+
+    def thread_semaphore(self, stage):
+        with self._lock:
+            limit = self._limits.get(stage)
+            if not limit:
+                return None
+            semaphore = self._thread_semaphores.get(stage)
+            if semaphore is None:
+                semaphore = self._thread_semaphores[stage] = threading.BoundedSemaphore(limit)
+            return semaphore
+
+    def loop_semaphore(self, stage):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            limit = self._limits.get(stage)
+            if not limit:
+                return None
+            semaphores = self._loop_semaphores.setdefault(loop, {})
+            semaphore = semaphores.get(stage)
+            if semaphore is None:
+                semaphore = semaphores[stage] = asyncio.Semaphore(limit)
+            return semaphore
+
+
+_process_limits = StageLimits()
+_scoped_limits = contextvars.ContextVar("scoped_stage_limits", default=())
+
+
+def set_stage_limits(**limits):
+    """Set the process-wide max concurrent operations per stage, e.g. set_stage_limits(network=16, render=2)
+
+    None or 0 removes the limit. Takes effect for operations started afterwards.
+    """
+    _process_limits.update(**limits)
+
+
+def get_stage_limits():
+    """The process-wide limits"""
+    return _process_limits.limits()
+
+
+@contextmanager
+def scoped_stage_limits(**limits):
+    """Apply `limits` to operations started inside the block, on top of the process-wide ones"""
+    token = _scoped_limits.set(_scoped_limits.get() + (StageLimits(**limits),))
+    try:
+        yield
+    finally:
+        _scoped_limits.reset(token)
+
+
+def _applicable_limits():
+    return (_process_limits, *_scoped_limits.get())
+
+
+@contextmanager
+def stage_slot(stage):
+    """Hold one of `stage`'s slots while the block runs (blocking code)"""
+    with ExitStack() as stack:
+        for limits in _applicable_limits():
+            semaphore = limits.thread_semaphore(stage)
+            if semaphore is not None:
+                stack.enter_context(semaphore)
+        yield
+
+
+@asynccontextmanager
+async def astage_slot(stage):
+    """Async variant of stage_slot"""
+    async with AsyncExitStack() as stack:
+        for limits in _applicable_limits():
+            semaphore = limits.loop_semaphore(stage)
+            if semaphore is not None:
+                await stack.enter_async_context(semaphore)
+        yield
@@ -0,0 +1,372 @@
+"""Built-in run metrics
+
+Records per-node wall time, Gemini calls per model (latency, request/response
+bytes, token usage), cache hits, audio seconds and encoded video frames. Every
+measurement goes to a process-wide collector and, when recorded inside a graph
+node, to the collector of the run that node belongs to. A finished run is
+written as metrics.json in its workspace; the process totals can be exported in
+Prometheus text format.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+from agent.configuration import Configuration
+from agent.workspace import atomic_write_bytes, get_workspace, resolve_run_id
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KINDS = ("prompt", "candidates", "total")
+
+
+def payload_bytes(value):
+    """Approximate wire size of request contents or response parts"""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(payload_bytes(item) for item in value.values())
+    parts = getattr(value, "parts", None)
+    if parts is not None:
+        return payload_bytes(parts)
+    size = payload_bytes(getattr(value, "text", None))
+    inline_data = getattr(value, "inline_data", None)
+    if inline_data is not None:
+        size += payload_bytes(inline_data.data)
+    file_data = getattr(value, "file_data", None)
+    if file_data is not None:
+        size += payload_bytes(file_data.file_uri)
+    return size
+
+
+def response_bytes(response):
+    """Size of the text and inline data returned in a GenerateContentResponse"""
+    return sum(payload_bytes(candidate.content) for candidate in response.candidates or [] if candidate.content)
+
+
+class RunMetrics:
+    """Thread-safe counters for one run (or for the whole process)"""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id
+        self.started = time.time()
+        self.runs = 0
+        self.audio_seconds = 0.0
+        self.video_frames = 0
+        self.nodes = defaultdict(lambda: {"calls": 0, "errors": 0, "seconds": 0.0})
+        self.models = defaultdict(lambda: {
+            "calls": 0, "errors": 0, "retries": 0, "seconds": 0.0, "request_bytes": 0, "response_bytes": 0,
+            **{f"{kind}_tokens": 0 for kind in TOKEN_KINDS},
+        })
+        self.caches = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+
+    def record_node(self, name, seconds, failed=False):
+        with self._lock:
+            node = self.nodes[name]
+            node["calls"] += 1
+            node["seconds"] += seconds
+            node["errors"] += int(failed)
+
+    def record_call(self, call):
+        with self._lock:
+            model = self.models[call.model]
+            model["calls"] += 1
+            model["errors"] += int(call.failed)
+            model["seconds"] += call.seconds
+            model["request_bytes"] += call.request_bytes
+            model["response_bytes"] += call.response_bytes
+            for kind in TOKEN_KINDS:
+                model[f"{kind}_tokens"] += call.tokens.get(kind, 0)
+
+    def record_retry(self, model):
+        with self._lock:
+            self.models[model]["retries"] += 1
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            self.caches[cache]["hits" if hit else "misses"] += 1
+
+    def record_audio(self, seconds):
+        with self._lock:
+            self.audio_seconds += seconds
+
+    def record_frames(self, frames):
+        with self._lock:
+            self.video_frames += frames
+
+    def record_run(self):
+        with self._lock:
+            self.runs += 1
+
+    def summary(self):
+        """JSON-serializable snapshot of the counters"""
+        with self._lock:
+            models = {name: dict(counters) for name, counters in self.models.items()}
+            return {
+                "run_id": self.run_id,
+                "wall_seconds": time.time() - self.started,
+                "nodes": {name: dict(counters) for name, counters in self.nodes.items()},
+                "models": models,
+                "api_calls": sum(counters["calls"] for counters in models.values()),
+                "tokens": {kind: sum(counters[f"{kind}_tokens"] for counters in models.values()) for kind in TOKEN_KINDS},
+                "caches": {name: dict(counters) for name, counters in self.caches.items()},
+                "audio_seconds": self.audio_seconds,
+                "video_frames": self.video_frames,
+            }
+
+
+class ApiCall:
+    """Measurements for one model call, filled in by track_api_call"""
+
+    def __init__(self, model, request_bytes):
+        self.model = model
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.tokens = {}
+        self.seconds = 0.0
+        self.failed = False
+
+    def add_response(self, response):
+        """Account for a response (or one chunk of a streamed response)"""
+        self.response_bytes += response_bytes(response)
+        usage = response.usage_metadata
+        if usage is not None:
+            # Streamed chunks carry the running totals, so keep the latest
+            self.tokens = {
+                "prompt": usage.prompt_token_count or 0,
+                "candidates": usage.candidates_token_count or 0,
+                "total": usage.total_token_count or 0,
+            }
+        return response
+
+
+PROCESS_METRICS = RunMetrics()
+_current = contextvars.ContextVar("run_metrics", default=None)
+_runs = OrderedDict()
+_runs_lock = threading.Lock()
+MAX_TRACKED_RUNS = 256
+
+
+def current_run_metrics():
+    """The RunMetrics of the run being executed in this context, if any"""
+    return _current.get()
+
+
+def _collectors():
+    run = _current.get()
+    return (PROCESS_METRICS, run) if run is not None else (PROCESS_METRICS,)
+
+
+def get_run_metrics(run_id):
+    """Return the collector for `run_id`, creating it on the run's first node"""
+    with _runs_lock:
+        metrics = _runs.get(run_id)
+        if metrics is None:
+            metrics = _runs[run_id] = RunMetrics(run_id)
+            # Runs that fail midway never reach their final node; forget the oldest
+            while len(_runs) > MAX_TRACKED_RUNS:
+                _runs.popitem(last=False)
+        return metrics
+
+
+def finish_run(run_id):
+    with _runs_lock:
+        metrics = _runs.pop(run_id, None)
+    release_run(run_id)
+    return metrics
+
+
+_release_hooks = []
+
+
+def on_run_release(hook):
+    """Register `hook(run_id)`, called when a node of a run fails or the run finishes
+
+    Modules keeping per-run state in memory (e.g. prefetched TTS audio) use it
+    to drop that state, so runs that fail midway do not leak it.
+    """
+    _release_hooks.append(hook)
+
+
+def release_run(run_id):
+    for hook in _release_hooks:
+        try:
+            hook(run_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not release state of run {run_id}: {e}")
+
+
+@contextmanager
+def track_api_call(model, contents):
+    """Time a model call; pass each response to `call.add_response`"""
+    call = ApiCall(model, payload_bytes(contents))
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.failed = True
+        raise
+    finally:
+        call.seconds = time.perf_counter() - start
+        for collector in _collectors():
+            collector.record_call(call)
+        logger.debug(f"{model}: {call.seconds:.2f}s, {call.request_bytes} B sent, {call.response_bytes} B received, tokens {call.tokens}")
+
+
+def record_retry(model):
+    for collector in _collectors():
+        collector.record_retry(model)
+
+
+def record_cache(cache, hit):
+    for collector in _collectors():
+        collector.record_cache(cache, hit)
+
+
+def record_audio(seconds):
+    for collector in _collectors():
+        collector.record_audio(seconds)
+
+
+def record_frames(frames):
+    for collector in _collectors():
+        collector.record_frames(frames)
+
+
+def bind_context(fn):
+    """Wrap fn so it runs in a copy of the current context (for executor threads)"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+# ========= Graph nodes =========
+
+def instrument_node(name, node, final=False):
+    """Wrap a graph node so everything it records is attributed to its run
+
+    The run id is fixed before the first node runs so every node sees the same
+    one. The `final` node also publishes the run summary and returns it as
+    `metrics`; `final` may be a predicate on the node's input state for a node
+    that ends only some runs.
+    """
+    def is_final(state):
+        return final(state) if callable(final) else final
+
+    def enter(state, config):
+        if not state.get("run_id"):
+            state = {**state, "run_id": resolve_run_id(state, config)}
+        metrics = get_run_metrics(state["run_id"])
+        return state, metrics, _current.set(metrics)
+
+    def leave(metrics, start, failed, token):
+        seconds = time.perf_counter() - start
+        _current.reset(token)
+        for collector in (PROCESS_METRICS, metrics):
+            collector.record_node(name, seconds, failed)
+        if failed:
+            release_run(metrics.run_id)
+        logger.info(f"⏱️ {name} finished in {seconds:.2f}s" + (" (failed)" if failed else ""))
+
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def wrapper(state, config):
+            state, metrics, token = enter(state, config)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await node(state, config)
+                failed = False
+            finally:
+                leave(metrics, start, failed, token)
+            if is_final(state):
+                result = {**result, "metrics": await asyncio.to_thread(publish_run, state, config, metrics)}
+            return result
+    else:
+        @functools.wraps(node)
+        def wrapper(state, config):
+            state, metrics, token = enter(state, config)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = node(state, config)
+                failed = False
+            finally:
+                leave(metrics, start, failed, token)
+            if is_final(state):
+                result = {**result, "metrics": publish_run(state, config, metrics)}
+            return result
+    return wrapper
+
+
+def publish_run(state, config, metrics):
+    """Write the run summary to the workspace and refresh the Prometheus file"""
+    configuration = Configuration.from_runnable_config(config)
+    finish_run(metrics.run_id)
+    PROCESS_METRICS.record_run()
+    summary = metrics.summary()
+
+    workspace = get_workspace(state, configuration)
+    atomic_write_bytes(workspace.metrics_path, json.dumps(summary, indent=2).encode("utf-8"))
+    if configuration.metrics_prometheus_path:
+        atomic_write_bytes(configuration.metrics_prometheus_path, prometheus_text().encode("utf-8"))
+
+    logger.info(
+        f"📊 Run {metrics.run_id}: {summary['wall_seconds']:.1f}s, {summary['api_calls']} API calls, "
+        f"{summary['tokens']['total']} tokens, {summary['audio_seconds']:.1f}s audio, {summary['video_frames']} frames"
+    )
+    return summary
+
+
+# ========= Prometheus export =========
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text(metrics=None):
+    """Render counters in the Prometheus text exposition format (process totals by default)"""
+    summary = (metrics or PROCESS_METRICS).summary()
+    lines = []
+
+    def metric(name, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+    metric("researcher_runs_total", "Completed graph runs", [("", PROCESS_METRICS.runs if metrics is None else 1)])
+    nodes = summary["nodes"].items()
+    metric("researcher_node_calls_total", "Graph node executions", [(_labels(node=n), c["calls"]) for n, c in nodes])
+    metric("researcher_node_errors_total", "Graph node executions that raised", [(_labels(node=n), c["errors"]) for n, c in nodes])
+    metric("researcher_node_seconds_total", "Wall time spent in graph nodes", [(_labels(node=n), c["seconds"]) for n, c in nodes])
+    models = summary["models"].items()
+    metric("researcher_api_calls_total", "Gemini calls", [(_labels(model=m), c["calls"]) for m, c in models])
+    metric("researcher_api_errors_total", "Gemini calls that raised", [(_labels(model=m), c["errors"]) for m, c in models])
+    metric("researcher_api_retries_total", "Gemini calls retried after a transient failure", [(_labels(model=m), c["retries"]) for m, c in models])
+    metric("researcher_api_seconds_total", "Wall time spent waiting on Gemini", [(_labels(model=m), c["seconds"]) for m, c in models])
+    metric("researcher_api_request_bytes_total", "Request payload bytes", [(_labels(model=m), c["request_bytes"]) for m, c in models])
+    metric("researcher_api_response_bytes_total", "Response payload bytes", [(_labels(model=m), c["response_bytes"]) for m, c in models])
+    metric("researcher_api_tokens_total", "Tokens reported in usage_metadata", [
+        (_labels(model=m, kind=kind), c[f"{kind}_tokens"]) for m, c in models for kind in TOKEN_KINDS
+    ])
+    metric("researcher_cache_requests_total", "Cache lookups", [
+        (_labels(cache=name, result=result), c[counter])
+        for name, c in summary["caches"].items() for result, counter in (("hit", "hits"), ("miss", "misses"))
+    ])
+    metric("researcher_audio_seconds_total", "Seconds of speech synthesized", [("", summary["audio_seconds"])])
+    metric("researcher_video_frames_total", "Video frames encoded", [("", summary["video_frames"])])
+    return "\n".join(lines) + "\n"
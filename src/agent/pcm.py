@@ -0,0 +1,63 @@
+"""NumPy helpers for the raw PCM returned by the TTS model
+
+NumPy is imported inside the functions so importing this module stays cheap.
+"""
+
+SAMPLE_DTYPES = {1: "u1", 2: "<i2", 4: "<i4"}
+
+
+def pcm_format(configuration):
+    """(channels, sample width in bytes) of the TTS output"""
+    channels = configuration.tts_channel if configuration.tts_channel > 0 else 1
+    return channels, configuration.tts_sample_width
+
+
+def frame_bytes(configuration):
+    """Bytes per sample frame (one sample for every channel)"""
+    channels, width = pcm_format(configuration)
+    return channels * width
+
+
+def pcm_to_array(pcm, configuration):
+    """Decode PCM bytes into a float32 array of shape (frames, channels) in [-1, 1]"""
+    import numpy as np
+
+    channels, width = pcm_format(configuration)
+    frames = len(pcm) // (channels * width)
+    samples = np.frombuffer(pcm, dtype=SAMPLE_DTYPES[width], count=frames * channels).astype(np.float32)
+    if width == 1:
+        samples -= 128.0  # 8-bit PCM is unsigned
+    return (samples / float(2 ** (8 * width - 1))).reshape(frames, channels)
+
+
+def frame_levels(samples, hop):
+    """Level in dBFS of each block of `hop` frames (channels mixed down)"""
+    import numpy as np
+
+    blocks = len(samples) // hop
+    if blocks == 0:
+        return np.zeros(0, dtype=np.float32)
+    mono = samples[:blocks * hop].mean(axis=1).reshape(blocks, hop)
+    rms = np.sqrt(np.mean(mono * mono, axis=1))
+    return 20.0 * np.log10(rms + 1e-9)
+
+
+def silent_runs(levels, threshold_db):
+    """(starts, ends) block indices of each run of blocks quieter than `threshold_db`"""
+    import numpy as np
+
+    silent = np.concatenate(([False], levels < threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    return edges[::2], edges[1::2]
+
+
+def array_to_pcm(samples, configuration):
+    """Encode a float array in [-1, 1] back into PCM bytes"""
+    import numpy as np
+
+    _, width = pcm_format(configuration)
+    scale = float(2 ** (8 * width - 1))
+    ints = np.clip(np.round(samples * scale), -scale, scale - 1)
+    if width == 1:
+        ints += 128.0
+    return ints.astype(SAMPLE_DTYPES[width]).tobytes()
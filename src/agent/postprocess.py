@@ -0,0 +1,93 @@
+"""Post-processing of the synthesized segments before they become one track
+
+Works on the raw PCM in NumPy: each segment's leading and trailing silence is
+trimmed and its loudness normalized (the TTS voices come out at different
+levels), then the segments are laid out with a fixed pause between turns and an
+optional short fade or crossfade. Returns the new duration of every segment so
+the video still switches speakers on the turn.
+"""
+import math
+
+from agent.pcm import array_to_pcm, pcm_format, pcm_to_array
+from agent.render import get_render_profile, profile_fps
+
+PEAK_CEILING = 0.98         # never scale a segment's peak above this (about -0.2 dBFS)
+TRIM_MARGIN_SECONDS = 0.02 # audio kept around the first/last audible sample
+
+
+def trim_silence(samples, threshold_dbfs, margin):
+    """Drop leading and trailing samples quieter than `threshold_dbfs`, keeping `margin` frames"""
+    import numpy as np
+
+    audible = np.flatnonzero(np.abs(samples).max(axis=1) > 10 ** (threshold_dbfs / 20))
+    if len(audible) == 0:
+        return samples
+    return samples[max(0, audible[0] - margin):audible[-1] + 1 + margin]
+
+
+def normalize_loudness(samples, target_dbfs):
+    """Scale to the target RMS level, limited so the peak stays below PEAK_CEILING"""
+    import numpy as np
+
+    if len(samples) == 0:
+        return samples
+    rms = float(np.sqrt(np.mean(samples * samples)))
+    peak = float(np.abs(samples).max())
+    if rms <= 0 or peak <= 0:
+        return samples
+    gain = min(10 ** (target_dbfs / 20) / rms, PEAK_CEILING / peak)
+    return samples * np.float32(gain)
+
+
+def _fade(samples, length):
+    import numpy as np
+
+    length = min(length, len(samples) // 2)
+    if length > 0:
+        ramp = np.linspace(0.0, 1.0, length, dtype=np.float32)[:, None]
+        samples[:length] *= ramp
+        samples[-length:] *= ramp[::-1]
+    return samples
+
+
+def process_segments(segment_pcm, configuration):
+    """Trim, normalize and re-space segment PCM; return (track PCM, seconds per segment)
+
+    A segment's duration runs from its start to the start of the next one, so
+    it includes the pause after it and the durations add up to the track length.
+    Without a pause, consecutive segments overlap by the crossfade length. For
+    the chunked renderer each pause is stretched so turns start on a video frame.
+    """
+    import numpy as np
+
+    channels, _ = pcm_format(configuration)
+    rate = configuration.tts_rate
+    margin = int(TRIM_MARGIN_SECONDS * rate)
+    pause = max(0, int(configuration.audio_pause_seconds * rate))
+    fade = max(0, int(configuration.audio_crossfade_ms / 1000 * rate))
+
+    pieces = []
+    for pcm in segment_pcm:
+        samples = trim_silence(pcm_to_array(pcm, configuration), configuration.audio_trim_dbfs, margin)
+        samples = normalize_loudness(samples, configuration.audio_target_dbfs)
+        pieces.append(_fade(np.array(samples, dtype=np.float32), fade))
+
+    frame_rate = 0
+    if configuration.video_renderer == "chunked":
+        frame_rate = profile_fps(get_render_profile(configuration), configuration.static_frame_fps)
+    offsets = [0]
+    for current, following in zip(pieces, pieces[1:]):
+        overlap = 0 if pause else min(fade, len(current), len(following))
+        step = len(current) + pause - overlap
+        if frame_rate:
+            step = round(math.ceil(step * frame_rate / rate) * rate / frame_rate)
+        offsets.append(offsets[-1] + step)
+    total = offsets[-1] + len(pieces[-1]) if pieces else 0
+
+    track = np.zeros((total, channels), dtype=np.float32)
+    for offset, samples in zip(offsets, pieces):
+        track[offset:offset + len(samples)] += samples
+    np.clip(track, -1.0, 1.0, out=track)
+
+    durations = [(end - start) / rate for start, end in zip(offsets, offsets[1:] + [total])]
+    return array_to_pcm(track, configuration), durations
@@ -0,0 +1,82 @@
+"""Progress events for LangGraph's "custom" stream mode
+
+    async for mode, chunk in graph.astream(inputs, stream_mode=["values", "custom"]):
+        if mode == "custom" and chunk.get("type") == "progress":
+            print(chunk["stage"], chunk["done"], chunk["total"], chunk["eta_seconds"])
+
+The long phases of a run (TTS, image generation, video encoding) report
+progress through a `Progress` tracker. Every event is a dict with the run id,
+the stage ("tts", "speaker_images", "section_backgrounds", "encode"), the unit
+counted, `done` / `total`, the seconds elapsed in the stage and an ETA
+extrapolated from the rate so far, plus stage-specific fields such as
+`audio_seconds` or `frames`. A stage emits an event when it starts, so a client
+that stops receiving events for a while can treat the run as stalled.
+
+Outside a graph run (benchmarks, direct calls) the events are dropped.
+"""
+import threading
+import time
+
+from agent.metrics import current_run_metrics
+
+
+def _no_op_writer(event):
+    pass
+
+
+def get_progress_writer():
+    """The LangGraph stream writer of the running node, or a no-op outside a graph run"""
+    try:
+        from langgraph.config import get_stream_writer
+
+        return get_stream_writer()
+    except RuntimeError:
+        return _no_op_writer
+
+
+class Progress:
+    """Counts finished work items of one stage and emits a progress event per update
+
+    Create it in the node's context (the stream writer is looked up then); it
+    can be advanced from worker threads afterwards.
+    """
+
+    def __init__(self, stage, total, unit, **fields):
+        self.stage = stage
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.fields = {}
+        self.run_id = getattr(current_run_metrics(), "run_id", None)
+        self._writer = get_progress_writer()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.update(0, **fields)
+
+    def advance(self, count=1, **fields):
+        """Add `count` finished items; `fields` replace the previous values of stage-specific fields"""
+        with self._lock:
+            self._emit(self.done + count, fields)
+
+    def update(self, done, **fields):
+        """Set the number of finished items and emit an event"""
+        with self._lock:
+            self._emit(done, fields)
+
+    def _emit(self, done, fields):
+        # Called with the lock held, so events leave in order
+        self.done = done = min(done, self.total) if self.total else done
+        self.fields.update(fields)
+        elapsed = time.perf_counter() - self._start
+        eta = elapsed / done * (self.total - done) if done and self.total else None
+        self._writer({
+            "type": "progress",
+            "run_id": self.run_id,
+            "stage": self.stage,
+            "unit": self.unit,
+            "done": done,
+            "total": self.total,
+            "elapsed_seconds": round(elapsed, 2),
+            "eta_seconds": round(eta, 2) if eta is not None else None,
+            **self.fields,
+        })
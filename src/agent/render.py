@@ -0,0 +1,263 @@
+"""Static-frame video renderer
+
+Every segment of the podcast is a still picture (section background plus speaker
+portrait), so instead of recompositing each frame in MoviePy we composite one
+frame per segment with PIL and let ffmpeg hold it for the segment's duration.
+
+Render profiles (`render_profile`) trade quality for speed: "draft" and
+"preview" render smaller, at lower frame rates and with cheaper x264 settings
+for editorial review, "final" keeps the native image resolution.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent.image_cache import get_image_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANVAS_SIZE = (1280, 720)
+SPEAKER_SIZE = (200, 200)  # at the default canvas height; profiles scale it with the video
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Output resolution and encoder settings for one quality level"""
+    name: str
+    height: int | None  # max video height in pixels, width keeps the aspect ratio (None = native)
+    fps: int | None     # None = the renderer's own rate (static_frame_fps, or 24 for MoviePy)
+    preset: str         # x264 preset
+    crf: int            # x264 constant rate factor (lower = better quality, larger file)
+    audio_bitrate: str  # AAC bitrate
+
+
+RENDER_PROFILES = {
+    "draft": RenderProfile("draft", height=360, fps=2, preset="ultrafast", crf=32, audio_bitrate="64k"),
+    "preview": RenderProfile("preview", height=540, fps=None, preset="veryfast", crf=26, audio_bitrate="96k"),
+    "final": RenderProfile("final", height=None, fps=None, preset="veryfast", crf=20, audio_bitrate="192k"),
+}
+
+
+def get_render_profile(configuration):
+    """Return the RenderProfile named by `render_profile`"""
+    try:
+        return RENDER_PROFILES[configuration.render_profile]
+    except KeyError:
+        raise ValueError(f"Unknown render_profile {configuration.render_profile!r} - use one of {', '.join(RENDER_PROFILES)}")
+
+
+def profile_fps(profile, default):
+    """Frame rate for a renderer whose own rate is `default`"""
+    return profile.fps or default
+
+
+def fit_height(size, height):
+    """Scale (width, height) down to at most `height` pixels tall, keeping even dimensions"""
+    width, current = size
+    if not height or current <= height:
+        return tuple(size)
+    return (max(2, round(width * height / current / 2) * 2), height)
+
+
+def speaker_size(profile):
+    """Speaker portrait size for the profile, proportional to its video height"""
+    if not profile.height:
+        return SPEAKER_SIZE
+    scale = profile.height / DEFAULT_CANVAS_SIZE[1]
+    return (round(SPEAKER_SIZE[0] * scale), round(SPEAKER_SIZE[1] * scale))
+
+
+def downscale_image(path, height, out_dir):
+    """Write a copy of the image at most `height` pixels tall into `out_dir` and return its path
+
+    Returns `path` itself when it is already small enough. The copy is reused
+    while it is newer than the source.
+    """
+    from PIL import Image
+
+    if not path:
+        return path
+    with Image.open(path) as image:
+        size = fit_height(image.size, height)
+        if size == image.size:
+            return path
+        scaled_path = Path(out_dir) / f"{Path(path).stem}-{size[1]}p.png"
+        if scaled_path.exists() and scaled_path.stat().st_mtime >= os.stat(path).st_mtime:
+            return str(scaled_path)
+        scaled_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = scaled_path.with_name(f".{scaled_path.name}.{os.getpid()}.tmp")
+        image.resize(size, Image.LANCZOS).save(tmp_path, format="PNG")
+    os.replace(tmp_path, scaled_path)
+    return str(scaled_path)
+
+
+def run_ffmpeg(command, on_frames=None):
+    """Run an ffmpeg command; return (returncode, stderr)
+
+    With `on_frames`, ffmpeg reports its progress on stdout and `on_frames` is
+    called with the number of frames encoded so far (about twice a second).
+    """
+    if on_frames is None:
+        result = subprocess.run(command, capture_output=True, text=True)
+        return result.returncode, result.stderr
+    command = [command[0], "-progress", "pipe:1", "-nostats", *command[1:]]
+    # stderr stays small at -loglevel error, so it is read once stdout is done
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
+        for line in process.stdout:
+            key, _, value = line.strip().partition("=")
+            if key == "frame" and value.isdigit():
+                on_frames(int(value))
+        stderr = process.stderr.read()
+    return process.returncode, stderr
+
+
+def encoder_args(profile):
+    """x264 rate control and speed settings of a profile"""
+    return ["-preset", profile.preset, "-crf", str(profile.crf)]
+
+
+def get_ffmpeg_exe():
+    """Return the ffmpeg binary bundled with imageio-ffmpeg, or the one on PATH"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg not found - install imageio-ffmpeg or add ffmpeg to PATH")
+        return ffmpeg
+
+
+def get_canvas_size(segments):
+    """Use the first background's size as the video size, like CompositeVideoClip does"""
+    from PIL import Image
+
+    for segment in segments:
+        if segment.get('background'):
+            with Image.open(segment['background']) as background:
+                return background.size
+    return DEFAULT_CANVAS_SIZE
+
+
+def compose_segment_frame(background_path, speaker_path, canvas_size, image_cache=None, portrait_size=SPEAKER_SIZE):
+    """Composite a segment's background and speaker portrait into a single RGB frame
+
+    The decoded, resized images come from `image_cache` (the process default if
+    not given), so each file is decoded once per process rather than per segment.
+    """
+    from PIL import Image
+
+    if image_cache is None:
+        image_cache = get_image_cache()
+    canvas_size = tuple(canvas_size)
+    frame = Image.new("RGB", canvas_size)
+    if background_path:
+        frame.paste(Image.fromarray(image_cache.get(background_path, canvas_size, "RGB")), (0, 0))
+
+    if speaker_path:
+        portrait_size = tuple(portrait_size)
+        speaker = Image.fromarray(image_cache.get(speaker_path, portrait_size, "RGBA"))
+        # Horizontally centered at the top of the screen
+        position = ((canvas_size[0] - portrait_size[0]) // 2, 0)
+        frame.paste(speaker, position, speaker)
+    return frame
+
+
+def render_static_video(segments, speaker_images, output_path, audio_file=None, fps=4, image_cache=None, profile=None, on_frames=None):
+    """Render the podcast video by encoding one still frame per segment
+
+    Identical frames (same background and speaker) are only composited once. The
+    frames are fed to ffmpeg through the concat demuxer with per-segment durations,
+    encoded with x264's still-image tuning at a low frame rate, and the audio track
+    is muxed in the same pass. `profile` caps the resolution and sets the encoder
+    options (default: "final"); `on_frames` receives the frames encoded so far.
+    """
+    if not segments:
+        raise ValueError("❌ No segments provided - cannot generate video")
+
+    profile = profile or RENDER_PROFILES["final"]
+    canvas_size = fit_height(get_canvas_size(segments), profile.height)
+    portrait_size = speaker_size(profile)
+    has_audio = bool(audio_file and os.path.exists(audio_file))
+    logger.info(f"Rendering {len(segments)} segments as still frames at {canvas_size[0]}x{canvas_size[1]}...")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        frames = {}
+        concat_lines = []
+        for segment in segments:
+            background_path = segment.get('background')
+            speaker_path = speaker_images.get(segment['speaker'])
+            frame_key = (background_path, speaker_path)
+            if frame_key not in frames:
+                frame_path = os.path.join(work_dir, f"frame_{len(frames):03d}.png")
+                compose_segment_frame(background_path, speaker_path, canvas_size, image_cache, portrait_size).save(frame_path)
+                frames[frame_key] = frame_path
+            concat_lines.append(f"file '{frames[frame_key]}'")
+            concat_lines.append(f"duration {segment['duration']:.6f}")
+        # The concat demuxer ignores the last entry's duration unless the file is repeated
+        concat_lines.append(concat_lines[-2])
+
+        concat_file = os.path.join(work_dir, "frames.txt")
+        with open(concat_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(concat_lines) + "\n")
+
+        command = [get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", concat_file]
+        if has_audio:
+            command += ["-i", audio_file, "-map", "0:v", "-map", "1:a"]
+        command += [
+            "-c:v", "libx264", "-tune", "stillimage", *encoder_args(profile),
+            "-r", str(fps), "-pix_fmt", "yuv420p",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",  # x264 needs even dimensions
+        ]
+        if has_audio:
+            command += ["-c:a", "aac", "-b:a", profile.audio_bitrate, "-shortest"]
+        else:
+            logger.warning("⚠️ No audio file provided or file doesn't exist - generating silent video")
+        command.append(str(output_path))
+
+        logger.info(f"Encoding {len(frames)} unique frames to {output_path}...")
+        returncode, stderr = run_ffmpeg(command, on_frames)
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed ({returncode}): {stderr.strip()}")
+
+    logger.info("Video generation completed!")
+    return output_path
+
+
+def encode_chunk(frame_path, frames, fps, output_path, threads=0, profile=None):
+    """Encode a still frame held for `frames` frames into an H.264 chunk
+
+    Every chunk of a render uses the same codec parameters (those of `profile`)
+    so chunks can be concatenated without re-encoding; `threads` (0 = x264's
+    default) does not change that.
+    """
+    profile = profile or RENDER_PROFILES["final"]
+    command = [
+        get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-loop", "1", "-framerate", str(fps), "-i", str(frame_path),
+        "-frames:v", str(frames),
+        "-c:v", "libx264", "-tune", "stillimage", *encoder_args(profile),
+        "-r", str(fps), "-pix_fmt", "yuv420p",
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",  # x264 needs even dimensions
+        "-threads", str(threads), "-an", "-f", "mp4", str(output_path),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed encoding chunk ({result.returncode}): {result.stderr.strip()}")
+    return output_path
+
+
+def compose_and_encode_chunk(background_path, speaker_path, canvas_size, frames, fps, frame_path, output_path, threads=0, image_cache_settings=None, profile=None):
+    """Composite a segment's frame and encode its chunk (runs in render worker processes)
+
+    `image_cache_settings` selects the worker's image cache (see
+    agent.image_cache.image_cache_settings); workers keep it between chunks and runs.
+    """
+    profile = profile or RENDER_PROFILES["final"]
+    image_cache = get_image_cache(*image_cache_settings) if image_cache_settings else None
+    compose_segment_frame(background_path, speaker_path, canvas_size, image_cache, speaker_size(profile)).save(frame_path)
+    return encode_chunk(frame_path, frames, fps, output_path, threads, profile)
@@ -0,0 +1,144 @@
+"""SQLite-backed cache for Gemini text responses"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "podcast" / "cache" / "responses.sqlite"
+
+
+def _to_jsonable(value):
+    """Convert request arguments (strings, dicts, google-genai models) to plain JSON"""
+    if isinstance(value, type) and hasattr(value, "model_json_schema"):
+        return value.model_json_schema()  # a pydantic response_schema
+    if hasattr(value, "model_dump"):
+        return _to_jsonable(value.model_dump(mode="json", exclude_none=True))
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class ResponseCache:
+    """Cache GenerateContentResponses keyed on (model, contents, config).
+
+    Entries expire after `ttl_seconds`; once the stored responses exceed
+    `max_bytes` the least recently used ones are deleted. Each call opens its own
+    connection, so the cache can be shared by threads and worker processes.
+    """
+
+    def __init__(self, path=None, ttl_seconds=7 * 24 * 3600, max_bytes=256 * 1024 * 1024):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, namespace TEXT, response TEXT, size INTEGER, "
+                "created REAL, accessed REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Connection whose transaction commits (or rolls back on error) and which is closed on exit"""
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    @staticmethod
+    def make_key(model, contents, config=None):
+        """Hash the model, contents and generation config of a request"""
+        payload = json.dumps(_to_jsonable([model, contents, config]), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, namespace, counter):
+        with self._lock:
+            self._counters[namespace][counter] += 1
+
+    def get(self, key, namespace="default"):
+        """Return the cached response for `key`, or None if missing or expired"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row:
+                conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        if row is None:
+            self._count(namespace, "misses")
+            return None
+        self._count(namespace, "hits")
+        from google.genai import types
+
+        return types.GenerateContentResponse.model_validate_json(row[0])
+
+    def put(self, key, response, namespace="default"):
+        """Store a response and evict expired / least recently used entries"""
+        payload = response.model_dump_json(exclude_none=True)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, payload, len(payload), now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= size
+
+    def stats(self):
+        """Return per-namespace hit/miss counters for this process"""
+        with self._lock:
+            return {namespace: dict(counters) for namespace, counters in self._counters.items()}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(configuration, node):
+    """Return the shared ResponseCache if caching is enabled for `node`, else None"""
+    enabled = [name.strip() for name in configuration.response_cache_nodes.split(",") if name.strip()]
+    if node is None or not ("all" in enabled or node in enabled):
+        return None
+    path = configuration.response_cache_path or DEFAULT_CACHE_PATH
+    with _caches_lock:
+        cache = _caches.get(str(path))
+        if cache is None:
+            cache = ResponseCache(
+                path,
+                ttl_seconds=configuration.response_cache_ttl_hours * 3600,
+                max_bytes=configuration.response_cache_max_mb * 1024 * 1024,
+            )
+            _caches[str(path)] = cache
+        return cache
+
+
+def response_cache_stats():
+    """Merge hit/miss counters from every response cache opened in this process"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    merged = {}
+    for cache in caches:
+        for namespace, counters in cache.stats().items():
+            totals = merged.setdefault(namespace, {"hits": 0, "misses": 0})
+            totals["hits"] += counters["hits"]
+            totals["misses"] += counters["misses"]
+    return merged
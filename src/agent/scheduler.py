@@ -0,0 +1,264 @@
+"""Rate limiting and retries for Gemini calls
+
+Every model call made through agent.utils goes through `call_with_retries` /
+`acall_with_retries`:
+
+- a per-model token bucket (`rate_limits` in Configuration, requests per
+  minute) shared by every run in the process, in which waiting "interactive"
+  calls are served before "batch" ones;
+- retries for 429s, 5xx errors, timeouts and connection errors, with
+  exponential backoff and full jitter, honouring the server's Retry-After;
+- a per-call timeout passed to the SDK through `http_options`.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import random
+import re
+import threading
+import time
+
+from agent.metrics import record_retry
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def parse_rate_limits(spec):
+    """Parse "model=RPM[:BURST],...,*=RPM" into {model: (requests_per_minute, burst)}"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        model, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid rate limit {item!r}, expected model=requests_per_minute[:burst]")
+        rpm, _, burst = value.partition(":")
+        try:
+            rpm = float(rpm)
+            burst = int(burst) if burst else max(1, round(rpm / 60))
+        except (ValueError, OverflowError):
+            raise ValueError(f"Invalid rate limit {item!r}, expected model=requests_per_minute[:burst]") from None
+        if not (math.isfinite(rpm) and rpm > 0) or burst < 1:
+            raise ValueError(f"Invalid rate limit {item!r}: requests per minute must be > 0 and burst >= 1")
+        limits[model.strip()] = (rpm, burst)
+    return limits
+
+
+class TokenBucket:
+    """Token bucket where waiting callers are served by (priority, arrival order)
+
+    Waiters sleep until a token is due for the first in line, or until the
+    first in line changes (a token was taken or a waiter gave up): threads on
+    a Condition, coroutines on an asyncio.Event set from whichever thread made
+    the change.
+    """
+
+    def __init__(self, requests_per_minute, burst=1):
+        if not requests_per_minute > 0:
+            raise ValueError(f"requests_per_minute must be > 0, got {requests_per_minute}")
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._waiting = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._async_waiters = {}  # ticket -> (loop, asyncio.Event)
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self, ticket):
+        """Take a token if `ticket` is first in line (lock held)
+
+        Returns 0 once taken, else the seconds until the next token is due for
+        the first in line, or None for the others (they wait to be notified).
+        """
+        self._refill(time.monotonic())
+        if self._waiting[0] != ticket:
+            return None
+        if self.tokens >= 1:
+            heapq.heappop(self._waiting)
+            self.tokens -= 1
+            self._notify()
+            return 0
+        return max((1 - self.tokens) / self.rate, 1e-3)
+
+    def _notify(self):
+        # The first in line changed (lock held): wake it, wherever it waits
+        self._changed.notify_all()
+        if self._waiting and self._waiting[0] in self._async_waiters:
+            loop, event = self._async_waiters[self._waiting[0]]
+            loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, priority):
+        # Lock held
+        ticket = (PRIORITIES.get(priority, 0), next(self._order))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _withdraw(self, ticket):
+        # Lock held
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._notify()
+
+    def acquire(self, priority="interactive"):
+        """Block until a token is available; returns the seconds waited"""
+        start = time.monotonic()
+        with self._changed:
+            ticket = self._enqueue(priority)
+            try:
+                while (delay := self._take(ticket)) != 0:
+                    self._changed.wait(delay)
+            except BaseException:
+                self._withdraw(ticket)
+                raise
+        return time.monotonic() - start
+
+    async def aacquire(self, priority="interactive"):
+        """Async variant of acquire"""
+        start = time.monotonic()
+        event = asyncio.Event()
+        with self._lock:
+            ticket = self._enqueue(priority)
+            self._async_waiters[ticket] = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                # Cleared before checking, so a change made after the check is not missed
+                event.clear()
+                with self._lock:
+                    delay = self._take(ticket)
+                if delay == 0:
+                    break
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                self._withdraw(ticket)
+            raise
+        finally:
+            with self._lock:
+                self._async_waiters.pop(ticket, None)
+        return time.monotonic() - start
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(model, configuration):
+    """Return the process-wide bucket for `model`, or None if it is not rate limited"""
+    limits = parse_rate_limits(configuration.rate_limits)
+    limit = limits.get(model) or limits.get("*")
+    if limit is None:
+        return None
+    with _buckets_lock:
+        bucket = _buckets.get((model, limit))
+        if bucket is None:
+            bucket = _buckets[(model, limit)] = TokenBucket(*limit)
+        return bucket
+
+
+def with_timeout(config, configuration):
+    """Add the configured per-call timeout to a generate_content config"""
+    if not configuration.request_timeout:
+        return config
+    http_options = {"timeout": int(configuration.request_timeout * 1000)}  # milliseconds
+    if config is None:
+        return {"http_options": http_options}
+    if isinstance(config, dict):
+        return config if config.get("http_options") else {**config, "http_options": http_options}
+    if getattr(config, "http_options", None):
+        return config
+    return config.model_copy(update={"http_options": http_options})
+
+
+def _retry_after(error):
+    """Server-requested delay from a Retry-After header or a google.rpc.RetryInfo detail"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    match = re.search(r"""['"]retryDelay['"]\s*:\s*['"]([\d.]+)s['"]""", str(getattr(error, "details", "")))
+    return float(match.group(1)) if match else None
+
+
+def is_retryable(error):
+    """Quota errors, server errors, timeouts and dropped connections are worth retrying"""
+    import httpx
+    from google.genai import errors
+
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+def retry_delay(error, attempt, configuration):
+    """Seconds to wait before retry number `attempt` (0-based), or None to give up"""
+    if attempt >= configuration.max_retries or not is_retryable(error):
+        return None
+    backoff = random.uniform(0, min(configuration.retry_max_delay, configuration.retry_base_delay * 2 ** attempt))
+    retry_after = _retry_after(error)
+    return max(backoff, retry_after) if retry_after is not None else backoff
+
+
+def log_retry(model, error, attempt, delay, configuration):
+    record_retry(model)
+    logger.warning(f"⚠️ {model} call failed ({str(error)[:200]}); retry {attempt + 1}/{configuration.max_retries} in {delay:.1f}s")
+
+
+def wait_for_rate_limit(model, configuration):
+    """Block until the model's token bucket admits one more call"""
+    bucket = get_bucket(model, configuration)
+    if bucket is not None:
+        bucket.acquire(configuration.priority)
+
+
+async def await_rate_limit(model, configuration):
+    """Async variant of wait_for_rate_limit"""
+    bucket = get_bucket(model, configuration)
+    if bucket is not None:
+        await bucket.aacquire(configuration.priority)
+
+
+def call_with_retries(model, call, configuration):
+    """Run call() under the model's rate limit, retrying transient failures"""
+    for attempt in itertools.count():
+        wait_for_rate_limit(model, configuration)
+        try:
+            return call()
+        except Exception as e:
+            delay = retry_delay(e, attempt, configuration)
+            if delay is None:
+                raise
+            log_retry(model, e, attempt, delay, configuration)
+            time.sleep(delay)
+
+
+async def acall_with_retries(model, call, configuration):
+    """Async variant of call_with_retries; `call` returns an awaitable"""
+    for attempt in itertools.count():
+        await await_rate_limit(model, configuration)
+        try:
+            return await call()
+        except Exception as e:
+            delay = retry_delay(e, attempt, configuration)
+            if delay is None:
+                raise
+            log_retry(model, e, attempt, delay, configuration)
+            await asyncio.sleep(delay)
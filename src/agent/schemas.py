@@ -0,0 +1,85 @@
+"""Typed models for structured Gemini output
+
+`TranscriptAnalysis` is sent as the `response_schema` of the segmentation call,
+so the model answers with JSON in this shape. The same model validates the
+answer: missing or null fields get defaults, `key_concepts` given as a string is
+split, and the older speaker mapping ({"Mike": {...}}) is still accepted.
+`to_state()` converts it back into the dict layout the rest of the graph uses.
+"""
+from typing import List
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+
+class SpeakerProfile(BaseModel):
+    """A podcast speaker, described well enough to generate a portrait"""
+    name: str
+    role: str = Field("podcast participant", description="role or expertise")
+    characteristics: str = Field("professional podcast speaker", description="physical and personality traits for image generation")
+
+    @field_validator("role", "characteristics", mode="before")
+    @classmethod
+    def _default_when_empty(cls, value, info):
+        return value or cls.model_fields[info.field_name].default
+
+
+class Section(BaseModel):
+    """A thematic section of the transcript"""
+    title: str = ""
+    start_text: str = Field("", description="first few words of the section")
+    end_text: str = Field("", description="last few words of the section")
+    theme: str = Field("", description="main theme or topic")
+    mood: str = Field("neutral", description="visual mood or atmosphere")
+    key_concepts: List[str] = Field(default_factory=list)
+    duration_estimate: float = Field(0.0, description="estimated seconds")
+
+    @field_validator("start_text", "end_text", "theme", "title", mode="before")
+    @classmethod
+    def _empty_string_when_null(cls, value):
+        return "" if value is None else value
+
+    @field_validator("mood", mode="before")
+    @classmethod
+    def _neutral_when_empty(cls, value):
+        return value or "neutral"
+
+    @field_validator("key_concepts", mode="before")
+    @classmethod
+    def _split_concepts(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [concept.strip() for concept in value.split(",") if concept.strip()]
+        return value
+
+    @field_validator("duration_estimate", mode="before")
+    @classmethod
+    def _zero_when_null(cls, value):
+        return 0.0 if value in (None, "") else value
+
+
+class TranscriptAnalysis(BaseModel):
+    """Speakers and thematic sections of a podcast transcript"""
+    speakers: List[SpeakerProfile]
+    sections: List[Section] = Field(min_length=1)
+
+    @field_validator("speakers", mode="before")
+    @classmethod
+    def _speakers_from_mapping(cls, value):
+        if isinstance(value, dict):
+            return [{"name": name, **(info or {})} for name, info in value.items()]
+        return value
+
+    @model_validator(mode="after")
+    def _fill_section_defaults(self):
+        for i, section in enumerate(self.sections):
+            section.title = section.title or f"Section {i + 1}"
+            section.theme = section.theme or section.title
+        return self
+
+    def to_state(self):
+        """The {"speakers": {name: {...}}, "sections": [...]} layout stored in graph state"""
+        return {
+            "speakers": {speaker.name: speaker.model_dump(exclude={"name"}) for speaker in self.speakers},
+            "sections": [section.model_dump() for section in self.sections],
+        }
@@ -1,17 +1,24 @@
-from typing_extensions import TypedDict
 from typing import Optional
 
+from typing_extensions import TypedDict
+
+
 class ResearchStateInput(TypedDict):
     """State for the research and podcast generation workflow"""
     topic: str
     video_url: Optional[str]
     output_path: Optional[str]
+    run_id: Optional[str]
+    output_mode: Optional[str] # "video" (default), "audio" or "script"
 
 class ResearchStateOutput(TypedDict):
     """State for the research and podcast generation workflow"""
+    run_id: Optional[str]
     report: Optional[str]
     podcast_script: Optional[str]
     podcast_filename: Optional[str]
+    cache_stats: Optional[dict]
+    metrics: Optional[dict]
 
 class ResearchState(TypedDict):
     """State for the research and podcast generation workflow"""
@@ -19,6 +26,8 @@ class ResearchState(TypedDict):
     topic: str
     video_url: Optional[str]
     output_path: Optional[str]
+    run_id: Optional[str]
+    output_mode: Optional[str]
     speakers: Optional[dict]
     sections: Optional[list]
     speaker_images: Optional[dict]
@@ -35,4 +44,6 @@ class ResearchState(TypedDict):
     synthesis_text: Optional[str]
     podcast_script: Optional[str]
     podcast_filename: Optional[str]
+    cache_stats: Optional[dict]
+    metrics: Optional[dict]
 
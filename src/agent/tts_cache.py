@@ -0,0 +1,164 @@
+"""Content-addressed on-disk cache for synthesized TTS segments"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / "podcast" / "cache" / "tts"
+
+
+class TTSCache:
+    """Store raw PCM segments keyed by a hash of their synthesis inputs.
+
+    Entries are written atomically (temp file + rename) so several worker processes
+    can share one cache directory. Reads refresh the entry's mtime, and when the
+    total size exceeds `max_bytes` the least recently used entries are evicted
+    under an exclusive lock file.
+
+    The directory is only scanned on the first write and when the running total
+    of this process's writes since the last scan passes `max_bytes`, so writes
+    by other processes sharing the directory are counted at the next scan.
+    """
+
+    suffix = ".pcm"
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size = None  # bytes in the directory as of the last scan plus our writes since
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(tts_model, voice_name, speaker, content, tts_rate):
+        """Hash the inputs that determine a segment's synthesized audio"""
+        payload = json.dumps([tts_model, voice_name, speaker, content, tts_rate], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    @staticmethod
+    def _size_of(path):
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def get(self, key):
+        """Return cached PCM bytes for `key`, or None on a miss"""
+        path = self._path(key)
+        try:
+            pcm = path.read_bytes()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return pcm
+
+    def put(self, key, pcm):
+        """Store PCM bytes for `key` and evict old entries if over budget"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            replaced = self._size_of(path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._written(len(pcm) - replaced)
+
+    def _written(self, size):
+        """Count a write of `size` bytes; evict once the running total passes `max_bytes`"""
+        with self._lock:
+            self.writes += 1
+            if self._size is not None:
+                self._size += size
+                if self._size <= self.max_bytes:
+                    return
+        self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in `max_bytes`
+
+        Scans the whole directory, so it also resets the running total.
+        """
+        with open(self.cache_dir / ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob(f"*/*{self.suffix}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    with self._lock:
+                        self.evictions += 1
+        with self._lock:
+            self._size = total
+
+    def stats(self):
+        """Return hit/miss counters for this process"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_cache(configuration):
+    """Return the shared TTSCache for this configuration, or None if caching is disabled"""
+    if not configuration.tts_cache_enabled:
+        return None
+    cache_dir = configuration.tts_cache_dir or DEFAULT_CACHE_DIR
+    max_bytes = configuration.tts_cache_max_mb * 1024 * 1024
+    with _caches_lock:
+        cache = _caches.get((str(cache_dir), max_bytes))
+        if cache is None:
+            cache = TTSCache(cache_dir, max_bytes)
+            _caches[(str(cache_dir), max_bytes)] = cache
+        return cache
+
+
+def tts_cache_instances():
+    """Return {cache_dir: TTSCache} for every TTS cache opened in this process"""
+    with _caches_lock:
+        return {str(cache.cache_dir): cache for cache in _caches.values()}
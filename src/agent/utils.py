@@ -1,63 +1,197 @@
-import os, io
+import asyncio
+import io
+import itertools
+import logging
+import os
+import re
+import threading
+import time
 import wave
-from google.genai import Client, types
-from rich.console import Console
-from rich.markdown import Markdown
+
 from dotenv import load_dotenv
-from PIL import Image
+
 from agent.configuration import Configuration
-import re
+from agent.limits import NETWORK, astage_slot, stage_slot
+from agent.metrics import record_cache, track_api_call
+from agent.response_cache import get_response_cache, response_cache_stats
+from agent.scheduler import (
+    acall_with_retries,
+    await_rate_limit,
+    call_with_retries,
+    log_retry,
+    retry_delay,
+    wait_for_rate_limit,
+    with_timeout,
+)
+from agent.tts_cache import tts_cache_instances
+from agent.workspace import atomic_write_bytes
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Initialize client
-client = Client(api_key=os.getenv("GEMINI_API_KEY"))
+# The google-genai client is created on first use, so importing the agent
+# needs neither the (slow to import) SDK nor an API key
+_client = None
+_client_lock = threading.Lock()
 config = Configuration()
 
+def get_client():
+    """Return the shared google-genai Client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.genai import Client
+                _client = Client(api_key=os.getenv("GEMINI_API_KEY"))
+    return _client
+
+def set_client(new_client):
+    """Replace the shared client, e.g. with an offline fake"""
+    global _client
+    _client = new_client
+
+def __getattr__(name):
+    # Keep `agent.utils.client` working without creating the client at import
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _configuration_or_default(configuration):
+    return configuration if configuration is not None else config
+
+def generate_content(model, contents, config=None, cache_node=None, configuration=None, cache_if=None):
+    """Call Gemini generate_content; every model call in the agent goes through here
+
+    Calls are rate limited and retried by agent.scheduler and recorded in
+    agent.metrics. Text calls pass the calling node as `cache_node`; if that node
+    is enabled in `configuration.response_cache_nodes` identical requests are
+    served from the response cache. With `cache_if`, only responses for which
+    `cache_if(response)` is true are stored, so answers the caller rejects are
+    not served again.
+    """
+    configuration = _configuration_or_default(configuration)
+    cache = get_response_cache(configuration, cache_node)
+    if cache is not None:
+        cache_key = cache.make_key(model, contents, config)
+        cached = cache.get(cache_key, cache_node)
+        record_cache("responses", cached is not None)
+        if cached is not None:
+            return cached
+
+    def call():
+        with stage_slot(NETWORK), track_api_call(model, contents) as tracked:
+            return tracked.add_response(get_client().models.generate_content(model=model, contents=contents, config=with_timeout(config, configuration)))
+
+    response = call_with_retries(model, call, configuration)
+    if cache is not None and response.candidates and (cache_if is None or cache_if(response)):
+        cache.put(cache_key, response, cache_node)
+    return response
+
+async def agenerate_content(model, contents, config=None, cache_node=None, configuration=None, cache_if=None):
+    """Async variant of generate_content using the google-genai async client"""
+    configuration = _configuration_or_default(configuration)
+    cache = get_response_cache(configuration, cache_node)
+    if cache is not None:
+        cache_key = cache.make_key(model, contents, config)
+        cached = await asyncio.to_thread(cache.get, cache_key, cache_node)
+        record_cache("responses", cached is not None)
+        if cached is not None:
+            return cached
+
+    async def call():
+        async with astage_slot(NETWORK):
+            with track_api_call(model, contents) as tracked:
+                return tracked.add_response(await get_client().aio.models.generate_content(model=model, contents=contents, config=with_timeout(config, configuration)))
+
+    response = await acall_with_retries(model, call, configuration)
+    if cache is not None and response.candidates and (cache_if is None or cache_if(response)):
+        await asyncio.to_thread(cache.put, cache_key, response, cache_node)
+    return response
+
+def cache_response(model, contents, config=None, response=None, cache_node=None, configuration=None):
+    """Store `response` as the cached answer to a request, e.g. a repaired answer under the original request"""
+    configuration = _configuration_or_default(configuration)
+    cache = get_response_cache(configuration, cache_node)
+    if cache is not None and response is not None and response.candidates:
+        cache.put(cache.make_key(model, contents, config), response, cache_node)
+
+def collect_cache_stats():
+    """Hit/miss counters for the response and TTS caches in this process"""
+    return {
+        "responses": response_cache_stats(),
+        "tts": {path: cache.stats() for path, cache in tts_cache_instances().items()},
+    }
+
+def generate_content_stream(model, contents, config=None, configuration=None):
+    """Streaming variant of generate_content; yields partial responses
+
+    Failures before the first chunk are retried like generate_content. Once
+    chunks have been handed out an error is raised to the caller instead.
+    """
+    configuration = _configuration_or_default(configuration)
+    for attempt in itertools.count():
+        wait_for_rate_limit(model, configuration)
+        started = False
+        try:
+            with stage_slot(NETWORK), track_api_call(model, contents) as tracked:
+                for chunk in get_client().models.generate_content_stream(model=model, contents=contents, config=with_timeout(config, configuration)):
+                    started = True
+                    yield tracked.add_response(chunk)
+            return
+        except Exception as e:
+            delay = None if started else retry_delay(e, attempt, configuration)
+            if delay is None:
+                raise
+            log_retry(model, e, attempt, delay, configuration)
+        time.sleep(delay)
+
+async def agenerate_content_stream(model, contents, config=None, configuration=None):
+    """Async streaming variant of generate_content; yields partial responses"""
+    configuration = _configuration_or_default(configuration)
+    for attempt in itertools.count():
+        await await_rate_limit(model, configuration)
+        started = False
+        try:
+            async with astage_slot(NETWORK):
+                with track_api_call(model, contents) as tracked:
+                    async for chunk in await get_client().aio.models.generate_content_stream(model=model, contents=contents, config=with_timeout(config, configuration)):
+                        started = True
+                        yield tracked.add_response(chunk)
+            return
+        except Exception as e:
+            delay = None if started else retry_delay(e, attempt, configuration)
+            if delay is None:
+                raise
+            log_retry(model, e, attempt, delay, configuration)
+        await asyncio.sleep(delay)
+
 def display_gemini_response(response):
-    """Extract text from Gemini response and display as markdown with references"""
-    console = Console()
-    
-    # Extract main content
-    text = response.candidates[0].content.parts[0].text
-    md = Markdown(text)
-    console.print(md)
-    
-    # Get candidate for grounding metadata
+    """Extract the text and numbered source list from a Gemini response, logging both at debug level"""
     candidate = response.candidates[0]
-    
-    # Build sources text block
+    text = candidate.content.parts[0].text
+    logger.debug(f"Gemini response:\n{text}")
+
+    # Build sources text block from the grounding metadata, if any
     sources_text = ""
-    
-    # Display grounding metadata if available
-    if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
-        console.print("\n" + "="*50)
-        console.print("[bold blue]References & Sources[/bold blue]")
-        console.print("="*50)
-        
-        # Display and collect source URLs
-        if candidate.grounding_metadata.grounding_chunks:
-            console.print(f"\n[bold]Sources ({len(candidate.grounding_metadata.grounding_chunks)}):[/bold]")
+    metadata = getattr(candidate, 'grounding_metadata', None)
+    if metadata:
+        if metadata.grounding_chunks:
             sources_list = []
-            for i, chunk in enumerate(candidate.grounding_metadata.grounding_chunks, 1):
+            for i, chunk in enumerate(metadata.grounding_chunks, 1):
                 if hasattr(chunk, 'web') and chunk.web:
                     title = getattr(chunk.web, 'title', 'No title') or "No title"
                     uri = getattr(chunk.web, 'uri', 'No URI') or "No URI"
-                    console.print(f"{i}. {title}")
-                    console.print(f"   [dim]{uri}[/dim]")
                     sources_list.append(f"{i}. {title}\n   {uri}")
-            
             sources_text = "\n".join(sources_list)
-        
-        # Display grounding supports (which text is backed by which sources)
-        if candidate.grounding_metadata.grounding_supports:
-            console.print(f"\n[bold]Text segments with source backing:[/bold]")
-            for support in candidate.grounding_metadata.grounding_supports[:5]:  # Show first 5
-                if hasattr(support, 'segment') and support.segment:
-                    snippet = support.segment.text[:100] + "..." if len(support.segment.text) > 100 else support.segment.text
-                    source_nums = [str(i+1) for i in support.grounding_chunk_indices]
-                    console.print(f"• \"{snippet}\" [dim](sources: {', '.join(source_nums)})[/dim]")
-    
+            logger.debug(f"Sources ({len(metadata.grounding_chunks)}):\n{sources_text}")
+
+        # Which text is backed by which sources
+        for support in (metadata.grounding_supports or [])[:5]:  # first 5
+            if hasattr(support, 'segment') and support.segment:
+                snippet = support.segment.text[:100] + "..." if len(support.segment.text) > 100 else support.segment.text
+                source_nums = [str(i+1) for i in support.grounding_chunk_indices]
+                logger.debug(f"• \"{snippet}\" (sources: {', '.join(source_nums)})")
+
     return text, sources_text
 
 
@@ -95,12 +229,14 @@ def create_research_report(topic, search_text, video_text, search_sources_text,
     Focus on creating a coherent narrative that brings together the best insights from both sources.
     """
     
-    synthesis_response = client.models.generate_content(
+    synthesis_response = generate_content(
         model=configuration.synthesis_model,
         contents=synthesis_prompt,
         config={
             "temperature": configuration.synthesis_temperature,
-        }
+        },
+        cache_node="create_research_report",
+        configuration=configuration,
     )
     
     synthesis_text = synthesis_response.candidates[0].content.parts[0].text
@@ -161,10 +297,11 @@ def create_podcast_discussion(topic, search_text, video_text, search_sources_tex
     [continue...]
     """
     
-    script_response = client.models.generate_content(
+    script_response = generate_content(
         model=configuration.synthesis_model,
         contents=script_prompt,
-        config={"temperature": configuration.podcast_temperature}
+        config={"temperature": configuration.podcast_temperature},
+        configuration=configuration,
     )
     
     podcast_script = script_response.candidates[0].content.parts[0].text
@@ -219,6 +356,34 @@ def create_podcast_discussion(topic, search_text, video_text, search_sources_tex
 
 
 
+# Expected speakers for validation
+EXPECTED_SPEAKERS = ["Mike", "Dr. Lisa"]
+
+def parse_dialogue_line(line):
+    """Parse one `Speaker: content` transcript line into (speaker, content)
+
+    Speaker names are normalized to EXPECTED_SPEAKERS; returns None for lines
+    that are not dialogue or whose speaker is not recognized.
+    """
+    # Look for speaker dialogue patterns (Speaker: content)
+    speaker_match = re.match(r'^([^:]+):\s*(.+)$', line.strip())
+    if not speaker_match:
+        return None
+    speaker_name = speaker_match.group(1).strip()
+    content = speaker_match.group(2).strip()
+
+    # Validate and normalize speaker names
+    if speaker_name not in EXPECTED_SPEAKERS:
+        # Skip invalid speakers or map them if close enough
+        if "mike" in speaker_name.lower():
+            speaker_name = "Mike"
+        elif "lisa" in speaker_name.lower() or "dr" in speaker_name.lower():
+            speaker_name = "Dr. Lisa"
+        else:
+            logger.warning(f"⚠️ Skipping unrecognized speaker: {speaker_name}")
+            return None
+    return speaker_name, content
+
 def parse_transcript_with_sections(transcript_text, sections):
     """Parse a podcast dialogue transcript into segments aligned with provided sections"""
     segments = []
@@ -226,9 +391,6 @@ def parse_transcript_with_sections(transcript_text, sections):
     # Split transcript into lines and clean up
     lines = [line.strip() for line in transcript_text.split('\n') if line.strip()]
     
-    # Expected speakers for validation
-    EXPECTED_SPEAKERS = ["Mike", "Dr. Lisa"]
-    
     # Track current section (distribute segments evenly across sections)
     total_dialogue_lines = sum(1 for line in lines if ':' in line and any(speaker in line for speaker in EXPECTED_SPEAKERS))
     segments_per_section = max(1, total_dialogue_lines // len(sections)) if sections else total_dialogue_lines
@@ -236,22 +398,9 @@ def parse_transcript_with_sections(transcript_text, sections):
     current_section_idx = 0
     
     for line in lines:
-        # Look for speaker dialogue patterns (Speaker: content)
-        speaker_match = re.match(r'^([^:]+):\s*(.+)$', line)
-        if speaker_match:
-            speaker_name = speaker_match.group(1).strip()
-            content = speaker_match.group(2).strip()
-            
-            # Validate and normalize speaker names
-            if speaker_name not in EXPECTED_SPEAKERS:
-                # Skip invalid speakers or map them if close enough
-                if "mike" in speaker_name.lower():
-                    speaker_name = "Mike"
-                elif "lisa" in speaker_name.lower() or "dr" in speaker_name.lower():
-                    speaker_name = "Dr. Lisa"
-                else:
-                    print(f"⚠️ Skipping unrecognized speaker: {speaker_name}")
-                    continue
+        parsed = parse_dialogue_line(line)
+        if parsed:
+            speaker_name, content = parsed
             
             # Advance to next section periodically to distribute segments
             if sections and current_segment_count >= segments_per_section and current_section_idx < len(sections) - 1:
@@ -268,40 +417,82 @@ def parse_transcript_with_sections(transcript_text, sections):
             segments.append(segment)
             current_segment_count += 1
     
-    print(f"✅ Parsed {len(segments)} segments from transcript across {len(set(seg['section_idx'] for seg in segments))} sections")
+    logger.info(f"✅ Parsed {len(segments)} segments from transcript across {len(set(seg['section_idx'] for seg in segments))} sections")
     return segments
 
 
 
-def generate_image_with_prompt(prompt, save_path):
+def _save_image_from_response(response, save_path):
+    """Save the first image in a Gemini response to save_path"""
+    from PIL import Image
+
+    for part in response.candidates[0].content.parts:
+        if part.text is not None:
+            logger.debug(part.text)
+        elif part.inline_data is not None:
+            image = Image.open(io.BytesIO((part.inline_data.data)))
+            # Write via a temp file so a half-written image is never picked up as "existing"
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            atomic_write_bytes(save_path, buffer.getvalue())
+            return save_path
+
+    # If we reach here, no image was generated
+    logger.error("❌ AI image generation failed: No image produced")
+    return None
+
+def _image_config():
+    from google.genai import types
+
+    return types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+
+def generate_image_with_prompt(prompt, save_path, configuration=None):
     """Generate image using Gemini API"""
+    if configuration is None:
+        configuration = config
+
     # Skip generation if save_path already exists
     if os.path.exists(save_path):
-        print(f"⏭️ Skipping generation: {os.path.basename(save_path)}")
+        logger.info(f"⏭️ Skipping generation: {os.path.basename(save_path)}")
         return save_path
         
     try:
-        print(f"Attempting AI image generation: {os.path.basename(save_path)}")
+        logger.info(f"Attempting AI image generation: {os.path.basename(save_path)}")
         
-        response = client.models.generate_content(
-            model= config.image_model,
+        response = generate_content(
+            model= configuration.image_model,
             contents=prompt,  # Use prompt directly as string
-            config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+            config=_image_config(),
+            configuration=configuration,
         )
-        
-        for part in response.candidates[0].content.parts:
-            if part.text is not None:
-                print(part.text)
-            elif part.inline_data is not None:
-                image = Image.open(io.BytesIO((part.inline_data.data)))
-                image.save(save_path)
-                return save_path
-        
-        # If we reach here, no image was generated
-        print(f"❌ AI image generation failed: No image produced")
-        return None
+        return _save_image_from_response(response, save_path)
         
     except Exception as e:
-        print(f"❌ AI image generation failed: {e}")
+        logger.error(f"❌ AI image generation failed: {e}")
         return None
 
+async def agenerate_image_with_prompt(prompt, save_path, configuration=None):
+    """Async variant of generate_image_with_prompt"""
+    if configuration is None:
+        configuration = config
+
+    # Skip generation if save_path already exists
+    if os.path.exists(save_path):
+        logger.info(f"⏭️ Skipping generation: {os.path.basename(save_path)}")
+        return save_path
+
+    try:
+        logger.info(f"Attempting AI image generation: {os.path.basename(save_path)}")
+
+        response = await agenerate_content(
+            model= configuration.image_model,
+            contents=prompt,
+            config=_image_config(),
+            configuration=configuration,
+        )
+        # Decoding and writing the PNG is blocking work
+        return await asyncio.to_thread(_save_image_from_response, response, save_path)
+
+    except Exception as e:
+        logger.error(f"❌ AI image generation failed: {e}")
+        return None
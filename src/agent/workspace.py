@@ -0,0 +1,176 @@
+"""Run-scoped artifact workspace
+
+Every run reads and writes its script, images and video under its own directory
+(podcast/runs/<run_id>/) so concurrent runs never collide. Assets that are safe
+to reuse across runs can be promoted into a shared pool (podcast/shared/).
+"""
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+PODCAST_DIR = Path(__file__).parent.parent.parent / "podcast"
+RUNS_DIR = PODCAST_DIR / "runs"
+SHARED_DIR = PODCAST_DIR / "shared"
+
+# Run ids become directory names, so they may not contain path separators
+RUN_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]+")
+
+
+def atomic_write_bytes(path, data):
+    """Write bytes to path via a temp file in the same directory and an atomic rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def atomic_move(src, dst):
+    """Move src to dst so that dst only ever appears complete
+
+    Uses a rename when both are on the same filesystem, otherwise copies to a
+    temp file next to dst and renames that into place.
+    """
+    src, dst = Path(src), Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        fd, tmp_path = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dst)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        os.unlink(src)
+    return dst
+
+
+def safe_filename(name):
+    """Keep only characters that are safe in file names"""
+    return "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+
+def validate_run_id(run_id):
+    """Return `run_id` if it is safe as a directory name, else raise ValueError
+
+    Run ids come from graph input, LangGraph thread ids and the CLIs; only
+    letters, digits, ".", "_" and "-" are allowed, and not "." or "..".
+    """
+    run_id = str(run_id)
+    if not RUN_ID_PATTERN.fullmatch(run_id) or run_id in (".", ".."):
+        raise ValueError(f"Invalid run id {run_id!r} - use only letters, digits, '.', '_' and '-'")
+    return run_id
+
+
+class RunWorkspace:
+    """Directory holding all artifacts produced by one run"""
+
+    def __init__(self, run_id, runs_dir=None, shared_dir=None):
+        self.run_id = validate_run_id(run_id)
+        self.root = Path(runs_dir or RUNS_DIR) / self.run_id
+        self.shared_dir = Path(shared_dir or SHARED_DIR)
+
+    @property
+    def script_path(self):
+        return self.root / "script.txt"
+
+    @property
+    def analysis_path(self):
+        return self.root / "analysis.json"
+
+    @property
+    def speakers_dir(self):
+        return self.root / "images" / "speakers"
+
+    @property
+    def backgrounds_dir(self):
+        return self.root / "images" / "backgrounds"
+
+    def scaled_images_dir(self, profile_name):
+        """Downscaled copies of the run's images for a render profile"""
+        return self.root / "images" / profile_name
+
+    @property
+    def audio_dir(self):
+        return self.root / "audio"
+
+    @property
+    def video_path(self):
+        return self.root / "podcast_video.mp4"
+
+    def audio_path(self, suffix):
+        """Final podcast audio of an audio-only run"""
+        return self.root / f"podcast_audio{suffix}"
+
+    @property
+    def metrics_path(self):
+        return self.root / "metrics.json"
+
+    def ensure(self):
+        """Create the workspace directories"""
+        for directory in (self.speakers_dir, self.backgrounds_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def temp_path(self, final_path):
+        """Path next to the workspace root for building an artifact before its atomic move"""
+        final_path = Path(final_path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / f".partial-{uuid.uuid4().hex[:8]}{final_path.suffix}"
+
+    def write_text(self, path, text):
+        return atomic_write_bytes(path, text.encode("utf-8"))
+
+    def shared_path(self, kind, filename):
+        return self.shared_dir / kind / filename
+
+    def find_shared(self, kind, filename):
+        """Return the pooled asset for (kind, filename) if one exists"""
+        path = self.shared_path(kind, filename)
+        return path if path.exists() else None
+
+    def adopt(self, shared_path, dest):
+        """Bring a pooled asset into the workspace (hard link, or copy across filesystems)"""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            return dest
+        try:
+            os.link(shared_path, dest)
+        except OSError:
+            atomic_write_bytes(dest, Path(shared_path).read_bytes())
+        return dest
+
+    def promote(self, path, kind, filename=None):
+        """Publish a workspace asset into the shared pool for later runs"""
+        path = Path(path)
+        return atomic_write_bytes(self.shared_path(kind, filename or path.name), path.read_bytes())
+
+
+def resolve_run_id(state, config=None):
+    """Use the run id already in state, else the LangGraph thread id, else a new id"""
+    if state.get("run_id"):
+        return validate_run_id(state["run_id"])
+    configurable = (config or {}).get("configurable", {}) if config else {}
+    thread_id = configurable.get("thread_id")
+    return validate_run_id(thread_id) if thread_id else uuid.uuid4().hex
+
+
+def get_workspace(state, configuration=None):
+    """Return the RunWorkspace for the run in `state`"""
+    runs_dir = configuration.workspace_dir if configuration is not None and configuration.workspace_dir else None
+    return RunWorkspace(resolve_run_id(state), runs_dir=runs_dir)
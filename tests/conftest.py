@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.fake_client import FakeClient, LatencyProfile, install
+from benchmarks.run import bench_configurable
+
+
+@pytest.fixture
+def fake_client():
+    """Route model calls through a FakeClient with no latency for the duration of a test"""
+    from agent.utils import set_client
+
+    client = install(FakeClient(LatencyProfile()))
+    yield client
+    set_client(None)
+
+
+@pytest.fixture
+def configurable(tmp_path):
+    """Graph configuration keeping every artifact and cache under tmp_path"""
+    return bench_configurable(tmp_path)
@@ -0,0 +1,35 @@
+"""Background reuse by section similarity"""
+import os
+
+import pytest
+from PIL import Image
+
+from agent.background_library import BackgroundLibrary
+
+SECTION = {"theme": "Quantum computing hardware", "mood": "futuristic", "key_concepts": ["qubits", "superconducting circuits"]}
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "background.png"
+    Image.new("RGB", (16, 9), (10, 20, 30)).save(path)
+    return path
+
+
+def test_reuses_similar_sections_only(tmp_path, image_path):
+    library = BackgroundLibrary(tmp_path / "library")
+    filed = library.add(SECTION, image_path)
+    similar = {**SECTION, "theme": "Quantum computing chips"}
+    path, score = library.lookup(similar, threshold=0.5)
+    assert path == filed and 0.5 <= score < 1
+    assert library.lookup({"theme": "Medieval poetry", "mood": "calm", "key_concepts": ["sonnets"]}, threshold=0.5) is None
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_connections_are_closed(tmp_path, image_path):
+    library = BackgroundLibrary(tmp_path / "library")
+    for i in range(10):
+        library.add({**SECTION, "theme": f"Quantum computing part {i}"}, image_path)
+        library.lookup(SECTION, threshold=0.1)
+    open_files = [os.path.realpath(f"/proc/self/fd/{fd}") for fd in os.listdir("/proc/self/fd")]
+    assert not [path for path in open_files if path.startswith(str(tmp_path))]
@@ -0,0 +1,74 @@
+"""Batch manifest and resuming an interrupted batch"""
+import asyncio
+import json
+
+import pytest
+
+from agent.batch import BatchManifest, arun_batch, normalize_job
+from agent.limits import NETWORK, get_stage_limits, set_stage_limits
+
+TEXT_MODEL = "gemini-2.5-flash"
+
+
+def _run(jobs, configurable, manifest_path):
+    return asyncio.run(arun_batch(jobs, configurable=configurable, max_jobs=2, manifest_path=manifest_path))
+
+
+def _fail_topic(client, topic):
+    """Make every call for `topic` fail (the search prompt names the topic)"""
+    respond = client.respond
+
+    def reply(model, contents, config=None):
+        if topic in str(contents):
+            raise RuntimeError(f"simulated failure for {topic}")
+        return respond(model, contents, config)
+
+    client.respond = reply
+    return respond
+
+
+def test_normalize_job():
+    assert normalize_job("AGI") == {"topic": "AGI", "video_url": None, "output_path": None, "output_mode": None}
+    assert normalize_job(("AGI", "https://youtu.be/x"))["video_url"] == "https://youtu.be/x"
+    with pytest.raises(ValueError):
+        normalize_job({"video_url": "https://youtu.be/x"})
+
+
+def test_resume_skips_jobs_already_done(fake_client, configurable, tmp_path):
+    manifest_path = tmp_path / "batch.json"
+    jobs = [{"topic": topic, "output_mode": "script"} for topic in ("Alpha", "Beta", "Gamma")]
+    respond = _fail_topic(fake_client, "Beta")
+
+    first = _run(jobs, configurable, manifest_path)
+    assert first["counts"] == {"done": 2, "failed": 1}
+    run_ids = [job["run_id"] for job in first["jobs"]]
+
+    # Second attempt with the failure fixed: only the failed job runs again
+    fake_client.respond = respond
+    calls_before = fake_client.calls[TEXT_MODEL]
+    second = _run(jobs, configurable, manifest_path)
+    assert second["counts"] == {"done": 3}
+    assert [job["run_id"] for job in second["jobs"]] == run_ids
+    assert fake_client.calls[TEXT_MODEL] - calls_before == 2  # search + script of one job
+    assert second["jobs"][0]["finished"] == first["jobs"][0]["finished"]
+    assert json.loads(manifest_path.read_text(encoding="utf-8"))["counts"] == {"done": 3}
+
+
+def test_batch_leaves_the_process_limits_alone(fake_client, configurable, tmp_path):
+    set_stage_limits(**{NETWORK: 5})
+    try:
+        _run([{"topic": "Alpha", "output_mode": "script"}], configurable, tmp_path / "batch.json")
+        assert get_stage_limits() == {NETWORK: 5}
+    finally:
+        set_stage_limits(**{NETWORK: None})
+
+
+def test_changed_job_inputs_run_again(tmp_path):
+    path = tmp_path / "batch.json"
+    BatchManifest(path, "b", [normalize_job({"topic": "Alpha", "output_mode": "script"})]).save()
+    manifest = BatchManifest(path, "b", [normalize_job({"topic": "Alpha", "output_mode": "script"})])
+    manifest.update(0, status="done")
+
+    assert BatchManifest(path, "b", [normalize_job({"topic": "Alpha", "output_mode": "script"})]).entries[0]["status"] == "done"
+    assert BatchManifest(path, "b", [normalize_job({"topic": "Alpha", "output_mode": "audio"})]).entries[0]["status"] == "pending"
+    assert BatchManifest(path, "b", [normalize_job({"topic": "Alpha, revised", "output_mode": "script"})]).entries[0]["status"] == "pending"
@@ -0,0 +1,64 @@
+"""Recovering per-line audio from a multi-speaker TTS chunk"""
+import math
+from array import array
+
+import pytest
+
+from agent.batched_tts import _chunk_text, chunk_segments, split_chunk_pcm
+from agent.configuration import Configuration
+from benchmarks.fake_client import FakeClient
+
+CONFIGURATION = Configuration()
+RATE = CONFIGURATION.tts_rate
+
+SEGMENTS = [
+    {"speaker": "Mike", "content": "Welcome back to the show."},
+    {"speaker": "Dr. Lisa", "content": "Thanks, it is great to be here and talk about superconducting qubits today."},
+    {"speaker": "Mike", "content": "Why now?"},
+    {"speaker": "Dr. Lisa", "content": "Error correction finally crossed the break-even point last year."},
+]
+
+
+def _tone(seconds):
+    period = RATE // 200
+    cycle = array("h", (int(3000 * math.sin(2 * math.pi * n / period)) for n in range(period))).tobytes()
+    return cycle * int(seconds * RATE / period)
+
+
+def _silence(seconds):
+    return b"\x00\x00" * int(seconds * RATE)
+
+
+def _assert_split_in_pauses(pieces, spoken_seconds):
+    assert len(pieces) == len(spoken_seconds)
+    for piece, seconds in zip(pieces, spoken_seconds):
+        # Every piece holds exactly one line's tone, plus some of the surrounding pauses
+        tone_bytes = sum(1 for i in range(0, len(piece), 2) if piece[i:i + 2] != b"\x00\x00") * 2
+        assert tone_bytes == pytest.approx(len(_tone(seconds)), rel=0.02)
+
+
+def test_splits_fake_client_chunk_at_the_pauses():
+    pcm = FakeClient(tts_rate=RATE).speech(_chunk_text(SEGMENTS))
+    pieces = split_chunk_pcm(pcm, SEGMENTS, CONFIGURATION)
+    assert b"".join(pieces) == pcm
+    _assert_split_in_pauses(pieces, [max(0.5, len(" " + segment["content"]) / 15.0) for segment in SEGMENTS])
+
+
+def test_recovers_boundaries_when_speech_rate_varies():
+    # Lines spoken up to ~20% faster or slower than their character counts suggest
+    spoken_seconds = [1.9, 4.6, 0.6, 4.0]
+    pcm = _silence(0.1) + _silence(0.3).join(_tone(seconds) for seconds in spoken_seconds) + _silence(0.1)
+    pieces = split_chunk_pcm(pcm, SEGMENTS, CONFIGURATION)
+    assert sum(map(len, pieces)) == len(pcm)
+    _assert_split_in_pauses(pieces, spoken_seconds)
+
+
+def test_single_line_chunk_is_returned_whole():
+    pcm = _tone(1.0)
+    assert split_chunk_pcm(pcm, SEGMENTS[:1], CONFIGURATION) == [pcm]
+
+
+def test_chunk_segments_respects_the_character_budget():
+    chunks = chunk_segments(SEGMENTS, max_chars=100)
+    assert [i for chunk in chunks for i in chunk] == list(range(len(SEGMENTS)))
+    assert chunks == [[0], [1], [2, 3]]
@@ -0,0 +1,55 @@
+"""Resuming a checkpointed run after a failure"""
+import asyncio
+
+import pytest
+
+from agent.checkpoint import alist_threads, aresume, arun_resumable, astatus
+
+TEXT_MODEL = "gemini-2.5-flash"
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+
+def test_resume_skips_completed_nodes(fake_client, configurable, tmp_path):
+    checkpoint_path = tmp_path / "checkpoints.sqlite"
+    inputs = {"topic": "Quantum computing", "output_mode": "audio"}
+    respond = fake_client.respond
+
+    def reply(model, contents, config=None):
+        if model == TTS_MODEL:
+            raise RuntimeError("simulated TTS outage")
+        return respond(model, contents, config)
+
+    fake_client.respond = reply
+    with pytest.raises(RuntimeError):
+        asyncio.run(arun_resumable(inputs, thread_id="resumable", configurable=configurable, checkpoint_path=checkpoint_path))
+
+    status = asyncio.run(astatus("resumable", checkpoint_path=checkpoint_path))
+    assert status["completed"] is False
+    assert status["next"] == ["create_audio"]
+    assert "create_audio" in status["errors"]
+    assert status["topic"] == "Quantum computing"
+
+    del fake_client.respond  # the outage is over
+    text_calls = fake_client.calls[TEXT_MODEL]
+    result = asyncio.run(aresume("resumable", configurable=configurable, checkpoint_path=checkpoint_path))
+    assert result["podcast_filename"].endswith("podcast_audio.mp3")
+    # Search and script came from the checkpoint
+    assert fake_client.calls[TEXT_MODEL] == text_calls
+    assert asyncio.run(astatus("resumable", checkpoint_path=checkpoint_path))["completed"] is True
+
+    # Resuming a finished run returns its state without running anything
+    calls = dict(fake_client.calls)
+    assert asyncio.run(aresume("resumable", configurable=configurable, checkpoint_path=checkpoint_path)) == result
+    assert fake_client.calls == calls
+
+
+def test_list_threads_and_unknown_thread(fake_client, configurable, tmp_path):
+    checkpoint_path = tmp_path / "checkpoints.sqlite"
+    for thread_id in ("first", "second"):
+        inputs = {"topic": f"Topic {thread_id}", "output_mode": "script"}
+        asyncio.run(arun_resumable(inputs, thread_id=thread_id, configurable=configurable, checkpoint_path=checkpoint_path))
+    assert asyncio.run(alist_threads(checkpoint_path=checkpoint_path)) == ["second", "first"]
+    with pytest.raises(ValueError, match="missing"):
+        asyncio.run(astatus("missing", checkpoint_path=checkpoint_path))
+    with pytest.raises(ValueError, match="missing"):
+        asyncio.run(aresume("missing", checkpoint_path=checkpoint_path))
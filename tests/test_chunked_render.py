@@ -0,0 +1,99 @@
+"""Chunk cache keys and rendering from the chunk cache"""
+import dataclasses
+import subprocess
+
+import pytest
+from PIL import Image
+
+import agent.chunked_render as chunked_render
+from agent.chunked_render import chunk_key, render_chunked_video
+from agent.configuration import Configuration
+from agent.render import RENDER_PROFILES, get_ffmpeg_exe
+
+FINAL = RENDER_PROFILES["final"]
+
+
+def test_chunk_key_is_stable():
+    key = chunk_key("bg", "speaker", (1280, 720), 12, 4, FINAL)
+    assert key == chunk_key("bg", "speaker", [1280, 720], 12, 4, dataclasses.replace(FINAL))
+    assert len(key) == 64 and int(key, 16) >= 0
+
+
+@pytest.mark.parametrize("change", [
+    {"background_digest": "other"},
+    {"speaker_digest": None},
+    {"canvas_size": (640, 360)},
+    {"frames": 13},
+    {"fps": 2},
+    {"profile": RENDER_PROFILES["preview"]},
+    {"profile": dataclasses.replace(FINAL, crf=FINAL.crf + 1)},
+    {"profile": dataclasses.replace(FINAL, preset="ultrafast")},
+])
+def test_chunk_key_changes_with_encoded_inputs(change):
+    inputs = {"background_digest": "bg", "speaker_digest": "speaker", "canvas_size": (1280, 720), "frames": 12, "fps": 4, "profile": FINAL}
+    assert chunk_key(**inputs) != chunk_key(**{**inputs, **change})
+
+
+def test_chunk_key_ignores_audio_bitrate():
+    # The audio track is muxed once after concatenation, not stored in chunks
+    assert chunk_key("bg", "sp", (1280, 720), 12, 4, FINAL) == chunk_key("bg", "sp", (1280, 720), 12, 4, dataclasses.replace(FINAL, audio_bitrate="64k"))
+
+
+def _segments(tmp_path):
+    backgrounds = []
+    for i, color in enumerate([(200, 0, 0), (0, 200, 0)]):
+        backgrounds.append(tmp_path / f"bg{i}.png")
+        Image.new("RGB", (320, 180), color).save(backgrounds[-1])
+    speaker = tmp_path / "speaker.png"
+    Image.new("RGBA", (100, 100), (255, 255, 0, 255)).save(speaker)
+    segments = [{"speaker": "Mike", "content": f"line {i}", "background": str(backgrounds[i % 2]), "duration": 0.5} for i in range(4)]
+    return segments, {"Mike": str(speaker)}
+
+
+def test_cache_hits_survive_eviction_by_the_same_render(tmp_path):
+    segments, speaker_images = _segments(tmp_path)
+    cache_dir = str(tmp_path / "chunks")
+    roomy = Configuration(video_renderer="chunked", video_chunk_cache_dir=cache_dir, render_workers=1)
+    render_chunked_video(segments, speaker_images, str(tmp_path / "first.mp4"), None, roomy)
+
+    # One new chunk, and a cache so small that storing it evicts every hit
+    segments[1] = {**segments[1], "duration": 0.75}
+    tiny = dataclasses.replace(roomy, video_chunk_cache_max_mb=0)
+    output = tmp_path / "second.mp4"
+    render_chunked_video(segments, speaker_images, str(output), None, tiny)
+    assert output.stat().st_size > 0
+    assert not list((tmp_path / "chunks").glob("*/*.mp4"))
+
+
+def _frame_colors(path, size=(64, 36)):
+    """The top-left pixel of every frame, with runs of the same color collapsed"""
+    width, height = size
+    raw = subprocess.run(
+        [get_ffmpeg_exe(), "-loglevel", "error", "-i", str(path), "-vf", f"scale={width}:{height}", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        capture_output=True, check=True,
+    ).stdout
+    colors = []
+    for offset in range(0, len(raw), width * height * 3):
+        color = tuple(round(channel / 100) for channel in raw[offset:offset + 3])
+        if not colors or colors[-1] != color:
+            colors.append(color)
+    return colors
+
+
+def test_worker_processes_concatenate_chunks_in_order(tmp_path, monkeypatch):
+    pools = []
+    get_render_pool = chunked_render.get_render_pool
+    monkeypatch.setattr(chunked_render, "get_render_pool", lambda workers: pools.append(workers) or get_render_pool(workers))
+    colors = [(200, 0, 0), (0, 200, 0), (0, 0, 200), (200, 200, 200)]
+    segments = []
+    for i, color in enumerate(colors):
+        background = tmp_path / f"bg{i}.png"
+        Image.new("RGB", (320, 180), color).save(background)
+        # The first chunk is the longest, so it tends to finish last
+        segments.append({"speaker": "Mike", "content": f"line {i}", "background": str(background), "duration": 1.5 if i == 0 else 0.5})
+
+    configuration = Configuration(video_renderer="chunked", video_chunk_cache_dir=str(tmp_path / "chunks"), render_workers=2)
+    output = tmp_path / "parallel.mp4"
+    render_chunked_video(segments, {}, str(output), None, configuration)
+    assert pools == [2]
+    assert _frame_colors(output) == [tuple(round(channel / 100) for channel in color) for color in colors]
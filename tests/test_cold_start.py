@@ -0,0 +1,54 @@
+"""Importing the graph stays cheap: within budget, no heavy modules, no files written"""
+import json
+import os
+import subprocess
+import sys
+
+from agent.workspace import PODCAST_DIR
+
+# Seconds for `import agent.graph` + create_graph() in a fresh interpreter,
+# on top of importing LangGraph itself
+IMPORT_BUDGET = float(os.environ.get("AGENT_IMPORT_BUDGET", "2.0"))
+HEAVY_MODULES = ("moviepy", "PIL", "google.genai", "rich", "numpy")
+
+# Frameworks are imported first so the probe can tell which modules the agent
+# itself loads: httpx (via langgraph_sdk) imports rich for its CLI when rich
+# happens to be installed, which the agent cannot avoid.
+PROBE = """
+import json, sys, time
+import langchain_core.runnables, langgraph.graph, langsmith
+framework = sorted(sys.modules)
+start = time.perf_counter()
+import agent.graph
+agent.graph.create_graph()
+print(json.dumps({"seconds": time.perf_counter() - start, "framework": framework, "modules": sorted(sys.modules)}))
+"""
+
+
+def _podcast_files():
+    return {str(path) for path in PODCAST_DIR.rglob("*")} if PODCAST_DIR.exists() else set()
+
+
+def _cold_start():
+    env = {k: v for k, v in os.environ.items() if k not in ("GEMINI_API_KEY", "EXPORT_GRAPH_PNG")}
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    output = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_cold_start():
+    before = _podcast_files()
+    # Best of three, so one slow start on a busy machine does not fail the suite
+    samples = [_cold_start() for _ in range(3)]
+
+    seconds = min(sample["seconds"] for sample in samples)
+    assert seconds <= IMPORT_BUDGET, f"cold start took {seconds:.2f}s, budget {IMPORT_BUDGET:.2f}s"
+
+    loaded_by_agent = set(samples[0]["modules"]) - set(samples[0]["framework"])
+    eager = [name for name in HEAVY_MODULES if name in loaded_by_agent]
+    assert not eager, f"imported at load time: {eager}"
+    # Nothing the framework pulls in should be one of the media / SDK modules either
+    assert not [name for name in ("moviepy", "PIL", "google.genai", "numpy") if name in samples[0]["modules"]]
+
+    assert _podcast_files() == before, f"created under podcast/: {sorted(_podcast_files() - before)}"
@@ -0,0 +1,127 @@
+"""Concurrent TTS and image generation keep the input order and report failures"""
+import asyncio
+import os
+import time
+
+import pytest
+
+import agent.audios as audios
+from agent.audios import (
+    agenerate_audio_and_update_segments,
+    generate_audio_and_update_segments,
+)
+from agent.configuration import Configuration
+from agent.graph import _arun_image_tasks, _run_image_tasks
+from agent.pcm import frame_bytes
+
+CONFIGURATION = Configuration(tts_max_concurrency=4, tts_cache_enabled=False)
+SEGMENTS = [{"speaker": "Mike" if i % 2 else "Dr. Lisa", "content": f"line {i}"} for i in range(6)]
+
+
+def _delay(index, count):
+    # Later inputs finish first
+    return (count - index) * 0.02
+
+
+def _pcm(index):
+    """Silence whose length identifies the segment: (index + 1) tenths of a second"""
+    return b"\x00" * frame_bytes(CONFIGURATION) * int((index + 1) * CONFIGURATION.tts_rate / 10)
+
+
+@pytest.fixture
+def fake_tts(monkeypatch):
+    """Replace per-line TTS with silence that finishes in reverse order; lines containing "fail" raise
+
+    Returns the indexes of the lines as they finish.
+    """
+    finished = []
+
+    def line(segment):
+        index = int(segment["content"].split()[-1])
+        if "fail" in segment["content"]:
+            raise RuntimeError(f"simulated failure {index}")
+        return index
+
+    def synthesize(segment, configuration, *args):
+        index = line(segment)
+        time.sleep(_delay(index, len(SEGMENTS)))
+        finished.append(index)
+        return _pcm(index)
+
+    async def asynthesize(segment, configuration, *args):
+        index = line(segment)
+        await asyncio.sleep(_delay(index, len(SEGMENTS)))
+        finished.append(index)
+        return _pcm(index)
+
+    monkeypatch.setattr(audios, "synthesize_segment_audio", synthesize)
+    monkeypatch.setattr(audios, "asynthesize_segment_audio", asynthesize)
+    return finished
+
+
+def _generate(segments, use_async):
+    if use_async:
+        return asyncio.run(agenerate_audio_and_update_segments(segments, CONFIGURATION))
+    return generate_audio_and_update_segments(segments, CONFIGURATION)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_tts_results_keep_the_script_order(fake_tts, use_async):
+    audio_file, updated = _generate(SEGMENTS, use_async)
+    os.unlink(audio_file)
+    assert fake_tts[0] != 0  # the lines really finished out of order
+    assert [segment["content"] for segment in updated] == [segment["content"] for segment in SEGMENTS]
+    assert [segment["duration"] for segment in updated] == pytest.approx([(i + 1) / 10 for i in range(len(SEGMENTS))])
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_tts_failures_are_reported_together(fake_tts, use_async):
+    segments = [dict(segment) for segment in SEGMENTS]
+    for i in (1, 4):
+        segments[i]["content"] = f"fail {i}"
+    with pytest.raises(RuntimeError) as excinfo:
+        _generate(segments, use_async)
+    message = str(excinfo.value)
+    assert "2/6 segments" in message
+    assert "segment 2 (Mike): simulated failure 1" in message and "segment 5 (Dr. Lisa): simulated failure 4" in message
+    # A failure does not stop the other lines
+    assert sorted(fake_tts) == [0, 2, 3, 5]
+
+
+def _image_task(key, index, count):
+    def task():
+        time.sleep(_delay(index, count))
+        if key == "broken":
+            raise RuntimeError("no image")
+        return f"{key}.png"
+
+    return task
+
+
+def _async_image_task(key, index, count):
+    async def task():
+        await asyncio.sleep(_delay(index, count))
+        if key == "broken":
+            raise RuntimeError("no image")
+        return f"{key}.png"
+
+    return task
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_image_results_keep_the_input_order(monkeypatch, use_async):
+    events = []
+    monkeypatch.setattr("agent.progress.get_progress_writer", lambda: events.append)
+    keys = ["section_01", "section_02", "broken", "section_04", "section_05"]
+    make = _async_image_task if use_async else _image_task
+    tasks = {key: make(key, i, len(keys)) for i, key in enumerate(keys)}
+
+    if use_async:
+        results = asyncio.run(_arun_image_tasks(tasks, 3, "background", "backgrounds"))
+    else:
+        results = _run_image_tasks(tasks, 3, "background", "backgrounds")
+    assert list(results) == [key for key in keys if key != "broken"]
+    assert results["section_04"] == "section_04.png"
+    # The failed image is counted, and every task is reported
+    assert events[-1]["done"] == events[-1]["total"] == len(keys)
+    assert events[-1]["failed"] == 1
@@ -0,0 +1,61 @@
+"""Decoded image cache hits and invalidation"""
+import os
+
+import numpy as np
+from PIL import Image
+
+from agent.image_cache import ImageCache
+
+
+def _save(path, color, size=(40, 20)):
+    Image.new("RGB", size, color).save(path)
+    return str(path)
+
+
+def test_repeated_requests_are_hits(tmp_path):
+    cache = ImageCache()
+    path = _save(tmp_path / "bg.png", (255, 0, 0))
+    first = cache.get(path, (20, 10))
+    assert cache.get(path, (20, 10)) is first
+    assert first.shape == (10, 20, 3) and not first.flags.writeable
+    # Another target size or mode is a separate entry
+    assert cache.get(path, (20, 10), "RGBA").shape == (10, 20, 4)
+    assert cache.stats()["hits"] == 1 and cache.stats()["decodes"] == 2
+
+
+def test_changed_file_is_decoded_again(tmp_path):
+    cache = ImageCache()
+    path = _save(tmp_path / "bg.png", (255, 0, 0))
+    assert tuple(cache.get(path)[0, 0]) == (255, 0, 0)
+
+    # Same size, newer mtime
+    _save(path, (0, 0, 255))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert tuple(cache.get(path)[0, 0]) == (0, 0, 255)
+
+    # Same mtime, different size
+    mtime_ns = os.stat(path).st_mtime_ns
+    _save(path, (0, 255, 0), size=(80, 40))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    assert cache.get(path).shape == (40, 80, 3)
+    assert cache.stats()["decodes"] == 3 and cache.stats()["hits"] == 0
+
+
+def test_thumbnails_are_shared_between_caches(tmp_path):
+    path = _save(tmp_path / "bg.png", (10, 20, 30))
+    ImageCache(thumbnail_dir=tmp_path / "thumbs").get(path, (20, 10))
+    other = ImageCache(thumbnail_dir=tmp_path / "thumbs")
+    assert np.array_equal(other.get(path, (20, 10)), np.full((10, 20, 3), (10, 20, 30), dtype=np.uint8))
+    assert other.stats()["decodes"] == 0
+
+
+def test_memory_budget_evicts_least_recently_used(tmp_path):
+    paths = [_save(tmp_path / f"bg{i}.png", (i, i, i)) for i in range(3)]
+    cache = ImageCache(max_bytes=2 * 40 * 20 * 3)
+    for path in paths:
+        cache.get(path)
+    assert cache.stats()["bytes"] == 2 * 40 * 20 * 3
+    cache.get(paths[2])
+    cache.get(paths[0])
+    assert cache.stats()["hits"] == 1 and cache.stats()["decodes"] == 4
@@ -0,0 +1,76 @@
+"""Process-wide and scoped stage limits"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.limits import (
+    NETWORK,
+    astage_slot,
+    get_stage_limits,
+    scoped_stage_limits,
+    set_stage_limits,
+    stage_slot,
+)
+from agent.metrics import bind_context
+
+
+class _Peak:
+    def __init__(self):
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def leave(self):
+        with self._lock:
+            self.active -= 1
+
+
+async def _network_calls(peak, count):
+    async def call():
+        async with astage_slot(NETWORK):
+            peak.enter()
+            await asyncio.sleep(0.01)
+            peak.leave()
+
+    await asyncio.gather(*(call() for _ in range(count)))
+
+
+async def _scoped(limit, peak, count):
+    with scoped_stage_limits(**{NETWORK: limit}):
+        await _network_calls(peak, count)
+
+
+def test_concurrent_scopes_keep_their_own_limits():
+    one, three, unscoped = _Peak(), _Peak(), _Peak()
+
+    async def main():
+        await asyncio.gather(_scoped(1, one, 6), _scoped(3, three, 6), _network_calls(unscoped, 6))
+
+    asyncio.run(main())
+    assert (one.peak, three.peak, unscoped.peak) == (1, 3, 6)
+    assert get_stage_limits() == {}
+
+
+def test_scopes_add_to_the_process_limits():
+    peak = _Peak()
+
+    def call():
+        with stage_slot(NETWORK):
+            peak.enter()
+            time.sleep(0.01)
+            peak.leave()
+
+    set_stage_limits(**{NETWORK: 2})
+    try:
+        with scoped_stage_limits(**{NETWORK: 4}), ThreadPoolExecutor(max_workers=6) as executor:
+            for future in [executor.submit(bind_context(call)) for _ in range(6)]:
+                future.result()
+        assert peak.peak == 2
+        assert get_stage_limits() == {NETWORK: 2}
+    finally:
+        set_stage_limits(**{NETWORK: None})
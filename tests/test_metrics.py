@@ -0,0 +1,125 @@
+"""Per-run metrics: node instrumentation, publishing and the Prometheus export"""
+import asyncio
+import json
+import re
+
+import pytest
+
+import agent.metrics as metrics_module
+from agent.graph import build_graph
+from agent.metrics import RunMetrics, instrument_node, prometheus_text, record_audio
+
+SAMPLE = re.compile(r'^([a-z_]+)(\{[a-z_]+="(?:[^"\\]|\\.)*"(?:,[a-z_]+="(?:[^"\\]|\\.)*")*\})? (-?[0-9.e+-]+)$')
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Record the run id of every publish_run call"""
+    run_ids = []
+    publish = metrics_module.publish_run
+
+    def record(state, config, metrics):
+        run_ids.append(metrics.run_id)
+        return publish(state, config, metrics)
+
+    monkeypatch.setattr(metrics_module, "publish_run", record)
+    return run_ids
+
+
+@pytest.fixture
+def released(monkeypatch):
+    run_ids = []
+    monkeypatch.setattr(metrics_module, "_release_hooks", [run_ids.append])
+    return run_ids
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_run_publishes_metrics_once_from_the_final_node(fake_client, configurable, tmp_path, published, use_async):
+    graph = build_graph(use_async).compile()
+    run_id = f"metrics-{use_async}"
+    inputs = {"topic": "Quantum computing", "output_mode": "audio", "run_id": run_id}
+    config = {"configurable": configurable}
+    result = asyncio.run(graph.ainvoke(inputs, config)) if use_async else graph.invoke(inputs, config)
+
+    assert published == [run_id]
+    saved = json.loads((tmp_path / "runs" / run_id / "metrics.json").read_text(encoding="utf-8"))
+    assert saved["run_id"] == run_id
+    assert set(saved["nodes"]) == {"search_research", "create_podcast_transcript", "create_audio"}
+    assert saved["api_calls"] == sum(fake_client.calls.values())
+    assert saved["audio_seconds"] > 0
+    assert result["metrics"]["api_calls"] == saved["api_calls"]
+    assert run_id not in metrics_module._runs
+
+
+def _config(configurable):
+    return {"configurable": configurable}
+
+
+def test_only_the_final_node_publishes(configurable, published, released):
+    def first(state, config):
+        record_audio(1.5)
+        return {}
+
+    def last(state, config):
+        record_audio(2.0)
+        return {"done": True}
+
+    state = {"run_id": "two-nodes", "output_mode": "audio"}
+    assert instrument_node("first", first)(state, _config(configurable)) == {}
+    result = instrument_node("last", last, final=lambda state: state["output_mode"] == "audio")(state, _config(configurable))
+
+    assert published == ["two-nodes"]
+    assert result["done"] is True
+    assert result["metrics"]["audio_seconds"] == 3.5
+    assert set(result["metrics"]["nodes"]) == {"first", "last"}
+    # Finishing the run released its per-run state
+    assert released == ["two-nodes"]
+    assert "two-nodes" not in metrics_module._runs
+
+
+def test_failed_node_releases_the_run(configurable, published, released):
+    def broken(state, config):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        instrument_node("broken", broken, final=True)({"run_id": "failing"}, _config(configurable))
+    assert released == ["failing"]
+    assert published == []
+    # The counters stay until the run is resumed or evicted
+    assert metrics_module._runs.pop("failing").nodes["broken"]["errors"] == 1
+
+
+def test_release_hook_errors_are_logged(monkeypatch, caplog):
+    def hook(run_id):
+        raise OSError("gone")
+
+    monkeypatch.setattr(metrics_module, "_release_hooks", [hook])
+    metrics_module.release_run("hook-error")
+    assert "hook-error" in caplog.text
+
+
+def test_prometheus_text_is_well_formed():
+    metrics = RunMetrics("prometheus")
+    metrics.record_node('quoted "node"\nname', 1.25, failed=True)
+    metrics.record_cache("tts", hit=True)
+    metrics.record_audio(12.5)
+    text = prometheus_text(metrics)
+
+    assert text.endswith("\n")
+    declared = {}
+    for line in text.splitlines():
+        if line.startswith("# "):
+            kind, name, rest = line[2:].split(" ", 2)
+            assert kind in ("HELP", "TYPE")
+            if kind == "TYPE":
+                assert rest == "counter"
+            declared.setdefault(name, set()).add(kind)
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        assert declared.get(match.group(1)) == {"HELP", "TYPE"}
+        float(match.group(3))
+    assert 'researcher_node_errors_total{node="quoted \\"node\\"\\nname"} 1' in text
+    assert 'researcher_cache_requests_total{cache="tts",result="hit"} 1' in text
+    assert "researcher_audio_seconds_total 12.5" in text
+    assert "researcher_runs_total 1" in text
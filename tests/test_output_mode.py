@@ -0,0 +1,48 @@
+"""output_mode routing after the script"""
+import asyncio
+
+import pytest
+from langgraph.graph import END
+
+from agent.graph import build_graph, output_mode, route_output_mode
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+
+@pytest.mark.parametrize("mode, route", [
+    (None, "segment_transcript"),
+    ("", "segment_transcript"),
+    ("video", "segment_transcript"),
+    ("audio", "create_audio"),
+    ("script", END),
+])
+def test_route_output_mode(mode, route):
+    assert route_output_mode({"output_mode": mode}) == route
+
+
+def test_unknown_output_mode_is_rejected():
+    with pytest.raises(ValueError, match="gif"):
+        output_mode({"output_mode": "gif"})
+    with pytest.raises(ValueError):
+        route_output_mode({"output_mode": "gif"})
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_script_mode_stops_after_the_script(fake_client, configurable, use_async):
+    graph = build_graph(use_async).compile()
+    inputs = {"topic": "Quantum computing", "output_mode": "script", "run_id": f"script-{use_async}"}
+    config = {"configurable": configurable}
+    result = asyncio.run(graph.ainvoke(inputs, config)) if use_async else graph.invoke(inputs, config)
+    assert result["podcast_script"]
+    assert not result.get("analysis") and not result.get("podcast_filename")
+    assert TTS_MODEL not in fake_client.calls
+
+
+def test_audio_mode_skips_segmentation_and_images(fake_client, configurable, tmp_path):
+    graph = build_graph(False).compile()
+    result = graph.invoke({"topic": "Quantum computing", "output_mode": "audio", "run_id": "audio"}, {"configurable": configurable})
+    assert result["podcast_filename"].endswith("podcast_audio.mp3")
+    assert (tmp_path / "runs" / "audio" / "podcast_audio.mp3").stat().st_size > 0
+    assert not result.get("analysis")
+    assert fake_client.calls[TTS_MODEL] > 0
+    assert not [model for model in fake_client.calls if "image" in model]
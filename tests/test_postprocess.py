@@ -0,0 +1,70 @@
+"""Audio post-processing keeps segment durations in step with the track"""
+import os
+
+import numpy as np
+import pytest
+
+from agent.audios import generate_audio_and_update_segments
+from agent.configuration import Configuration
+from agent.metrics import PROCESS_METRICS
+from agent.pcm import array_to_pcm, frame_bytes
+from agent.postprocess import process_segments
+from benchmarks.fake_client import SCRIPT
+from benchmarks.run import bench_configurable
+
+
+def _tone(configuration, seconds, amplitude, silence=0.3):
+    """A sine tone padded with silence on both sides"""
+    rate = configuration.tts_rate
+    tone = amplitude * np.sin(2 * np.pi * 220 * np.arange(int(seconds * rate)) / rate)
+    padding = np.zeros(int(silence * rate))
+    return array_to_pcm(np.concatenate([padding, tone, padding]).astype(np.float32)[:, None], configuration)
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"audio_pause_seconds": 0, "audio_crossfade_ms": 30},
+    {"audio_pause_seconds": 0.4, "audio_crossfade_ms": 10},
+    {"video_renderer": "chunked", "static_frame_fps": 4},
+])
+def test_durations_add_up_to_the_track_length(overrides):
+    configuration = Configuration(audio_postprocess=True, **overrides)
+    segments = [_tone(configuration, seconds, amplitude) for seconds, amplitude in ((1.0, 0.1), (0.37, 0.8), (2.2, 0.3))]
+    track, durations = process_segments(segments, configuration)
+    track_seconds = len(track) / frame_bytes(configuration) / configuration.tts_rate
+    assert len(durations) == len(segments)
+    assert sum(durations) == pytest.approx(track_seconds, abs=1e-9)
+
+
+def test_trims_silence_and_respaces_turns():
+    configuration = Configuration(audio_postprocess=True, audio_pause_seconds=0.25)
+    segments = [_tone(configuration, 1.0, 0.2, silence=0.5) for _ in range(2)]
+    _, durations = process_segments(segments, configuration)
+    # The 0.5s of silence around each tone is replaced by the trim margin and the pause
+    assert durations[0] == pytest.approx(1.0 + 0.04 + 0.25, abs=0.01)
+    assert durations[1] == pytest.approx(1.0 + 0.04, abs=0.01)
+
+
+def test_chunked_renderer_starts_turns_on_video_frames():
+    configuration = Configuration(audio_postprocess=True, video_renderer="chunked", static_frame_fps=4)
+    segments = [_tone(configuration, seconds, 0.3) for seconds in (0.61, 1.13, 0.5)]
+    _, durations = process_segments(segments, configuration)
+    for duration in durations[:-1]:
+        assert (duration * 4) == pytest.approx(round(duration * 4), abs=1e-9)
+
+
+def test_metrics_and_progress_report_the_processed_length(fake_client, tmp_path, monkeypatch):
+    events = []
+    monkeypatch.setattr("agent.progress.get_progress_writer", lambda: events.append)
+    configuration = Configuration(**bench_configurable(tmp_path), audio_postprocess=True, audio_pause_seconds=0.05)
+    segments = [{"speaker": line.split(":")[0], "content": line.split(":", 1)[1].strip()} for line in SCRIPT.splitlines()[:4]]
+
+    before = PROCESS_METRICS.summary()["audio_seconds"]
+    audio_file, updated = generate_audio_and_update_segments(segments, configuration)
+    os.unlink(audio_file)
+    total = sum(segment["duration"] for segment in updated)
+    # Each line of fake speech has 0.1s of silence on either side, which is trimmed
+    assert total < events[-2]["audio_seconds"]
+    assert PROCESS_METRICS.summary()["audio_seconds"] - before == pytest.approx(total)
+    assert events[-1]["audio_seconds"] == pytest.approx(total, abs=0.01)
+    assert events[-1]["done"] == events[-1]["total"] == len(segments)
@@ -0,0 +1,63 @@
+"""Per-run TTS prefetch while the script streams"""
+import pytest
+
+import agent.audios as audios
+import agent.graph as graph_module
+from agent.graph import build_graph
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+
+@pytest.fixture
+def prefetch_pools(monkeypatch):
+    """Record the worker count of every per-run prefetch pool"""
+    sizes = []
+    init = audios._RunPrefetch.__init__
+
+    def record(self, configuration):
+        init(self, configuration)
+        sizes.append(self.executor._max_workers)
+
+    monkeypatch.setattr(audios._RunPrefetch, "__init__", record)
+    return sizes
+
+
+def _invoke(configurable, run_id, **overrides):
+    config = {"configurable": {**configurable, "stream_tts": True, **overrides}}
+    return build_graph(False).compile().invoke({"topic": "Quantum computing", "output_mode": "audio", "run_id": run_id}, config)
+
+
+def test_prefetched_audio_is_used_and_released(fake_client, configurable, prefetch_pools):
+    result = _invoke(configurable, "prefetch", tts_max_concurrency=3)
+    assert result["podcast_filename"]
+    assert prefetch_pools == [3]
+    # Every line was synthesized once, ahead of time, and nothing is left behind
+    assert fake_client.calls[TTS_MODEL] == len([line for line in result["podcast_script"].splitlines() if ":" in line])
+    assert audios._prefetch_runs == {}
+
+
+def test_each_run_sizes_its_own_pool(fake_client, configurable, prefetch_pools):
+    _invoke(configurable, "small", tts_max_concurrency=2)
+    _invoke(configurable, "large", tts_max_concurrency=5)
+    assert prefetch_pools == [2, 5]
+
+
+def test_failed_run_releases_its_prefetch(fake_client, configurable, prefetch_pools, monkeypatch):
+    def fail(state):
+        raise RuntimeError("simulated failure")
+
+    monkeypatch.setattr(graph_module, "_audio_segments", fail)
+    with pytest.raises(RuntimeError, match="simulated"):
+        _invoke(configurable, "failing")
+    assert prefetch_pools and audios._prefetch_runs == {}
+
+
+def test_prefetched_audio_is_kept_for_a_resumed_run(fake_client, configurable, tmp_path):
+    # The shared TTS cache is off, so segment audio is kept in the run's workspace
+    result = _invoke(configurable, "resumable", keep_segment_audio=True)
+    lines = fake_client.calls[TTS_MODEL]
+    assert len(list((tmp_path / "runs" / "resumable" / "audio").glob("*/*.pcm"))) == lines
+
+    _invoke(configurable, "resumable", keep_segment_audio=True)
+    assert fake_client.calls[TTS_MODEL] == lines
+    assert result["podcast_filename"]
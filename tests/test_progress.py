@@ -0,0 +1,56 @@
+"""Progress events in LangGraph's custom stream mode"""
+import asyncio
+
+import pytest
+
+import agent.progress as progress_module
+from agent.graph import build_graph
+from agent.progress import Progress, _no_op_writer, get_progress_writer
+
+EVENT_KEYS = {"type", "run_id", "stage", "unit", "done", "total", "elapsed_seconds", "eta_seconds"}
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_graph_streams_progress_events(fake_client, configurable, use_async):
+    graph = build_graph(use_async).compile()
+    inputs = {"topic": "Quantum computing", "output_mode": "audio", "run_id": f"progress-{use_async}"}
+    config = {"configurable": configurable}
+
+    async def collect():
+        return [event async for event in graph.astream(inputs, config, stream_mode="custom")]
+
+    events = asyncio.run(collect()) if use_async else list(graph.stream(inputs, config, stream_mode="custom"))
+    tts = [event for event in events if event.get("stage") == "tts"]
+    assert tts
+    for event in tts:
+        assert EVENT_KEYS <= set(event)
+        assert event["type"] == "progress" and event["unit"] == "segments"
+        assert event["run_id"] == f"progress-{use_async}"
+    # The stage announces itself before any work is done, then counts up to the total
+    assert tts[0]["done"] == 0 and tts[0]["eta_seconds"] is None
+    assert [event["done"] for event in tts] == sorted(event["done"] for event in tts)
+    assert tts[-1]["done"] == tts[-1]["total"] > 0
+    assert tts[-1]["audio_seconds"] > 0
+
+
+def test_eta_extrapolates_the_rate_so_far(monkeypatch):
+    events = []
+    clock = iter([100.0, 100.0, 104.0, 110.0])
+    monkeypatch.setattr(progress_module, "get_progress_writer", lambda: events.append)
+    monkeypatch.setattr(progress_module.time, "perf_counter", lambda: next(clock))
+
+    progress = Progress("encode", 10, "frames", frames=0)
+    progress.advance(2, frames=48)
+    progress.update(10)
+    assert [event["done"] for event in events] == [0, 2, 10]
+    assert [event["eta_seconds"] for event in events] == [None, 16.0, 0.0]
+    assert events[1]["elapsed_seconds"] == 4.0
+    # Stage-specific fields carry over until replaced
+    assert events[2]["frames"] == 48
+
+
+def test_silent_outside_a_graph():
+    assert get_progress_writer() is _no_op_writer
+    progress = Progress("tts", 3, "segments")
+    progress.advance(5)
+    assert progress.done == 3
@@ -0,0 +1,185 @@
+"""Render profiles, image downscaling, static-frame rendering and renderer dispatch"""
+import os
+import re
+import subprocess
+import wave
+
+import pytest
+from PIL import Image
+
+import agent.audios as audios
+from agent.audios import create_video
+from agent.configuration import Configuration
+from agent.graph import _scale_images
+from agent.image_cache import ImageCache
+from agent.render import (
+    RENDER_PROFILES,
+    downscale_image,
+    encoder_args,
+    fit_height,
+    get_ffmpeg_exe,
+    get_render_profile,
+    profile_fps,
+    render_static_video,
+    speaker_size,
+)
+from agent.workspace import RunWorkspace
+
+RED, BLUE = (200, 0, 0), (0, 0, 200)
+
+
+def _frames(path, size=(64, 36)):
+    """The top-left pixel of every frame of a video, rounded to tenths of full scale"""
+    width, height = size
+    raw = subprocess.run(
+        [get_ffmpeg_exe(), "-loglevel", "error", "-i", str(path), "-vf", f"scale={width}:{height}", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        capture_output=True, check=True,
+    ).stdout
+    return [tuple(round(channel / 100) for channel in raw[offset:offset + 3]) for offset in range(0, len(raw), width * height * 3)]
+
+
+def _collapse(colors):
+    return [color for i, color in enumerate(colors) if i == 0 or colors[i - 1] != color]
+
+
+def _scaled(color):
+    return tuple(round(channel / 100) for channel in color)
+
+
+@pytest.fixture
+def segments(tmp_path):
+    backgrounds = {}
+    for name, color in (("red", RED), ("blue", BLUE)):
+        backgrounds[name] = str(tmp_path / f"{name}.png")
+        Image.new("RGB", (320, 180), color).save(backgrounds[name])
+    speaker = tmp_path / "speaker.png"
+    Image.new("RGBA", (100, 100), (255, 255, 0, 255)).save(speaker)
+    segments = [
+        {"speaker": "Mike", "content": "one", "background": backgrounds["red"], "duration": 1.0},
+        {"speaker": "Mike", "content": "two", "background": backgrounds["blue"], "duration": 0.5},
+        {"speaker": "Mike", "content": "three", "background": backgrounds["red"], "duration": 0.75},
+    ]
+    return segments, {"Mike": str(speaker)}
+
+
+def _silence(path, seconds, rate=24000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\x00\x00" * int(seconds * rate))
+    return str(path)
+
+
+def test_static_video_holds_one_frame_per_segment(segments, tmp_path):
+    segments, speaker_images = segments
+    image_cache = ImageCache()
+    reported = []
+    output = tmp_path / "static.mp4"
+    audio_file = _silence(tmp_path / "audio.wav", 2.25)
+    render_static_video(segments, speaker_images, str(output), audio_file, 4, image_cache, on_frames=reported.append)
+
+    frames = _frames(output)
+    assert len(frames) == round(2.25 * 4)
+    assert _collapse(frames) == [_scaled(RED), _scaled(BLUE), _scaled(RED)]
+    assert reported and reported[-1] <= len(frames)
+    # Two frames composited (the third segment repeats the first): the portrait is decoded once
+    assert image_cache.stats()["decodes"] == 3 and image_cache.stats()["hits"] == 1
+
+
+def test_static_video_needs_segments(tmp_path):
+    with pytest.raises(ValueError):
+        render_static_video([], {}, str(tmp_path / "empty.mp4"))
+
+
+@pytest.mark.parametrize("renderer, uses_image_cache", [("static", True), ("chunked", False)])
+def test_image_cache_is_only_built_for_in_process_renderers(segments, tmp_path, monkeypatch, renderer, uses_image_cache):
+    segments, speaker_images = segments
+    built = []
+    get_image_cache = audios.get_image_cache
+    monkeypatch.setattr(audios, "get_image_cache", lambda *settings: built.append(settings) or get_image_cache(*settings))
+    configuration = Configuration(video_renderer=renderer, video_chunk_cache_dir=str(tmp_path / "chunks"), render_workers=1)
+
+    output = tmp_path / f"{renderer}.mp4"
+    create_video(segments, speaker_images, str(output), None, configuration)
+    assert _collapse(_frames(output)) == [_scaled(RED), _scaled(BLUE), _scaled(RED)]
+    assert bool(built) == uses_image_cache
+
+
+def _video_stream(path):
+    """(width, height, fps) of a video, from ffmpeg's stream summary"""
+    stderr = subprocess.run([get_ffmpeg_exe(), "-i", str(path)], capture_output=True, text=True).stderr
+    match = re.search(r"Video: .*?, (\d+)x(\d+).*?, ([\d.]+) fps", stderr)
+    return int(match.group(1)), int(match.group(2)), float(match.group(3))
+
+
+def test_render_profiles():
+    assert get_render_profile(Configuration()) is RENDER_PROFILES["final"]
+    draft = get_render_profile(Configuration(render_profile="draft"))
+    assert encoder_args(draft) == ["-preset", "ultrafast", "-crf", "32"]
+    assert profile_fps(draft, 4) == 2 and profile_fps(RENDER_PROFILES["preview"], 4) == 4
+    assert speaker_size(draft) == (100, 100) and speaker_size(RENDER_PROFILES["final"]) == (200, 200)
+    with pytest.raises(ValueError, match="4k"):
+        get_render_profile(Configuration(render_profile="4k"))
+
+
+def test_fit_height_keeps_even_dimensions():
+    assert fit_height((1280, 720), 360) == (640, 360)
+    assert fit_height((1000, 750), 540) == (720, 540)
+    assert fit_height((333, 200), 101) == (168, 101)
+    assert fit_height((640, 360), 720) == (640, 360)
+    assert fit_height((640, 360), None) == (640, 360)
+
+
+def test_downscale_image_writes_and_reuses_a_copy(tmp_path):
+    source = tmp_path / "bg.png"
+    Image.new("RGB", (1280, 720), RED).save(source)
+    scaled = downscale_image(str(source), 360, tmp_path / "scaled")
+    with Image.open(scaled) as image:
+        assert image.size == (640, 360)
+    assert not list((tmp_path / "scaled").glob(".*.tmp"))
+
+    mtime = os.stat(scaled).st_mtime_ns
+    assert downscale_image(str(source), 360, tmp_path / "scaled") == scaled
+    assert os.stat(scaled).st_mtime_ns == mtime
+    # Already small enough, or no image at all: returned as is
+    assert downscale_image(str(source), 720, tmp_path / "scaled") == str(source)
+    assert downscale_image(None, 360, tmp_path / "scaled") is None
+
+
+def _run_images(tmp_path):
+    background = tmp_path / "bg.png"
+    Image.new("RGB", (1280, 720), RED).save(background)
+    speaker = tmp_path / "speaker.png"
+    Image.new("RGBA", (400, 400), (255, 255, 0, 255)).save(speaker)
+    state = {"run_id": "profiles", "section_backgrounds": {"section_01": str(background)}, "speaker_images": {"Mike": str(speaker)}}
+    return state, RunWorkspace("profiles", runs_dir=tmp_path / "runs")
+
+
+@pytest.mark.parametrize("name, background_size, speaker_size_px", [
+    ("draft", (640, 360), (100, 100)),
+    ("preview", (960, 540), (150, 150)),
+])
+def test_scale_images_for_smaller_profiles(tmp_path, name, background_size, speaker_size_px):
+    state, workspace = _run_images(tmp_path)
+    backgrounds, speakers = _scale_images(state, Configuration(render_profile=name), workspace)
+    assert backgrounds["section_01"].startswith(str(workspace.scaled_images_dir(name)))
+    with Image.open(backgrounds["section_01"]) as image:
+        assert image.size == background_size
+    with Image.open(speakers["Mike"]) as image:
+        assert image.size == speaker_size_px
+
+
+def test_final_profile_keeps_the_original_images(tmp_path):
+    state, workspace = _run_images(tmp_path)
+    assert _scale_images(state, Configuration(render_profile="final"), workspace) == (state["section_backgrounds"], state["speaker_images"])
+    assert not workspace.scaled_images_dir("final").exists()
+
+
+@pytest.mark.parametrize("name, expected", [("draft", (640, 360, 2)), ("preview", (960, 540, 4)), ("final", (1280, 720, 4))])
+def test_profile_sets_the_encoded_video(tmp_path, name, expected):
+    state, _ = _run_images(tmp_path)
+    segments = [{"speaker": "Mike", "content": "one", "background": state["section_backgrounds"]["section_01"], "duration": 1.0}]
+    output = tmp_path / f"{name}.mp4"
+    create_video(segments, state["speaker_images"], str(output), _silence(tmp_path / "audio.wav", 1.0), Configuration(render_profile=name))
+    assert _video_stream(output) == expected
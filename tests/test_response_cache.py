@@ -0,0 +1,29 @@
+"""Response cache round trip and connection handling"""
+import os
+
+import pytest
+from google.genai import types
+
+from agent.response_cache import ResponseCache
+
+
+def _open_files(path):
+    return sum(1 for fd in os.listdir("/proc/self/fd") if os.path.realpath(f"/proc/self/fd/{fd}").startswith(str(path)))
+
+
+def test_round_trip(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    key = ResponseCache.make_key("gemini-2.5-flash", "hello")
+    assert cache.get(key) is None
+    cache.put(key, types.GenerateContentResponse(model_version="test"))
+    assert cache.get(key).model_version == "test"
+    assert cache.stats() == {"default": {"hits": 1, "misses": 1}}
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_connections_are_closed(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    for i in range(20):
+        cache.put(str(i), types.GenerateContentResponse())
+        cache.get(str(i))
+    assert _open_files(tmp_path) == 0
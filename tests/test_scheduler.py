@@ -0,0 +1,121 @@
+"""Rate limit parsing, token bucket ordering and retry delays"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from google.genai import errors
+
+from agent.configuration import Configuration
+from agent.scheduler import TokenBucket, parse_rate_limits, retry_delay
+from benchmarks.fake_client import FakeClient
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("") == {}
+    assert parse_rate_limits("gemini-2.5-flash=600, *=30:5") == {"gemini-2.5-flash": (600.0, 10), "*": (30.0, 5)}
+    # Burst defaults to one second's worth of requests, at least 1
+    assert parse_rate_limits("m=30") == {"m": (30.0, 1)}
+
+
+@pytest.mark.parametrize("spec", ["m=0", "m=-5", "m=10:0", "m=nan", "m=inf", "m=fast", "m=10:x", "m"])
+def test_parse_rate_limits_rejects_invalid_entries(spec):
+    with pytest.raises(ValueError, match=spec.replace("=", ".")):
+        parse_rate_limits(f"ok=10,{spec}")
+
+
+def test_token_bucket_rejects_zero_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_token_bucket_paces_calls_to_the_rate():
+    bucket = TokenBucket(600, burst=2)  # a token every 0.1s
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # Two from the burst, then two refills
+    assert 0.15 <= time.monotonic() - start < 1.0
+
+
+def test_token_bucket_serves_interactive_before_batch():
+    bucket = TokenBucket(600, burst=1)
+    bucket.acquire()  # empty the bucket so the others queue up
+    order = []
+
+    def take(name, priority):
+        bucket.acquire(priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=(f"batch{i}", "batch")) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.02)
+    threads.append(threading.Thread(target=take, args=("interactive", "interactive")))
+    threads[-1].start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["interactive", "batch0", "batch1"]
+
+
+def test_token_bucket_async_and_threads_share_the_line():
+    bucket = TokenBucket(600, burst=1)
+    bucket.acquire()
+    order = []
+
+    def take_in_thread():
+        bucket.acquire("batch")
+        order.append("thread")
+
+    async def main():
+        thread = threading.Thread(target=take_in_thread)
+        thread.start()
+        await asyncio.sleep(0.02)
+        await bucket.aacquire("interactive")
+        order.append("task")
+        await asyncio.to_thread(thread.join, 5)
+
+    asyncio.run(main())
+    assert order == ["task", "thread"]
+
+
+def test_cancelled_waiter_leaves_the_line():
+    bucket = TokenBucket(60, burst=1)  # a token per second
+    bucket.acquire()
+
+    async def main():
+        waiter = asyncio.create_task(bucket.aacquire())
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(main())
+    assert bucket._waiting == [] and bucket._async_waiters == {}
+
+
+def _configuration(**overrides):
+    return Configuration(**{"max_retries": 3, "retry_base_delay": 0.5, "retry_max_delay": 4.0, **overrides})
+
+
+def test_retry_delay_honours_retry_after_header():
+    error = errors.ClientError(429, {"error": {"code": 429, "message": "slow down"}},
+                               httpx.Response(429, headers={"Retry-After": "7"}))
+    assert retry_delay(error, 0, _configuration()) == 7.0
+
+
+def test_retry_delay_honours_retry_info_detail():
+    client = FakeClient(error_rate=1.0, retry_after=3.5)
+    with pytest.raises(errors.ClientError) as info:
+        client.maybe_fail("gemini-2.5-flash")
+    assert retry_delay(info.value, 0, _configuration()) == 3.5
+
+
+def test_retry_delay_backs_off_and_gives_up():
+    error = errors.ServerError(503, {"error": {"code": 503, "message": "unavailable"}})
+    configuration = _configuration()
+    for attempt in range(3):
+        assert 0 <= retry_delay(error, attempt, configuration) <= min(4.0, 0.5 * 2 ** attempt)
+    assert retry_delay(error, 3, configuration) is None
+    assert retry_delay(errors.ClientError(400, {"error": {"code": 400, "message": "bad"}}), 0, configuration) is None
@@ -0,0 +1,124 @@
+"""TranscriptAnalysis validation and the segmentation repair retries"""
+import json
+
+import pytest
+from langchain_core.runnables import RunnableConfig
+from pydantic import ValidationError
+
+from agent.graph import _parse_analysis, segment_transcript
+from agent.schemas import TranscriptAnalysis
+from benchmarks.fake_client import ANALYSIS, SCRIPT
+
+
+def test_fills_defaults_and_accepts_loose_fields():
+    analysis = TranscriptAnalysis.model_validate({
+        "speakers": {"Mike": {"role": ""}, "Dr. Lisa": None},
+        "sections": [
+            {"title": None, "mood": "", "key_concepts": "qubits, error correction,", "duration_estimate": None},
+            {"title": "Outlook", "theme": None},
+        ],
+    })
+    state = analysis.to_state()
+    assert state["speakers"]["Mike"]["role"] == "podcast participant"
+    assert state["speakers"]["Dr. Lisa"]["characteristics"] == "professional podcast speaker"
+    first, second = state["sections"]
+    assert (first["title"], first["theme"], first["mood"]) == ("Section 1", "Section 1", "neutral")
+    assert first["key_concepts"] == ["qubits", "error correction"]
+    assert first["duration_estimate"] == 0.0
+    assert second["theme"] == "Outlook"
+
+
+@pytest.mark.parametrize("payload", [
+    {"speakers": [], "sections": []},
+    {"speakers": [{"role": "host"}], "sections": [{}]},
+    {"sections": [{}]},
+])
+def test_rejects_unusable_analysis(payload):
+    with pytest.raises(ValidationError):
+        TranscriptAnalysis.model_validate(payload)
+
+
+def test_parse_analysis_tolerates_prose_around_the_json():
+    state = _parse_analysis(f"Here is the analysis:\n```json\n{ANALYSIS}\n```\nLet me know!")
+    assert set(state["speakers"]) == {"Mike", "Dr. Lisa"}
+    assert state["sections"]
+
+
+def test_parse_analysis_raises_value_error():
+    with pytest.raises(ValueError):
+        _parse_analysis("no json here")
+    with pytest.raises(ValueError):
+        _parse_analysis('{"speakers": [], "sections": []}')
+
+
+class _Replies:
+    """Answer the segmentation call with each reply in turn"""
+
+    def __init__(self, client, replies):
+        self.prompts = []
+        self._replies = list(replies)
+        respond = client.respond
+
+        def reply(model, contents, config=None):
+            kind, response = respond(model, contents, config)
+            if "Analyze this podcast transcript" in contents or "could not be used" in contents:
+                self.prompts.append(contents)
+                response.candidates[0].content.parts[0].text = self._replies.pop(0)
+            return kind, response
+
+        client.respond = reply
+
+
+def _segment(configurable, **overrides):
+    config = RunnableConfig(configurable={**configurable, **overrides})
+    return segment_transcript({"podcast_script": SCRIPT, "run_id": "segmentation"}, config)["analysis"]
+
+
+def test_repairs_invalid_output(fake_client, configurable):
+    replies = _Replies(fake_client, ['{"speakers": {"Mike": {}}, "sections": []}', ANALYSIS])
+    analysis = _segment(configurable)
+    assert len(replies.prompts) == 2
+    assert "could not be used" in replies.prompts[1] and '"sections": []' in replies.prompts[1]
+    assert analysis == _parse_analysis(ANALYSIS)
+
+
+def test_gives_up_after_the_repair_attempts(fake_client, configurable):
+    replies = _Replies(fake_client, ["not json"] * 3)
+    with pytest.raises(ValueError):
+        _segment(configurable, segmentation_repair_attempts=2)
+    assert len(replies.prompts) == 3
+
+
+def test_saves_the_analysis_in_the_workspace(fake_client, configurable, tmp_path):
+    analysis = _segment(configurable)
+    saved = tmp_path / "runs" / "segmentation" / "analysis.json"
+    assert json.loads(saved.read_text(encoding="utf-8")) == analysis
+
+
+def _cached_configurable(configurable, tmp_path):
+    return {**configurable, "response_cache_nodes": "segment_transcript", "response_cache_path": str(tmp_path / "responses.sqlite")}
+
+
+@pytest.mark.parametrize("replies", [[ANALYSIS], ['{"speakers": {"Mike": {}}, "sections": []}', ANALYSIS]])
+def test_cached_rerun_makes_no_model_calls(fake_client, configurable, tmp_path, replies):
+    configurable = _cached_configurable(configurable, tmp_path)
+    first = _Replies(fake_client, replies)
+    analysis = _segment(configurable)
+    assert len(first.prompts) == len(replies)
+
+    calls = dict(fake_client.calls)
+    assert _segment(configurable) == analysis
+    assert fake_client.calls == calls
+
+
+def test_invalid_answer_is_not_cached(fake_client, configurable, tmp_path):
+    configurable = _cached_configurable(configurable, tmp_path)
+    _Replies(fake_client, ["not json"] * 2)
+    with pytest.raises(ValueError):
+        _segment(configurable, segmentation_repair_attempts=1)
+
+    del fake_client.respond  # back to the unpatched client
+    replies = _Replies(fake_client, [ANALYSIS])
+    assert _segment(configurable) == _parse_analysis(ANALYSIS)
+    # Asked afresh rather than repairing the failed answer from the cache
+    assert len(replies.prompts) == 1 and "Analyze this podcast transcript" in replies.prompts[0]
@@ -0,0 +1,33 @@
+"""TTS cache eviction"""
+from agent.tts_cache import TTSCache
+
+
+def test_evicts_least_recently_used_within_budget(tmp_path, monkeypatch):
+    cache = TTSCache(tmp_path, max_bytes=1000)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: scans.append(1) or evict())
+
+    for i in range(4):
+        cache.put(f"{i:02d}key", b"x" * 300)
+    # One scan to learn the directory's size, one when the fourth write passes the budget
+    assert len(scans) == 2
+    assert cache.get("00key") is None
+    assert all(cache.get(f"{i:02d}key") for i in range(1, 4))
+    assert cache.stats()["evictions"] == 1
+
+    # Overwriting an entry does not count its bytes twice
+    cache.put("03key", b"y" * 300)
+    assert len(scans) == 2
+
+
+def test_rescan_counts_writes_by_other_processes(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=1000)
+    other = TTSCache(tmp_path, max_bytes=1000)
+    cache.put("aakey", b"x" * 400)
+    other.put("bbkey", b"x" * 400)
+    other.put("cckey", b"x" * 400)  # the other instance's scan evicts the oldest entry
+    assert sum(path.stat().st_size for path in tmp_path.glob("*/*.pcm")) <= 1000
+    cache.put("ddkey", b"x" * 400)  # still within this instance's running total
+    cache.put("eekey", b"x" * 400)  # passes it: the rescan sees the other instance's entries
+    assert sum(path.stat().st_size for path in tmp_path.glob("*/*.pcm")) <= 1000